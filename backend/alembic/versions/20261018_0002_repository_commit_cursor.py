@@ -0,0 +1,29 @@
+"""repository commit sync cursor
+
+Revision ID: 20261018_0002
+Revises: 20260212_0001
+Create Date: 2026-10-18 00:00:00
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "20261018_0002"
+down_revision: Union[str, None] = "20260212_0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("repositories", sa.Column("commit_cursor_sha", sa.String(length=40), nullable=True))
+    op.add_column("repositories", sa.Column("commit_cursor_at", sa.DateTime(timezone=True), nullable=True))
+    op.add_column("repositories", sa.Column("commits_backfilled_at", sa.DateTime(timezone=True), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("repositories", "commits_backfilled_at")
+    op.drop_column("repositories", "commit_cursor_at")
+    op.drop_column("repositories", "commit_cursor_sha")
@@ -19,10 +19,11 @@ from app.schemas.portfolio import (
     PortfolioRead,
     PortfolioUpdate,
 )
+from app.services.artifacts import ArtifactStore
+from app.services.deployer import DeployerService
 from app.services.events import generation_event_stream
-from app.tasks.generation import generate_portfolio
-from app.utils.helpers import utcnow
-from app.utils.metrics import GENERATION_JOBS_TOTAL
+from app.services.published_sites import invalidate_published_hosts, portfolio_hosts
+from app.tasks.generation import start_generation
 
 router = APIRouter()
 
@@ -87,9 +88,11 @@ async def update_portfolio(
     portfolio_id: str,
     payload: PortfolioUpdate,
     db: AsyncSession = Depends(get_db),
+    redis: Redis = Depends(get_redis),
     current_user: User = Depends(get_current_user),
 ) -> PortfolioRead:
     portfolio = await _get_portfolio_or_404(db, portfolio_id, current_user.id)
+    previous_custom_domain = portfolio.custom_domain
     if payload.custom_domain is not None:
         portfolio.custom_domain = payload.custom_domain
     if payload.template_id is not None:
@@ -101,6 +104,10 @@ async def update_portfolio(
 
     await db.commit()
     await db.refresh(portfolio)
+    # Publishing, unpublishing or moving the custom domain changes what these hosts serve.
+    await invalidate_published_hosts(
+        redis, portfolio_hosts(portfolio.subdomain, previous_custom_domain, portfolio.custom_domain)
+    )
     return PortfolioRead.model_validate(portfolio)
 
 
@@ -108,11 +115,17 @@ async def update_portfolio(
 async def delete_portfolio(
     portfolio_id: str,
     db: AsyncSession = Depends(get_db),
+    redis: Redis = Depends(get_redis),
     current_user: User = Depends(get_current_user),
 ) -> dict:
     portfolio = await _get_portfolio_or_404(db, portfolio_id, current_user.id)
+    hosts = portfolio_hosts(portfolio.subdomain, portfolio.custom_domain)
+    subdomain = portfolio.subdomain
     await db.delete(portfolio)
     await db.commit()
+    # The page object itself is left to artifact GC once nothing references it.
+    await ArtifactStore(redis).unlink(subdomain)
+    await invalidate_published_hosts(redis, hosts)
     return {"status": "deleted"}
 
 
@@ -120,23 +133,14 @@ async def delete_portfolio(
 async def trigger_generation(
     portfolio_id: str,
     db: AsyncSession = Depends(get_db),
+    redis: Redis = Depends(get_redis),
     current_user: User = Depends(get_current_user),
 ) -> GenerationJobRead:
     portfolio = await _get_portfolio_or_404(db, portfolio_id, current_user.id)
-    job = GenerationJob(
-        user_id=current_user.id,
-        portfolio_id=portfolio.id,
-        status="pending",
-        progress_percentage=0,
-        current_step="Queued",
-        started_at=utcnow(),
-    )
-    db.add(job)
-    await db.commit()
-    await db.refresh(job)
-
-    generate_portfolio.delay(str(job.id))
-    GENERATION_JOBS_TOTAL.labels(status="queued").inc()
+    # While a job holds the portfolio's lease, repeated requests attach to it.
+    job = await start_generation(db, redis, portfolio)
+    if job is None:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Generation is starting, retry shortly")
     return GenerationJobRead.model_validate(job)
 
 
@@ -148,6 +152,8 @@ async def preview_portfolio(
 ) -> PortfolioPreviewResponse:
     portfolio = await _get_portfolio_or_404(db, portfolio_id, current_user.id)
     html = portfolio.generated_html or "<html><body><h1>Portfolio not generated yet.</h1></body></html>"
+    # The editor shows previews in an iframe srcdoc, which cannot resolve the shared stylesheet path.
+    html = await DeployerService().inline_stylesheets(html)
     return PortfolioPreviewResponse(portfolio_id=portfolio_id, html=html)
 
 
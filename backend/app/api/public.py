@@ -1,74 +1,99 @@
 from __future__ import annotations
 
-import re
 import uuid
+from urllib.parse import urlsplit
 
 from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import JSONResponse
 from redis.asyncio import Redis
 
 from app.core.redis import get_redis_client
-from app.schemas.public import PublicGenerateRequest, PublicGenerateResponse
-from app.services.deployer import DeployerService
-from app.services.github import GitHubAPIError, GitHubService, parse_github_username
-from app.services.public_portfolio import build_summary, describe_repo, extract_skills, render_public_portfolio
-from app.services.rate_limiter import RateLimiter
+from app.schemas.public import (
+    PublicGenerateJobResponse,
+    PublicGenerateJobStatus,
+    PublicGenerateRequest,
+    PublicGenerateResponse,
+)
+from app.services.github import parse_github_username
+from app.services.public_generation import (
+    PublicGenerationError,
+    PublicGenerationJobs,
+    generate_public_portfolio,
+    generation_flight_key,
+    public_generation_flights,
+)
+from app.services.singleflight import SingleFlight
+from app.tasks.public_generation import generate_public_portfolio_job
 
 router = APIRouter()
 
+_generation_flights: SingleFlight | None = None
 
-def _to_safe_slug(value: str) -> str:
-    slug = re.sub(r"[^a-zA-Z0-9-]+", "-", value.strip().lower()).strip("-")
-    return slug or "portfolio"
 
+def _get_generation_flights() -> SingleFlight:
+    global _generation_flights
+    if _generation_flights is None:
+        _generation_flights = public_generation_flights(get_redis_client())
+    return _generation_flights
 
-@router.post("/generate", response_model=PublicGenerateResponse)
+
+def _to_response(result: dict, request: Request) -> PublicGenerateResponse:
+    path = result["portfolio_path"]
+    # Pages served straight from object storage/CDN (STORAGE_PUBLIC_URL) already have an absolute URL.
+    if not urlsplit(path).scheme:
+        path = f"{str(request.base_url).rstrip('/')}{path}"
+    return PublicGenerateResponse(**result, portfolio_url=path)
+
+
+@router.post(
+    "/generate",
+    response_model=PublicGenerateResponse,
+    responses={202: {"model": PublicGenerateJobResponse}},
+)
 async def public_generate_portfolio(
     payload: PublicGenerateRequest,
     request: Request,
-) -> PublicGenerateResponse:
+):
     try:
         username = parse_github_username(payload.github_url)
     except ValueError as exc:
         raise HTTPException(status_code=400, detail=str(exc)) from exc
 
     redis: Redis = get_redis_client()
-    github_service = GitHubService(RateLimiter(redis))
+    if payload.mode == "async":
+        job_id = str(uuid.uuid4())
+        await PublicGenerationJobs(redis).update(job_id, "pending", 0, "Queued")
+        generate_public_portfolio_job.delay(job_id, username, payload.template_id, payload.refresh)
+        job = PublicGenerateJobResponse(
+            job_id=job_id,
+            status="pending",
+            status_url=str(request.url_for("public_generation_job_status", job_id=job_id)),
+            events_url=f"/ws/generation/{job_id}",
+        )
+        return JSONResponse(status_code=202, content=job.model_dump())
 
+    # Concurrent requests for the same username and template share one fetch-and-render run.
     try:
-        profile = await github_service.get_public_user(username)
-        repositories = await github_service.get_public_repositories(username, max_repos=120)
-    except GitHubAPIError as exc:
-        raise HTTPException(status_code=404, detail=str(exc)) from exc
-    except Exception as exc:
-        raise HTTPException(status_code=502, detail="Failed to fetch GitHub data") from exc
-
-    filtered_repositories = [repo for repo in repositories if not repo.get("fork")]
-    for repository in filtered_repositories:
-        if not repository.get("description"):
-            repository["description"] = describe_repo(repository)
-
-    skills = extract_skills(filtered_repositories)
-    summary = build_summary(profile, filtered_repositories, skills)
-
-    html = render_public_portfolio(
-        username=username,
-        profile=profile,
-        repositories=filtered_repositories,
-        skills=skills,
-        template_id=payload.template_id,
-    )
+        result = await _get_generation_flights().do(
+            generation_flight_key(username, payload.template_id, payload.refresh),
+            lambda: generate_public_portfolio(redis, username, payload.template_id, refresh=payload.refresh),
+        )
+    except PublicGenerationError as exc:
+        raise HTTPException(status_code=exc.status_code, detail=exc.detail) from exc
+    return _to_response(result, request)
 
-    suffix = str(uuid.uuid4())[:8]
-    slug = _to_safe_slug(f"{username}-{suffix}")
-    deployer = DeployerService()
-    portfolio_path = deployer.deploy_static_portfolio(slug, html)
-    base_url = str(request.base_url).rstrip("/")
-    portfolio_url = f"{base_url}{portfolio_path}"
 
-    return PublicGenerateResponse(
-        username=username,
-        portfolio_path=portfolio_path,
-        portfolio_url=portfolio_url,
-        projects_analyzed=len(filtered_repositories),
-        summary=summary,
+@router.get("/jobs/{job_id}", response_model=PublicGenerateJobStatus, name="public_generation_job_status")
+async def public_generation_job_status(job_id: str, request: Request) -> PublicGenerateJobStatus:
+    state = await PublicGenerationJobs(get_redis_client()).get(job_id)
+    if state is None:
+        raise HTTPException(status_code=404, detail="Generation job not found")
+    result = state.get("result")
+    return PublicGenerateJobStatus(
+        job_id=job_id,
+        status=state["status"],
+        progress=state["progress"],
+        step=state["step"],
+        error=state.get("error"),
+        result=_to_response(result, request) if result else None,
     )
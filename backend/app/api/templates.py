@@ -1,28 +1,9 @@
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 
-router = APIRouter()
+from app.services.renderer import get_template_registry
 
-TEMPLATES = [
-    {
-        "id": "minimal",
-        "name": "Minimal Pro",
-        "description": "Clean engineering-focused template.",
-        "defaults": {"accent": "#0f766e", "font": "Space Grotesk"},
-    },
-    {
-        "id": "modern",
-        "name": "Modern Grid",
-        "description": "Balanced layout with metrics-first sections.",
-        "defaults": {"accent": "#1d4ed8", "font": "Sora"},
-    },
-    {
-        "id": "creative",
-        "name": "Creative Systems",
-        "description": "Bold visual narrative for senior portfolio storytelling.",
-        "defaults": {"accent": "#ea580c", "font": "General Sans"},
-    },
-]
+router = APIRouter()
 
 
 class TemplateCustomizePayload(BaseModel):
@@ -31,14 +12,14 @@ class TemplateCustomizePayload(BaseModel):
 
 @router.get("")
 async def list_templates() -> list[dict]:
-    return TEMPLATES
+    return get_template_registry().list()
 
 
 @router.get("/{template_id}")
 async def get_template(template_id: str) -> dict:
-    for template in TEMPLATES:
-        if template["id"] == template_id:
-            return template
+    template = get_template_registry().get(template_id)
+    if template is not None:
+        return template
     raise HTTPException(status_code=404, detail="Template not found")
 
 
@@ -47,5 +28,5 @@ async def customize_template(template_id: str, payload: TemplateCustomizePayload
     template = await get_template(template_id)
     return {
         "template_id": template["id"],
-        "resolved_theme": {**template["defaults"], **payload.theme_config},
+        "resolved_theme": get_template_registry().resolve_theme(template["id"], payload.theme_config),
     }
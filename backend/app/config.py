@@ -1,4 +1,5 @@
 from functools import lru_cache
+from typing import Literal
 
 from pydantic import Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
@@ -20,6 +21,9 @@ class Settings(BaseSettings):
     celery_result_backend: str = Field(..., alias="CELERY_RESULT_BACKEND")
     celery_task_timeout: int = Field(default=3600, alias="CELERY_TASK_TIMEOUT")
     celery_max_retries: int = Field(default=3, alias="CELERY_MAX_RETRIES")
+    generation_deadline_seconds: int = Field(default=300, alias="GENERATION_DEADLINE_SECONDS")
+    generation_lease_seconds: int = Field(default=900, alias="GENERATION_LEASE_SECONDS")
+    generation_progress_write_seconds: float = Field(default=2.0, alias="GENERATION_PROGRESS_WRITE_SECONDS")
 
     secret_key: str = Field(..., alias="SECRET_KEY")
     access_token_expire_minutes: int = Field(default=60, alias="ACCESS_TOKEN_EXPIRE_MINUTES")
@@ -29,6 +33,30 @@ class Settings(BaseSettings):
     github_client_secret: str = Field(default="", alias="GITHUB_CLIENT_SECRET")
     github_redirect_uri: str = Field(default="", alias="GITHUB_REDIRECT_URI")
     github_api_rate_limit: int = Field(default=5000, alias="GITHUB_API_RATE_LIMIT")
+    github_rate_reserve: int = Field(default=10, alias="GITHUB_RATE_RESERVE")
+    github_rate_max_wait_seconds: float = Field(default=900.0, alias="GITHUB_RATE_MAX_WAIT_SECONDS")
+    github_public_max_wait_seconds: float = Field(default=10.0, alias="GITHUB_PUBLIC_MAX_WAIT_SECONDS")
+    github_rate_poll_seconds: float = Field(default=5.0, alias="GITHUB_RATE_POLL_SECONDS")
+    github_rate_max_retries: int = Field(default=2, alias="GITHUB_RATE_MAX_RETRIES")
+    github_egress_ip: str = Field(default="shared", alias="GITHUB_EGRESS_IP")
+    github_backend: Literal["rest", "graphql"] = Field(default="rest", alias="GITHUB_BACKEND")
+    github_page_concurrency: int = Field(default=4, alias="GITHUB_PAGE_CONCURRENCY")
+    github_languages_concurrency: int = Field(default=8, alias="GITHUB_LANGUAGES_CONCURRENCY")
+    github_commit_detail_concurrency: int = Field(default=8, alias="GITHUB_COMMIT_DETAIL_CONCURRENCY")
+    commit_insert_batch_size: int = Field(default=25, alias="COMMIT_INSERT_BATCH_SIZE")
+    github_commit_history_limit: int = Field(default=500, alias="GITHUB_COMMIT_HISTORY_LIMIT")
+    github_commit_backfill_limit: int = Field(default=5000, alias="GITHUB_COMMIT_BACKFILL_LIMIT")
+
+    github_cache_enabled: bool = Field(default=True, alias="GITHUB_CACHE_ENABLED")
+    github_cache_ttl_seconds: int = Field(default=7 * 24 * 3600, alias="GITHUB_CACHE_TTL_SECONDS")
+    github_cache_max_age_seconds: int = Field(default=60, alias="GITHUB_CACHE_MAX_AGE_SECONDS")
+
+    http_client_http2: bool = Field(default=True, alias="HTTP_CLIENT_HTTP2")
+    http_client_timeout: float = Field(default=30.0, alias="HTTP_CLIENT_TIMEOUT")
+    http_client_connect_timeout: float = Field(default=10.0, alias="HTTP_CLIENT_CONNECT_TIMEOUT")
+    http_pool_max_connections: int = Field(default=100, alias="HTTP_POOL_MAX_CONNECTIONS")
+    http_pool_max_keepalive: int = Field(default=20, alias="HTTP_POOL_MAX_KEEPALIVE")
+    http_pool_keepalive_expiry: float = Field(default=30.0, alias="HTTP_POOL_KEEPALIVE_EXPIRY")
 
     groq_api_key: str = Field(default="", alias="GROQ_API_KEY")
     groq_model: str = Field(default="llama-3.1-70b-versatile", alias="GROQ_MODEL")
@@ -41,6 +69,41 @@ class Settings(BaseSettings):
     db_cache_ttl_hours: int = Field(default=24, alias="DB_CACHE_TTL_HOURS")
     redis_cache_prefix: str = Field(default="devforge:cache:", alias="REDIS_CACHE_PREFIX")
 
+    public_result_ttl_seconds: int = Field(default=24 * 3600, alias="PUBLIC_RESULT_TTL_SECONDS")
+    public_result_fresh_seconds: int = Field(default=300, alias="PUBLIC_RESULT_FRESH_SECONDS")
+    public_job_ttl_seconds: int = Field(default=3600, alias="PUBLIC_JOB_TTL_SECONDS")
+
+    storage_backend: Literal["local", "s3"] = Field(default="local", alias="STORAGE_BACKEND")
+    storage_local_dir: str = Field(default="generated_portfolios", alias="STORAGE_LOCAL_DIR")
+    storage_public_url: str = Field(default="/generated", alias="STORAGE_PUBLIC_URL")
+    storage_s3_prefix: str = Field(default="", alias="STORAGE_S3_PREFIX")
+    storage_io_workers: int = Field(default=8, alias="STORAGE_IO_WORKERS")
+    artifact_public_slug_ttl_seconds: int = Field(default=2 * 24 * 3600, alias="ARTIFACT_PUBLIC_SLUG_TTL_SECONDS")
+    artifact_gc_grace_seconds: int = Field(default=3600, alias="ARTIFACT_GC_GRACE_SECONDS")
+    artifact_gc_interval_seconds: float = Field(default=3600.0, alias="ARTIFACT_GC_INTERVAL_SECONDS")
+    cloudflare_r2_access_key: str = Field(default="", alias="CLOUDFLARE_R2_ACCESS_KEY")
+    cloudflare_r2_secret_key: str = Field(default="", alias="CLOUDFLARE_R2_SECRET_KEY")
+    cloudflare_r2_bucket: str = Field(default="devforge-portfolios", alias="CLOUDFLARE_R2_BUCKET")
+    cloudflare_r2_endpoint: str = Field(default="", alias="CLOUDFLARE_R2_ENDPOINT")
+
+    template_bytecode_cache_dir: str = Field(default="/tmp/devforge-templates", alias="TEMPLATE_BYTECODE_CACHE_DIR")
+    generated_cache_control: str = Field(default="public, max-age=60, must-revalidate", alias="GENERATED_CACHE_CONTROL")
+    card_fragment_ttl_seconds: int = Field(default=7 * 24 * 3600, alias="CARD_FRAGMENT_TTL_SECONDS")
+
+    portfolio_base_domain: str = Field(default="devforge.dev", alias="PORTFOLIO_BASE_DOMAIN")
+    portfolio_reserved_subdomains: str = Field(default="www,api,app", alias="PORTFOLIO_RESERVED_SUBDOMAINS")
+    # Hosts that only ever reach the app (local dev, internal service names); never looked up as custom domains.
+    app_hosts: str = Field(default="localhost,api", alias="APP_HOSTS")
+    published_site_index_ttl_seconds: int = Field(default=3600, alias="PUBLISHED_SITE_INDEX_TTL_SECONDS")
+    published_site_missing_ttl_seconds: int = Field(default=60, alias="PUBLISHED_SITE_MISSING_TTL_SECONDS")
+    published_hot_cache_bytes: int = Field(default=64 * 1024 * 1024, alias="PUBLISHED_HOT_CACHE_BYTES")
+    published_hot_cache_ttl_seconds: float = Field(default=300.0, alias="PUBLISHED_HOT_CACHE_TTL_SECONDS")
+
+    singleflight_lock_ttl_seconds: float = Field(default=60.0, alias="SINGLEFLIGHT_LOCK_TTL_SECONDS")
+    singleflight_result_ttl_seconds: float = Field(default=10.0, alias="SINGLEFLIGHT_RESULT_TTL_SECONDS")
+    singleflight_wait_seconds: float = Field(default=45.0, alias="SINGLEFLIGHT_WAIT_SECONDS")
+    singleflight_poll_seconds: float = Field(default=0.1, alias="SINGLEFLIGHT_POLL_SECONDS")
+
     cors_origins: str = Field(default="http://localhost:3000,http://localhost:8000", alias="CORS_ORIGINS")
 
     enable_metrics: bool = Field(default=True, alias="ENABLE_METRICS")
@@ -49,6 +112,14 @@ class Settings(BaseSettings):
     def cors_origins_list(self) -> list[str]:
         return [item.strip() for item in self.cors_origins.split(",") if item.strip()]
 
+    @property
+    def portfolio_reserved_subdomains_list(self) -> list[str]:
+        return [item.strip().lower() for item in self.portfolio_reserved_subdomains.split(",") if item.strip()]
+
+    @property
+    def app_hosts_list(self) -> list[str]:
+        return [item.strip().lower() for item in self.app_hosts.split(",") if item.strip()]
+
 
 @lru_cache
 def get_settings() -> Settings:
@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+from starlette.datastructures import Headers
+from starlette.responses import Response
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.config import get_settings
+from app.core.redis import get_redis_client
+from app.core.static import PRECOMPRESSED_ENCODINGS, accepted_encodings
+from app.services.published_sites import PublishedPage, PublishedSiteResolver, is_app_host, normalize_host
+from app.utils.logging import get_logger
+
+settings = get_settings()
+logger = get_logger("app.core.hosting")
+
+PAGE_PATHS = {"/", "/index.html"}
+
+_resolver: PublishedSiteResolver | None = None
+
+
+def get_published_site_resolver() -> PublishedSiteResolver:
+    global _resolver
+    if _resolver is None:
+        _resolver = PublishedSiteResolver(get_redis_client())
+    return _resolver
+
+
+async def close_published_sites() -> None:
+    global _resolver
+    if _resolver is not None:
+        await _resolver.close()
+        _resolver = None
+
+
+def page_response(page: PublishedPage, scope: Scope) -> Response:
+    """Negotiate a precompressed variant of a page and answer it, or 304 for a matching ETag."""
+    headers = Headers(scope=scope)
+    accepted = accepted_encodings(headers.get("accept-encoding", ""))
+    encoding = next((name for name, _ in PRECOMPRESSED_ENCODINGS if name in accepted and name in page.variants), None)
+    variant = encoding or "identity"
+    etag = f'"{page.etag(variant)}"'
+    response_headers = {
+        "ETag": etag,
+        "Cache-Control": settings.generated_cache_control,
+        "Vary": "Accept-Encoding",
+    }
+    if encoding:
+        response_headers["Content-Encoding"] = encoding
+
+    if etag in [tag.strip() for tag in headers.get("if-none-match", "").split(",")]:
+        return Response(status_code=304, headers=response_headers)
+    body = page.variants[variant]
+    return Response(
+        content=b"" if scope["method"] == "HEAD" else body,
+        media_type="text/html; charset=utf-8",
+        headers={**response_headers, "Content-Length": str(len(body))},
+    )
+
+
+class PublishedSiteMiddleware:
+    """
+    Serve published portfolios by Host header: `<subdomain>.<PORTFOLIO_BASE_DOMAIN>` and
+    custom domains answer `GET /` with their deployed page. Everything else (the API, the
+    app hosts, `/generated/...` assets referenced by the page) falls through to the app.
+    Lookups fail open: if Redis or Postgres is unavailable the request reaches the app.
+    """
+
+    def __init__(self, app: ASGIApp, resolver: PublishedSiteResolver | None = None):
+        self.app = app
+        self._resolver = resolver
+
+    @property
+    def resolver(self) -> PublishedSiteResolver:
+        return self._resolver or get_published_site_resolver()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] not in ("GET", "HEAD") or scope["path"] not in PAGE_PATHS:
+            await self.app(scope, receive, send)
+            return
+
+        host = normalize_host(Headers(scope=scope).get("host", ""))
+        if not host or is_app_host(host):
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            page = await self.resolver.page(host)
+        except Exception:
+            logger.warning("published_site_lookup_failed", host=host, exc_info=True)
+            page = None
+        if page is None:
+            await self.app(scope, receive, send)
+            return
+
+        response = page_response(page, scope)
+        await response(scope, receive, send)
@@ -0,0 +1,60 @@
+import asyncio
+import weakref
+
+import httpx
+
+from app.config import get_settings
+
+settings = get_settings()
+
+# One pooled client per event loop: httpx connections are bound to the loop that opened them.
+_http_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def _build_client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        http2=settings.http_client_http2,
+        limits=httpx.Limits(
+            max_connections=settings.http_pool_max_connections,
+            max_keepalive_connections=settings.http_pool_max_keepalive,
+            keepalive_expiry=settings.http_pool_keepalive_expiry,
+        ),
+        timeout=httpx.Timeout(settings.http_client_timeout, connect=settings.http_client_connect_timeout),
+    )
+
+
+def get_http_client() -> httpx.AsyncClient:
+    loop = asyncio.get_running_loop()
+    client = _http_clients.get(loop)
+    if client is None or client.is_closed:
+        client = _build_client()
+        _http_clients[loop] = client
+    return client
+
+
+async def close_http_client() -> None:
+    client = _http_clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
+
+
+def reset_http_clients() -> None:
+    """Forget every client without closing it (after fork their connections belong to the parent)."""
+    _http_clients.clear()
+
+
+def http_pool_stats() -> dict[str, int]:
+    stats = {"clients": 0, "active": 0, "idle": 0}
+    for client in list(_http_clients.values()):
+        if client.is_closed:
+            continue
+        stats["clients"] += 1
+        pool = getattr(client._transport, "_pool", None)
+        for connection in getattr(pool, "connections", []):
+            if connection.is_idle():
+                stats["idle"] += 1
+            elif not connection.is_closed():
+                stats["active"] += 1
+    return stats
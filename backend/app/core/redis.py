@@ -5,6 +5,7 @@ from app.config import get_settings
 settings = get_settings()
 
 _redis_client: Redis | None = None
+_broker_client: Redis | None = None
 
 
 def get_redis_client() -> Redis:
@@ -14,11 +15,28 @@ def get_redis_client() -> Redis:
     return _redis_client
 
 
+def get_broker_client() -> Redis:
+    """The Celery broker's Redis (may be a different database than REDIS_URL); read-only use."""
+    global _broker_client
+    if _broker_client is None:
+        _broker_client = Redis.from_url(settings.celery_broker_url, decode_responses=True)
+    return _broker_client
+
+
+def reset_redis_client() -> None:
+    """Forget the clients without closing them (after fork their connections belong to the parent)."""
+    global _redis_client, _broker_client
+    _redis_client = None
+    _broker_client = None
+
+
 async def close_redis() -> None:
-    global _redis_client
-    if _redis_client is not None:
-        await _redis_client.close()
-        _redis_client = None
+    global _redis_client, _broker_client
+    for client in (_redis_client, _broker_client):
+        if client is not None:
+            await client.aclose()
+    _redis_client = None
+    _broker_client = None
 
 
 async def check_redis_health() -> bool:
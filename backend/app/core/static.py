@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+import hashlib
+import mimetypes
+import os
+from functools import lru_cache
+
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+from starlette.types import Scope
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+# Preferred first; each is served only when the deployer wrote the matching sibling file.
+PRECOMPRESSED_ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+
+@lru_cache(maxsize=4096)
+def _content_etag(path: str, mtime_ns: int, size: int) -> str:
+    # Keyed on mtime/size so a redeploy recomputes; the tag itself is a content hash (strong).
+    digest = hashlib.sha256()
+    with open(path, "rb") as handle:
+        for chunk in iter(lambda: handle.read(65536), b""):
+            digest.update(chunk)
+    return digest.hexdigest()[:32]
+
+
+def accepted_encodings(accept_encoding: str) -> set[str]:
+    accepted: set[str] = set()
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        quality = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if name and quality > 0:
+            accepted.add(name.strip().lower())
+    return accepted
+
+
+class PrecompressedStaticFiles(StaticFiles):
+    """
+    Static files with deploy-time compression.
+    When `<file>.br` / `<file>.gz` exist and the client accepts them, the precompressed
+    variant is streamed as-is (no per-request compression). Each representation carries a
+    strong content-hash ETag plus `Vary: Accept-Encoding`, and If-None-Match answers 304.
+    """
+
+    def __init__(self, *args, cache_control: str = "public, max-age=0, must-revalidate", **kwargs):
+        super().__init__(*args, **kwargs)
+        self.cache_control = cache_control
+
+    def file_response(
+        self,
+        full_path: str | os.PathLike,
+        stat_result: os.stat_result,
+        scope: Scope,
+        status_code: int = 200,
+    ) -> Response:
+        request_headers = Headers(scope=scope)
+        accepted = accepted_encodings(request_headers.get("accept-encoding", ""))
+        path, encoding = str(full_path), None
+        for name, suffix in PRECOMPRESSED_ENCODINGS:
+            if name not in accepted:
+                continue
+            try:
+                variant_stat = os.stat(path + suffix)
+            except OSError:
+                continue
+            path, stat_result, encoding = path + suffix, variant_stat, name
+            break
+
+        etag = _content_etag(path, stat_result.st_mtime_ns, stat_result.st_size)
+        headers = {
+            "ETag": f'"{etag}"',
+            "Cache-Control": self.cache_control,
+            "Vary": "Accept-Encoding",
+        }
+        if encoding:
+            headers["Content-Encoding"] = encoding
+        # media_type comes from the original name, not the .br/.gz suffix.
+        response = FileResponse(
+            path,
+            status_code=status_code,
+            headers=headers,
+            media_type=mimetypes.guess_type(str(full_path))[0] or "application/octet-stream",
+            stat_result=stat_result,
+        )
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+        return response
@@ -6,22 +6,28 @@ from pathlib import Path
 
 from fastapi import FastAPI, Request, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-from fastapi.staticfiles import StaticFiles
+from fastapi.responses import JSONResponse, Response
 
 from app.api import api_router
 from app.config import get_settings
 from app.core.database import check_database_health, engine
-from app.core.redis import check_redis_health, close_redis, get_redis_client
+from app.core.hosting import PublishedSiteMiddleware, close_published_sites, get_published_site_resolver, page_response
+from app.core.http import close_http_client
+from app.core.redis import check_redis_health, close_redis, get_broker_client, get_redis_client
+from app.core.static import IMMUTABLE_CACHE_CONTROL, PrecompressedStaticFiles
+from app.services.artifacts import ArtifactStore
+from app.services.deployer import ASSETS_DIR
 from app.services.events import generation_event_stream
+from app.services.queue_metrics import QueueMonitor
 from app.utils.logging import configure_logging, get_logger
 from app.utils.metrics import REQUEST_COUNT, REQUEST_LATENCY, metrics_response
 
 settings = get_settings()
 configure_logging()
 logger = get_logger("app.main")
-generated_dir = Path("generated_portfolios")
+generated_dir = Path(settings.storage_local_dir)
 generated_dir.mkdir(parents=True, exist_ok=True)
+(generated_dir / ASSETS_DIR).mkdir(parents=True, exist_ok=True)
 
 
 @asynccontextmanager
@@ -29,6 +35,8 @@ async def lifespan(_: FastAPI):
     os.makedirs(generated_dir, exist_ok=True)
     logger.info("startup_complete")
     yield
+    await close_published_sites()
+    await close_http_client()
     await close_redis()
     await engine.dispose()
     logger.info("shutdown_complete")
@@ -41,6 +49,8 @@ app = FastAPI(
     lifespan=lifespan,
 )
 
+# Host-based serving of published portfolios; requests for the app's own hosts pass straight through.
+app.add_middleware(PublishedSiteMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=settings.cors_origins_list,
@@ -99,6 +109,14 @@ async def ready() -> JSONResponse:
 async def metrics():
     if not settings.enable_metrics:
         return JSONResponse(status_code=404, content={"detail": "Metrics disabled"})
+    try:
+        await ArtifactStore(get_redis_client()).refresh_metrics()
+    except Exception:
+        logger.warning("artifact_metrics_unavailable", exc_info=True)
+    try:
+        await QueueMonitor(get_broker_client()).refresh_metrics()
+    except Exception:
+        logger.warning("queue_metrics_unavailable", exc_info=True)
     return metrics_response()
 
 
@@ -117,5 +135,25 @@ async def generation_ws(websocket: WebSocket, job_id: str):
         await websocket.close(code=1011)
 
 
+@app.get("/generated/{slug}/", include_in_schema=False)
+@app.get("/generated/{slug}/index.html", include_in_schema=False)
+async def generated_portfolio(slug: str, request: Request) -> Response:
+    """Deployed pages are content-addressed objects; resolve the slug to its current object."""
+    page = await get_published_site_resolver().page_for_slug(slug)
+    if page is None:
+        return JSONResponse(status_code=404, content={"detail": "Not Found"})
+    return page_response(page, request.scope)
+
+
 app.include_router(api_router, prefix="/api")
-app.mount("/generated", StaticFiles(directory=str(generated_dir)), name="generated")
+# Content-hashed shared stylesheets; mounted first so it wins over the generic /generated mount.
+app.mount(
+    f"/generated/{ASSETS_DIR}",
+    PrecompressedStaticFiles(directory=str(generated_dir / ASSETS_DIR), cache_control=IMMUTABLE_CACHE_CONTROL),
+    name="generated-assets",
+)
+app.mount(
+    "/generated",
+    PrecompressedStaticFiles(directory=str(generated_dir), cache_control=settings.generated_cache_control),
+    name="generated",
+)
@@ -29,6 +29,8 @@ class Portfolio(UUIDPrimaryKeyMixin, TimestampMixin, Base):
     last_generated_at: Mapped[datetime | None] = mapped_column(nullable=True)
     view_count: Mapped[int] = mapped_column(Integer, default=0)
     generated_html: Mapped[str | None] = mapped_column(Text, nullable=True)
+    # Digest of the render inputs behind `generated_html`; regeneration is skipped while it matches.
+    input_fingerprint: Mapped[str | None] = mapped_column(String(64), nullable=True)
 
     user = relationship("User", back_populates="portfolios")
     analytics_events = relationship("AnalyticsEvent", back_populates="portfolio", cascade="all, delete-orphan")
@@ -34,6 +34,14 @@ class Repository(UUIDPrimaryKeyMixin, TimestampMixin, Base):
     is_private: Mapped[bool] = mapped_column(Boolean, default=False)
     pushed_at: Mapped[datetime | None] = mapped_column(nullable=True)
     analyzed_at: Mapped[datetime | None] = mapped_column(nullable=True)
+    # pushed_at as of the last languages fetch; languages are refetched only when they differ.
+    languages_pushed_at: Mapped[datetime | None] = mapped_column(nullable=True)
+    # High-water mark of ingested commit history: newest commit seen and its commit date.
+    commit_cursor_sha: Mapped[str | None] = mapped_column(String(40), nullable=True)
+    commit_cursor_at: Mapped[datetime | None] = mapped_column(nullable=True)
+    # Where an incremental history walk that stopped short of the cursor picks up next run.
+    commit_resume: Mapped[dict | None] = mapped_column(JSONB, nullable=True)
+    commits_backfilled_at: Mapped[datetime | None] = mapped_column(nullable=True)
 
     user = relationship("User", back_populates="repositories")
     commits = relationship("Commit", back_populates="repository", cascade="all, delete-orphan")
@@ -1,9 +1,14 @@
+from typing import Literal
+
 from pydantic import BaseModel, Field
 
 
 class PublicGenerateRequest(BaseModel):
     github_url: str = Field(min_length=1, max_length=512)
     template_id: str = Field(default="minimal", min_length=1, max_length=100)
+    refresh: bool = False
+    # "async" returns 202 with a job id immediately and runs the pipeline on a worker.
+    mode: Literal["sync", "async"] = "sync"
 
 
 class PublicGenerateResponse(BaseModel):
@@ -12,3 +17,20 @@ class PublicGenerateResponse(BaseModel):
     portfolio_url: str
     projects_analyzed: int
     summary: str
+    cached: bool = False
+
+
+class PublicGenerateJobResponse(BaseModel):
+    job_id: str
+    status: str
+    status_url: str
+    events_url: str
+
+
+class PublicGenerateJobStatus(BaseModel):
+    job_id: str
+    status: str
+    progress: int
+    step: str
+    error: str | None = None
+    result: PublicGenerateResponse | None = None
@@ -0,0 +1,177 @@
+from __future__ import annotations
+
+import json
+import time
+
+from redis.asyncio import Redis
+
+from app.config import get_settings
+from app.services.storage import StorageBackend, get_storage_backend
+from app.utils.logging import get_logger
+from app.utils.metrics import ARTIFACT_BYTES, ARTIFACT_GC_DELETED, ARTIFACT_OBJECTS, ARTIFACT_SLUGS
+
+settings = get_settings()
+logger = get_logger("app.services.artifacts")
+
+OBJECTS_DIR = "objects"
+# Every object is stored with these siblings (see DeployerService.write_precompressed).
+OBJECT_SUFFIXES = ("", ".gz", ".br")
+# HSCAN page size for garbage collection; the indexes can hold millions of entries.
+GC_SCAN_BATCH = 1000
+
+# Fenced link: point the slug at the digest only if no deploy with a larger fencing token
+# has linked it, and record the token, in one step (see GenerationLease).
+_LINK_FENCED = """
+local fence = tonumber(redis.call('hget', KEYS[2], ARGV[1]) or '0')
+if fence > tonumber(ARGV[3]) then
+    return 0
+end
+redis.call('hset', KEYS[2], ARGV[1], ARGV[3])
+redis.call('hset', KEYS[1], ARGV[1], ARGV[2])
+return 1
+"""
+
+
+def object_key(digest: str, suffix: str = "") -> str:
+    """`objects/ab/cd/abcd....html`: two shard levels keep every directory small."""
+    return f"{OBJECTS_DIR}/{digest[:2]}/{digest[2:4]}/{digest}.html{suffix}"
+
+
+def slug_key(slug: str, suffix: str = "") -> str:
+    """`<slug>/index.html`: where pages lived before content addressing, and where backends
+    that browsers read directly still get a copy (see DeployerService.deploy_static_portfolio)."""
+    return f"{slug}/index.html{suffix}"
+
+
+class ArtifactStore:
+    """
+    Index of content-addressed page artifacts.
+    Pages are stored once per SHA-256 (identical renders share an object); slugs and
+    subdomains point at a digest through a Redis hash. Public slugs carry an expiry, and
+    `collect_garbage` drops expired slugs and deletes objects no slug references.
+    Objects record when they were last linked, and GC leaves anything linked within
+    ARTIFACT_GC_GRACE_SECONDS alone, so an object written just before its slug is pointed
+    at it is never collected.
+    """
+
+    def __init__(self, redis_client: Redis, storage: StorageBackend | None = None):
+        self.redis = redis_client
+        self.storage = storage or get_storage_backend()
+
+    @staticmethod
+    def _key(name: str) -> str:
+        return f"{settings.redis_cache_prefix}artifacts:{name}"
+
+    async def touch(self, digest: str, size: int, created: bool) -> None:
+        """Record (or refresh) an object before it is linked so GC treats it as live."""
+        payload = json.dumps({"size": size, "touched_at": time.time()})
+        await self.redis.hset(self._key("objects"), mapping={digest: payload})
+        if created:
+            await self.redis.hincrby(self._key("stats"), "bytes", size)
+
+    async def link(self, slug: str, digest: str, ttl_seconds: int | None = None, fence: int | None = None) -> bool:
+        """Point `slug` at `digest`; with a `fence` token, False (and no change) if a newer deploy linked it."""
+        expires_at = time.time() + ttl_seconds if ttl_seconds else None
+        payload = json.dumps({"digest": digest, "expires_at": expires_at})
+        if fence is None:
+            await self.redis.hset(self._key("slugs"), mapping={slug: payload})
+            return True
+        return bool(await self.redis.eval(_LINK_FENCED, 2, self._key("slugs"), self._key("fences"), slug, payload, fence))
+
+    async def fence(self, slug: str) -> int | None:
+        """Fencing token of the deploy that last linked `slug` (None if it was never fenced)."""
+        value = await self.redis.hget(self._key("fences"), slug)
+        return int(value) if value is not None else None
+
+    async def unlink(self, slug: str) -> None:
+        await self.redis.hdel(self._key("slugs"), slug)
+        await self._delete_slug_copy(slug)
+
+    async def _delete_slug_copy(self, slug: str) -> None:
+        if self.storage.serves_public_urls:
+            for suffix in OBJECT_SUFFIXES:
+                await self.storage.delete(slug_key(slug, suffix))
+
+    async def resolve(self, slug: str) -> str | None:
+        payload = await self.redis.hget(self._key("slugs"), slug)
+        if payload is None:
+            return None
+        entry = json.loads(payload)
+        return None if self._expired(entry, time.time()) else entry["digest"]
+
+    @staticmethod
+    def _expired(entry: dict, now: float) -> bool:
+        return entry["expires_at"] is not None and entry["expires_at"] <= now
+
+    async def collect_garbage(self, now: float | None = None) -> dict:
+        """
+        Two HSCAN passes in GC_SCAN_BATCH pages (never the whole index at once): expire slugs and
+        gather the digests still referenced, then delete objects nothing references.
+        """
+        now = time.time() if now is None else now
+        referenced: set[str] = set()
+        expired = 0
+        async for slug, payload in self.redis.hscan_iter(self._key("slugs"), count=GC_SCAN_BATCH):
+            entry = json.loads(payload)
+            if not self._expired(entry, now):
+                referenced.add(entry["digest"])
+                continue
+            # Re-check right before deleting: the slug may have been republished since the scan
+            # (its new object is then protected by the grace period).
+            current = await self.redis.hget(self._key("slugs"), slug)
+            if current is None:
+                continue
+            current_entry = json.loads(current)
+            if not self._expired(current_entry, now):
+                referenced.add(current_entry["digest"])
+                continue
+            await self.redis.hdel(self._key("slugs"), slug)
+            await self._delete_slug_copy(slug)
+            expired += 1
+
+        deleted = freed = 0
+        cutoff = now - settings.artifact_gc_grace_seconds
+        batch: list[str] = []
+        batch_bytes = 0
+        async for digest, payload in self.redis.hscan_iter(self._key("objects"), count=GC_SCAN_BATCH):
+            entry = json.loads(payload)
+            if digest in referenced or entry["touched_at"] > cutoff:
+                continue
+            current = await self.redis.hget(self._key("objects"), digest)
+            if current is None or json.loads(current)["touched_at"] > cutoff:
+                continue
+            for suffix in OBJECT_SUFFIXES:
+                await self.storage.delete(object_key(digest, suffix))
+            batch.append(digest)
+            batch_bytes += entry["size"]
+            if len(batch) >= GC_SCAN_BATCH:
+                await self._forget_objects(batch, batch_bytes)
+                deleted, freed = deleted + len(batch), freed + batch_bytes
+                batch, batch_bytes = [], 0
+        if batch:
+            await self._forget_objects(batch, batch_bytes)
+            deleted, freed = deleted + len(batch), freed + batch_bytes
+
+        ARTIFACT_GC_DELETED.labels(kind="slugs").inc(expired)
+        ARTIFACT_GC_DELETED.labels(kind="objects").inc(deleted)
+        result = {"expired_slugs": expired, "deleted_objects": deleted, "freed_bytes": freed}
+        logger.info("artifact_gc_complete", **result)
+        return result
+
+    async def _forget_objects(self, digests: list[str], size: int) -> None:
+        await self.redis.hdel(self._key("objects"), *digests)
+        await self.redis.hincrby(self._key("stats"), "bytes", -size)
+
+    async def stats(self) -> dict:
+        stats = await self.redis.hgetall(self._key("stats"))
+        return {
+            "objects": await self.redis.hlen(self._key("objects")),
+            "slugs": await self.redis.hlen(self._key("slugs")),
+            "bytes": int(stats.get("bytes", 0)),
+        }
+
+    async def refresh_metrics(self) -> None:
+        stats = await self.stats()
+        ARTIFACT_OBJECTS.set(stats["objects"])
+        ARTIFACT_SLUGS.set(stats["slugs"])
+        ARTIFACT_BYTES.set(stats["bytes"])
@@ -31,6 +31,32 @@ class CacheService:
         else:
             await self.redis.set(key, serialized)
 
+    @staticmethod
+    def _public_result_key(username: str, template_id: str, suffix: str) -> str:
+        return f"{settings.redis_cache_prefix}public:{username.lower()}:{template_id}:{suffix}"
+
+    async def get_public_result(self, username: str, template_id: str, fingerprint: str | None = None) -> dict | None:
+        """
+        Look up a public generation result.
+        Without a fingerprint this reads the short-lived `latest` pointer, which answers without
+        touching GitHub; with one it reads the content-keyed entry for that upstream state.
+        """
+        suffix = fingerprint if fingerprint is not None else "latest"
+        cached = await self.get_json(self._public_result_key(username, template_id, suffix))
+        return cached if isinstance(cached, dict) else None
+
+    async def set_public_result(self, username: str, template_id: str, fingerprint: str, result: dict) -> None:
+        await self.set_json(
+            self._public_result_key(username, template_id, fingerprint),
+            result,
+            settings.public_result_ttl_seconds,
+        )
+        await self.set_json(
+            self._public_result_key(username, template_id, "latest"),
+            result,
+            settings.public_result_fresh_seconds,
+        )
+
     async def get_repository_analysis(
         self,
         db: AsyncSession,
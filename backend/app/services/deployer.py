@@ -1,15 +1,135 @@
 from __future__ import annotations
 
-from pathlib import Path
+import asyncio
+import gzip
+import hashlib
+import re
+
+from redis.asyncio import Redis
+
+from app.config import get_settings
+from app.core.redis import get_redis_client
+from app.services.artifacts import ArtifactStore, object_key, slug_key
+from app.services.storage import LocalStorage, StorageBackend, get_storage_backend, run_io
+from app.utils.metrics import ARTIFACT_WRITES
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - brotli is a declared dependency; degrade to gzip only
+    brotli = None
+
+settings = get_settings()
+
+ASSETS_DIR = "_assets"
+HTML_CONTENT_TYPE = "text/html; charset=utf-8"
+CSS_CONTENT_TYPE = "text/css; charset=utf-8"
+
+
+def precompress(content: bytes) -> list[tuple[str, bytes, str]]:
+    """(suffix, body, content-encoding) for each precompressed variant, at maximum level."""
+    variants = [(".gz", gzip.compress(content, compresslevel=9, mtime=0), "gzip")]
+    if brotli is not None:
+        variants.append((".br", brotli.compress(content, quality=11), "br"))
+    return variants
 
 
 class DeployerService:
-    def __init__(self, output_dir: str = "generated_portfolios"):
-        self.output_dir = Path(output_dir)
-        self.output_dir.mkdir(parents=True, exist_ok=True)
-
-    def deploy_static_portfolio(self, subdomain: str, html: str) -> str:
-        target = self.output_dir / subdomain
-        target.mkdir(parents=True, exist_ok=True)
-        (target / "index.html").write_text(html, encoding="utf-8")
-        return f"/generated/{subdomain}/index.html"
+    """
+    Publishes rendered pages and stylesheets to the configured storage backend.
+    All I/O (and compression) runs on the storage I/O pool, so deploys never block the
+    event loop; every object is replaced atomically. Pages are content-addressed through
+    the ArtifactStore: a slug points at a digest, and identical pages share one object.
+    """
+
+    def __init__(
+        self,
+        output_dir: str | None = None,
+        storage: StorageBackend | None = None,
+        public_url: str | None = None,
+        redis_client: Redis | None = None,
+    ):
+        self.storage = storage or (LocalStorage(output_dir) if output_dir else get_storage_backend())
+        self.artifacts = ArtifactStore(redis_client or get_redis_client(), self.storage)
+        self.public_url = (public_url or settings.storage_public_url).rstrip("/")
+        self._stylesheet_link = re.compile(
+            rf'<link rel="stylesheet" href="{re.escape(self.public_url)}/{ASSETS_DIR}/([0-9a-f]+\.css)" />'
+        )
+
+    def url(self, key: str) -> str:
+        return f"{self.public_url}/{key}"
+
+    async def write_precompressed(self, key: str, content: bytes, content_type: str) -> None:
+        """
+        Write `key` plus `.gz` / `.br` siblings, compressed once so the static handler can
+        serve them without compressing per request. Variants are written before the original
+        so a reader never sees a new original with stale variants.
+        """
+        variants = await run_io(precompress, content)
+        await asyncio.gather(
+            *(
+                self.storage.write(key + suffix, body, content_type=content_type, encoding=encoding)
+                for suffix, body, encoding in variants
+            )
+        )
+        await self.storage.write(key, content, content_type=content_type)
+
+    async def deploy_static_portfolio(
+        self, slug: str, html: str, ttl_seconds: int | None = None, fence: int | None = None
+    ) -> str | None:
+        """
+        Store the page under its content hash and point `slug` at it; returns the slug URL.
+        `ttl_seconds` makes the slug expire (public portfolios); subdomains never do.
+        With a `fence` token (GenerationLease) the link is refused, and None returned, once a
+        deploy with a newer token has linked the slug.
+        """
+        content = html.encode("utf-8")
+        digest = hashlib.sha256(content).hexdigest()
+        key = object_key(digest)
+        created = not await self.storage.exists(key)
+        # Touch before writing or linking, so a concurrent GC pass sees the object as live.
+        await self.artifacts.touch(digest, len(content), created)
+        if created:
+            await self.write_precompressed(key, content, HTML_CONTENT_TYPE)
+        ARTIFACT_WRITES.labels(result="stored" if created else "deduplicated").inc()
+        if not await self.artifacts.link(slug, digest, ttl_seconds, fence=fence):
+            return None
+        if self.storage.serves_public_urls:
+            # Browsers fetch this backend directly and cannot follow the Redis slug index:
+            # the slug URL needs a real object (replaced atomically on every deploy).
+            await self.write_precompressed(slug_key(slug), content, HTML_CONTENT_TYPE)
+            if fence is not None and await self.artifacts.fence(slug) != fence:
+                # A newer deploy linked (and copied) in between; don't leave our copy over its page.
+                await self._restore_slug_copy(slug)
+        return self.url(slug_key(slug))
+
+    async def _restore_slug_copy(self, slug: str) -> None:
+        digest = await self.artifacts.resolve(slug)
+        content = await self.storage.read(object_key(digest)) if digest else None
+        if content is not None:
+            await self.write_precompressed(slug_key(slug), content, HTML_CONTENT_TYPE)
+
+    async def deploy_stylesheet(self, css: str) -> str:
+        """
+        Publish a stylesheet under its content hash and return its URL.
+        The file is immutable: the same CSS always maps to the same path, so it is written once
+        and shared by every portfolio using that template/theme.
+        """
+        content = css.encode("utf-8")
+        key = f"{ASSETS_DIR}/{hashlib.sha256(content).hexdigest()[:16]}.css"
+        if not await self.storage.exists(key):
+            await self.write_precompressed(key, content, CSS_CONTENT_TYPE)
+        return self.url(key)
+
+    async def inline_stylesheets(self, html: str) -> str:
+        """Swap shared stylesheet links for inline <style> blocks (for srcdoc previews)."""
+        names = set(self._stylesheet_link.findall(html))
+        contents = await asyncio.gather(*(self.storage.read(f"{ASSETS_DIR}/{name}") for name in names))
+        stylesheets = {name: content for name, content in zip(names, contents, strict=True) if content is not None}
+
+        def _inline(match: re.Match) -> str:
+            content = stylesheets.get(match.group(1))
+            if content is None:
+                return match.group(0)
+            return f"<style>\n{content.decode('utf-8')}\n</style>"
+
+        return self._stylesheet_link.sub(_inline, html)
@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+import hashlib
+import json
+from typing import Any
+
+from markupsafe import Markup
+from redis.asyncio import Redis
+
+from app.config import get_settings
+from app.services.renderer import TemplateRegistry, get_template_registry
+from app.utils.metrics import CARD_FRAGMENTS
+
+settings = get_settings()
+
+# The only card fields the fragment depends on; anything else in the card dict is ignored.
+CARD_FIELDS = ("name", "description", "stars", "forks", "url")
+
+
+def card_fingerprint(card: dict[str, Any]) -> str:
+    payload = json.dumps([card.get(field) for field in CARD_FIELDS], default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+class CardFragmentCache:
+    """
+    Redis cache of rendered repository cards.
+    Keys combine the template source version, the repository id and a hash of the card
+    fields, so an edit to one repository (or to the templates) dirties only the affected
+    cards; a regeneration renders those and splices cached HTML in for the rest.
+    """
+
+    def __init__(self, redis_client: Redis, registry: TemplateRegistry | None = None):
+        self.redis = redis_client
+        self.registry = registry or get_template_registry()
+
+    def key(self, card: dict[str, Any]) -> str:
+        return f"{settings.redis_cache_prefix}card:{self.registry.version}:{card.get('id')}:{card_fingerprint(card)}"
+
+    async def render_cards(self, cards: list[dict[str, Any]]) -> list[Markup]:
+        if not cards:
+            return []
+        keys = [self.key(card) for card in cards]
+        cached = await self.redis.mget(keys)
+        fragments: list[Markup] = []
+        dirty: dict[str, str] = {}
+        for key, card, html in zip(keys, cards, cached, strict=True):
+            if html is None:
+                html = dirty.get(key) or str(self.registry.render_card(card))
+                dirty[key] = html
+            fragments.append(Markup(html))
+        if dirty:
+            pipe = self.redis.pipeline()
+            for key, html in dirty.items():
+                pipe.setex(key, settings.card_fragment_ttl_seconds, html)
+            await pipe.execute()
+        CARD_FRAGMENTS.labels(result="hit").inc(len(cards) - len(dirty))
+        CARD_FRAGMENTS.labels(result="rendered").inc(len(dirty))
+        return fragments
+
+    async def render(
+        self,
+        template_id: str | None,
+        context: dict[str, Any],
+        stylesheet_url: str | None = None,
+    ) -> str:
+        """Render a page, re-rendering only the cards whose fragments are not cached."""
+        fragments = await self.render_cards(context["repositories"])
+        return self.registry.render(template_id, context, card_fragments=fragments, stylesheet_url=stylesheet_url)
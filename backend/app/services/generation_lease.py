@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+from redis.asyncio import Redis
+
+from app.config import get_settings
+
+settings = get_settings()
+
+# The lease value is "<fence>:<job id>"; these compare the job id and act in one step, so a
+# job whose lease expired and was taken over can never extend or delete its successor's.
+_RENEW = """
+local value = redis.call('get', KEYS[1])
+if value and string.match(value, ':(.+)$') == ARGV[1] then
+    return redis.call('expire', KEYS[1], ARGV[2])
+end
+return 0
+"""
+_RELEASE = """
+local value = redis.call('get', KEYS[1])
+if value and string.match(value, ':(.+)$') == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+
+class GenerationLease:
+    """
+    At most one generation job per portfolio, across API replicas and workers.
+    The lease is a Redis key naming the job that holds it; it expires after
+    GENERATION_LEASE_SECONDS unless the worker renews it, so a crashed worker releases it
+    by itself. Every acquisition also takes a fencing token from a global counter, so a
+    newer holder always has a larger token than any earlier one; the deploy checks it where
+    the page is linked (ArtifactStore.link), and a job that lost its lease can never publish
+    over a newer job's page. Requests that arrive while a job runs attach to it and leave a
+    single trailing re-run flag, however many of them there are.
+    """
+
+    def __init__(self, redis_client: Redis, portfolio_id: str):
+        self.redis = redis_client
+        self.portfolio_id = portfolio_id
+
+    def _key(self, name: str) -> str:
+        return f"{settings.redis_cache_prefix}generation:portfolio:{self.portfolio_id}:{name}"
+
+    async def _entry(self) -> tuple[int, str] | None:
+        value = await self.redis.get(self._key("lease"))
+        if value is None:
+            return None
+        fence, _, job_id = value.partition(":")
+        return int(fence), job_id
+
+    async def acquire(self, job_id: str) -> bool:
+        fence = await self.redis.incr(f"{settings.redis_cache_prefix}generation:fence")
+        value = f"{fence}:{job_id}"
+        return bool(await self.redis.set(self._key("lease"), value, ex=settings.generation_lease_seconds, nx=True))
+
+    async def holder(self) -> str | None:
+        entry = await self._entry()
+        return entry[1] if entry else None
+
+    async def holds(self, job_id: str) -> bool:
+        return await self.holder() == job_id
+
+    async def fence(self, job_id: str) -> int | None:
+        """The fencing token of `job_id`'s lease, or None if it does not hold the lease."""
+        entry = await self._entry()
+        return entry[0] if entry and entry[1] == job_id else None
+
+    async def renew(self, job_id: str) -> bool:
+        return bool(await self.redis.eval(_RENEW, 1, self._key("lease"), job_id, settings.generation_lease_seconds))
+
+    async def release(self, job_id: str) -> bool:
+        return bool(await self.redis.eval(_RELEASE, 1, self._key("lease"), job_id))
+
+    async def request_rerun(self) -> None:
+        await self.redis.set(self._key("rerun"), "1", ex=settings.generation_lease_seconds)
+
+    async def take_rerun(self) -> bool:
+        """Consume the trailing re-run flag; only one caller ever gets True for it."""
+        return bool(await self.redis.delete(self._key("rerun")))
@@ -1,24 +1,34 @@
 from __future__ import annotations
 
+import asyncio
+import math
+import uuid
+from collections.abc import Awaitable, Callable
 from datetime import datetime
 from typing import Any
-from urllib.parse import urlparse
+from urllib.parse import parse_qs, urlparse
 
 import httpx
-from sqlalchemy import select
+from sqlalchemy import func, literal_column, or_, select, update
+from sqlalchemy.dialects.postgresql import Insert
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 from tenacity import retry, retry_if_exception_type, stop_after_attempt, wait_exponential
 
 from app.config import get_settings
-from app.core.exceptions import ExternalServiceUnavailable
+from app.core.exceptions import ExternalServiceUnavailable, RateLimitExceeded
+from app.core.http import get_http_client
 from app.models.github_profile import GitHubProfile
 from app.models.repository import Repository
 from app.models.user import User
+from app.services.github_cache import GitHubResponseCache
+from app.services.rate_governor import GitHubRateGovernor, is_rate_limited, rate_identity, rate_resource
 from app.services.rate_limiter import RateLimiter
 
 settings = get_settings()
 
 GITHUB_API_BASE = "https://api.github.com"
+GITHUB_GRAPHQL_URL = f"{GITHUB_API_BASE}/graphql"
 GITHUB_OAUTH_BASE = "https://github.com/login/oauth"
 
 
@@ -26,9 +36,34 @@ class GitHubAPIError(ExternalServiceUnavailable):
     pass
 
 
+def parse_link_header(value: str | None) -> dict[str, str]:
+    """Parse an RFC 8288 `Link` header into {rel: url}."""
+    links: dict[str, str] = {}
+    for part in (value or "").split(","):
+        segments = part.strip().split(";")
+        if len(segments) < 2:
+            continue
+        url = segments[0].strip().strip("<>")
+        for param in segments[1:]:
+            key, _, rel = param.strip().partition("=")
+            if key == "rel":
+                links[rel.strip('"')] = url
+    return links
+
+
+def last_page_number(response: httpx.Response) -> int:
+    last_url = parse_link_header(response.headers.get("link")).get("last")
+    if not last_url:
+        return 1
+    pages = parse_qs(urlparse(last_url).query).get("page")
+    return int(pages[0]) if pages else 1
+
+
 class GitHubService:
     def __init__(self, rate_limiter: RateLimiter):
         self.rate_limiter = rate_limiter
+        self.response_cache = GitHubResponseCache(rate_limiter.redis)
+        self.governor = GitHubRateGovernor(rate_limiter.redis)
 
     def authorization_url(self, state: str) -> str:
         return (
@@ -40,30 +75,87 @@ class GitHubService:
         )
 
     async def exchange_code_for_token(self, code: str) -> str:
-        async with httpx.AsyncClient(timeout=15.0) as client:
-            response = await client.post(
-                f"{GITHUB_OAUTH_BASE}/access_token",
-                headers={"Accept": "application/json"},
-                data={
-                    "client_id": settings.github_client_id,
-                    "client_secret": settings.github_client_secret,
-                    "code": code,
-                    "redirect_uri": settings.github_redirect_uri,
-                },
-            )
-            response.raise_for_status()
-            payload = response.json()
-            token = payload.get("access_token")
-            if not token:
-                raise GitHubAPIError("GitHub OAuth token exchange failed")
-            return token
-
-    def _headers(self, token: str) -> dict[str, str]:
-        return {
-            "Authorization": f"Bearer {token}",
+        response = await get_http_client().post(
+            f"{GITHUB_OAUTH_BASE}/access_token",
+            headers={"Accept": "application/json"},
+            data={
+                "client_id": settings.github_client_id,
+                "client_secret": settings.github_client_secret,
+                "code": code,
+                "redirect_uri": settings.github_redirect_uri,
+            },
+            timeout=15.0,
+        )
+        response.raise_for_status()
+        payload = response.json()
+        token = payload.get("access_token")
+        if not token:
+            raise GitHubAPIError("GitHub OAuth token exchange failed")
+        return token
+
+    def _headers(self, token: str | None) -> dict[str, str]:
+        headers = {
             "Accept": "application/vnd.github+json",
             "X-GitHub-Api-Version": "2022-11-28",
         }
+        if token:
+            headers["Authorization"] = f"Bearer {token}"
+        return headers
+
+    async def _send(
+        self,
+        method: str,
+        url: str,
+        token: str | None,
+        params: dict | None = None,
+        json: dict | None = None,
+        max_wait: float | None = None,
+        timeout: float | None = None,
+        cache: bool = True,
+    ) -> httpx.Response:
+        """
+        `cache=False` skips the conditional-request cache for responses that are never
+        revalidated: immutable commit details and `since=` listings, whose key moves with the cursor.
+        """
+        headers = self._headers(token)
+        cacheable = cache and method == "GET" and settings.github_cache_enabled
+        cache_key = None
+        cached = None
+        if cacheable:
+            cache_key = self.response_cache.cache_key(url, params, token)
+            cached = await self.response_cache.get(cache_key)
+            if cached is not None:
+                if cached.is_fresh():
+                    self.response_cache.record("hit")
+                    return cached.to_response(httpx.Request(method, url, params=params))
+                headers.update(cached.validators())
+
+        identity = rate_identity(token)
+        resource = rate_resource(url)
+        for _ in range(settings.github_rate_max_retries + 1):
+            # Waits (rather than fails) while this token's or IP's budget for the resource is exhausted.
+            await self.governor.acquire(identity, resource, max_wait=max_wait)
+            response = await get_http_client().request(
+                method,
+                url,
+                headers=headers,
+                params=params,
+                json=json,
+                timeout=timeout if timeout is not None else httpx.USE_CLIENT_DEFAULT,
+            )
+            if not await self.governor.observe(identity, response, resource):
+                break
+
+        if cacheable:
+            # 304s are free against GitHub's rate limit; replay the stored body.
+            if response.status_code == 304 and cached is not None:
+                self.response_cache.record("revalidated")
+                await self.response_cache.touch(cache_key, cached)
+                return cached.to_response(response.request)
+            if response.status_code == 200:
+                self.response_cache.record("miss")
+                await self.response_cache.store(cache_key, response)
+        return response
 
     @retry(
         wait=wait_exponential(multiplier=1, min=1, max=16),
@@ -71,22 +163,82 @@ class GitHubService:
         retry=retry_if_exception_type((httpx.HTTPError, GitHubAPIError)),
         reraise=True,
     )
-    async def _request(self, method: str, url: str, token: str, params: dict | None = None) -> Any:
-        await self.rate_limiter.check_rate_limit("github:minute", settings.rate_limit_per_minute, 60)
-        await self.rate_limiter.consume_token(
-            "github:hour",
-            capacity=settings.github_api_rate_limit,
-            refill_rate_per_second=settings.github_api_rate_limit / 3600.0,
-        )
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.request(method, url, headers=self._headers(token), params=params)
-        if response.status_code == 429:
-            raise GitHubAPIError("GitHub API rate limit hit")
+    async def _request_response(
+        self,
+        method: str,
+        url: str,
+        token: str,
+        params: dict | None = None,
+        json: dict | None = None,
+        cache: bool = True,
+    ) -> httpx.Response:
+        response = await self._send(method, url, token, params=params, json=json, cache=cache)
+        if is_rate_limited(response):
+            # The governor already waited and retried; surface it without burning tenacity retries.
+            raise RateLimitExceeded("GitHub API rate limit hit")
         if response.status_code >= 500:
             raise GitHubAPIError(f"GitHub API unavailable ({response.status_code})")
         response.raise_for_status()
+        return response
+
+    async def _request(
+        self,
+        method: str,
+        url: str,
+        token: str,
+        params: dict | None = None,
+        json: dict | None = None,
+        cache: bool = True,
+    ) -> Any:
+        response = await self._request_response(method, url, token, params=params, json=json, cache=cache)
         return response.json()
 
+    async def _fetch_pages(
+        self,
+        fetch_page: Callable[[int], Awaitable[httpx.Response]],
+        per_page: int,
+        max_items: int | None = None,
+    ) -> list[list[dict[str, Any]]]:
+        """
+        Fetch page 1, read the `last` page from its Link header, then fan out over the
+        remaining pages behind a semaphore. Pages are returned in page order; fetching stops
+        at the first short page or once `max_items` is covered.
+        """
+        first = await fetch_page(1)
+        first_data = first.json()
+        if not isinstance(first_data, list) or not first_data:
+            return []
+        last_page = last_page_number(first)
+        if max_items is not None:
+            last_page = min(last_page, math.ceil(max_items / per_page))
+        if last_page <= 1 or len(first_data) < per_page:
+            return [first_data]
+
+        semaphore = asyncio.Semaphore(settings.github_page_concurrency)
+        pages: dict[int, list[dict[str, Any]]] = {1: first_data}
+
+        async def _fetch(page: int) -> tuple[int, list[dict[str, Any]]]:
+            async with semaphore:
+                data = (await fetch_page(page)).json()
+            return page, data if isinstance(data, list) else []
+
+        tasks = [asyncio.create_task(_fetch(page)) for page in range(2, last_page + 1)]
+        end_page = last_page
+        try:
+            for next_result in asyncio.as_completed(tasks):
+                page, data = await next_result
+                pages[page] = data
+                if len(data) < per_page:
+                    end_page = min(end_page, page)
+                # Everything up to the end page has arrived; later pages are past the data.
+                if all(number in pages for number in range(1, end_page + 1)):
+                    break
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+        return [pages[number] for number in range(1, end_page + 1) if pages[number]]
+
     async def get_authenticated_user(self, token: str) -> dict:
         return await self._request("GET", f"{GITHUB_API_BASE}/user", token)
 
@@ -98,6 +250,9 @@ class GitHubService:
 
     async def sync_profile(self, db: AsyncSession, user: User, token: str) -> GitHubProfile:
         payload = await self.get_authenticated_user(token)
+        return await self._store_profile(db, user, payload)
+
+    async def _store_profile(self, db: AsyncSession, user: User, payload: dict) -> GitHubProfile:
         profile = await db.scalar(select(GitHubProfile).where(GitHubProfile.user_id == user.id))
         if profile is None:
             profile = GitHubProfile(user_id=user.id)
@@ -117,52 +272,37 @@ class GitHubService:
         await db.flush()
         return profile
 
-    async def sync_repositories(self, db: AsyncSession, user: User, token: str) -> int:
-        repos_synced = 0
-        page = 1
+    async def sync_repositories(self, db: AsyncSession, user: User, token: str) -> dict[str, int]:
         per_page = 100
-        while True:
-            payload = await self._request(
+
+        async def _fetch_page(page: int) -> httpx.Response:
+            return await self._request_response(
                 "GET",
                 f"{GITHUB_API_BASE}/user/repos",
                 token,
                 params={"page": page, "per_page": per_page, "sort": "updated"},
             )
-            if not isinstance(payload, list) or len(payload) == 0:
-                break
-            for repo_data in payload:
-                repo = await db.scalar(
-                    select(Repository).where(Repository.github_id == repo_data["id"])
-                )
-                if repo is None:
-                    repo = Repository(
-                        user_id=user.id,
-                        github_id=repo_data["id"],
-                        name=repo_data["name"],
-                        full_name=repo_data["full_name"],
-                        url=repo_data["html_url"],
-                    )
-                    db.add(repo)
-
-                repo.name = repo_data["name"]
-                repo.full_name = repo_data["full_name"]
-                repo.description = repo_data.get("description")
-                repo.url = repo_data["html_url"]
-                repo.homepage = repo_data.get("homepage")
-                repo.language = repo_data.get("language")
-                repo.topics = repo_data.get("topics", [])
-                repo.stars = repo_data.get("stargazers_count", 0)
-                repo.forks = repo_data.get("forks_count", 0)
-                repo.is_fork = repo_data.get("fork", False)
-                repo.is_private = repo_data.get("private", False)
-                pushed = repo_data.get("pushed_at")
-                repo.pushed_at = datetime.fromisoformat(pushed.replace("Z", "+00:00")) if pushed else None
-                repos_synced += 1
-
-            page += 1
-            if len(payload) < per_page:
-                break
-        return repos_synced
+
+        stats = {"inserted": 0, "updated": 0, "unchanged": 0}
+        for payload in await self._fetch_pages(_fetch_page, per_page):
+            for key, value in (await self._store_repositories(db, user, payload)).items():
+                stats[key] += value
+        return stats
+
+    async def _store_repositories(
+        self,
+        db: AsyncSession,
+        user: User,
+        payload: list[dict[str, Any]],
+    ) -> dict[str, int]:
+        """Upsert a page of REST-shaped repository payloads in a single statement."""
+        statement = repository_upsert_statement(user.id, payload)
+        if statement is None:
+            return {"inserted": 0, "updated": 0, "unchanged": 0}
+        touched = (await db.execute(statement)).all()
+        inserted = sum(1 for row in touched if row.inserted)
+        total = len({repo_data["id"] for repo_data in payload})
+        return {"inserted": inserted, "updated": len(touched) - inserted, "unchanged": total - len(touched)}
 
     async def fetch_repo_commits(
         self,
@@ -171,17 +311,48 @@ class GitHubService:
         repo: str,
         per_page: int = 100,
         page: int = 1,
+        since: datetime | None = None,
     ) -> list[dict[str, Any]]:
+        params: dict[str, Any] = {"per_page": per_page, "page": page}
+        if since is not None:
+            params["since"] = since.isoformat()
         data = await self._request(
             "GET",
             f"{GITHUB_API_BASE}/repos/{owner}/{repo}/commits",
             token,
-            params={"per_page": per_page, "page": page},
+            params=params,
+            cache=since is None,
         )
         if isinstance(data, list):
             return data
         return []
 
+    async def list_repo_commits(
+        self,
+        token: str,
+        owner: str,
+        repo: str,
+        since: datetime | None = None,
+        max_items: int | None = None,
+    ) -> list[dict[str, Any]]:
+        """List default-branch commits newest first, optionally only those committed at/after `since`."""
+        per_page = 100
+        params: dict[str, Any] = {"per_page": per_page}
+        if since is not None:
+            params["since"] = since.isoformat()
+
+        async def _fetch_page(page: int) -> httpx.Response:
+            return await self._request_response(
+                "GET",
+                f"{GITHUB_API_BASE}/repos/{owner}/{repo}/commits",
+                token,
+                params={**params, "page": page},
+                cache=since is None,
+            )
+
+        commits = [item for page in await self._fetch_pages(_fetch_page, per_page, max_items) for item in page]
+        return commits[:max_items] if max_items is not None else commits
+
     async def fetch_commit_detail(
         self,
         token: str,
@@ -193,46 +364,160 @@ class GitHubService:
             "GET",
             f"{GITHUB_API_BASE}/repos/{owner}/{repo}/commits/{sha}",
             token,
+            # Immutable and fetched once (known SHAs are skipped): caching would only fill Redis.
+            cache=False,
         )
         if isinstance(data, dict):
             return data
         return {}
 
+    async def fetch_repo_languages(self, token: str, full_name: str) -> dict[str, int]:
+        data = await self._request("GET", f"{GITHUB_API_BASE}/repos/{full_name}/languages", token)
+        if isinstance(data, dict):
+            return {name: int(size) for name, size in data.items()}
+        return {}
+
+    async def fetch_languages(self, token: str, repositories: list[Repository]) -> list[dict[str, Any]]:
+        """
+        Fetch language byte counts for several repositories concurrently.
+        Returns bulk-update rows (id, languages, languages_pushed_at); failed repositories are
+        left out so they stay stale and are retried on the next sync.
+        """
+        semaphore = asyncio.Semaphore(settings.github_languages_concurrency)
+
+        async def _fetch(repo: Repository) -> dict[str, Any] | None:
+            async with semaphore:
+                try:
+                    languages = await self.fetch_repo_languages(token, repo.full_name)
+                except (httpx.HTTPError, GitHubAPIError, RateLimitExceeded):
+                    return None
+            return {"id": repo.id, "languages": languages, "languages_pushed_at": repo.pushed_at}
+
+        results = await asyncio.gather(*(_fetch(repo) for repo in repositories))
+        return [row for row in results if row is not None]
+
+    async def sync_repository_languages(self, db: AsyncSession, user: User, token: str) -> dict[str, int]:
+        """Refresh Repository.languages for repositories pushed to since their languages were last fetched."""
+        stale = (
+            await db.scalars(
+                select(Repository).where(
+                    Repository.user_id == user.id,
+                    Repository.pushed_at.is_distinct_from(Repository.languages_pushed_at),
+                )
+            )
+        ).all()
+        rows = await self.fetch_languages(token, list(stale)) if stale else []
+        if rows:
+            await db.execute(update(Repository), rows)
+        return {"stale": len(stale), "updated": len(rows), "failed": len(stale) - len(rows)}
+
     async def get_public_user(self, username: str) -> dict[str, Any]:
-        async with httpx.AsyncClient(timeout=20.0) as client:
-            response = await client.get(
-                f"{GITHUB_API_BASE}/users/{username}",
-                headers={"Accept": "application/vnd.github+json"},
+        response = await self._send(
+            "GET",
+            f"{GITHUB_API_BASE}/users/{username}",
+            None,
+            max_wait=settings.github_public_max_wait_seconds,
+            timeout=20.0,
+        )
+        if response.status_code == 404:
+            raise GitHubAPIError("GitHub user not found")
+        response.raise_for_status()
+        return response.json()
+
+    async def get_public_repositories(self, username: str, max_repos: int = 120) -> list[dict[str, Any]]:
+        per_page = 100
+
+        async def _fetch_page(page: int) -> httpx.Response:
+            response = await self._send(
+                "GET",
+                f"{GITHUB_API_BASE}/users/{username}/repos",
+                None,
+                params={"sort": "updated", "per_page": per_page, "page": page},
+                max_wait=settings.github_public_max_wait_seconds,
+                timeout=20.0,
             )
             if response.status_code == 404:
-                raise GitHubAPIError("GitHub user not found")
+                raise GitHubAPIError("GitHub user repositories not found")
             response.raise_for_status()
-            return response.json()
+            return response
 
-    async def get_public_repositories(self, username: str, max_repos: int = 120) -> list[dict[str, Any]]:
-        repositories: list[dict[str, Any]] = []
-        page = 1
-        per_page = 100
-        async with httpx.AsyncClient(timeout=20.0) as client:
-            while len(repositories) < max_repos:
-                response = await client.get(
-                    f"{GITHUB_API_BASE}/users/{username}/repos",
-                    params={"sort": "updated", "per_page": per_page, "page": page},
-                    headers={"Accept": "application/vnd.github+json"},
-                )
-                if response.status_code == 404:
-                    raise GitHubAPIError("GitHub user repositories not found")
-                response.raise_for_status()
-                page_data = response.json()
-                if not isinstance(page_data, list) or not page_data:
-                    break
-                repositories.extend(page_data)
-                if len(page_data) < per_page:
-                    break
-                page += 1
+        pages = await self._fetch_pages(_fetch_page, per_page, max_items=max_repos)
+        repositories = [repo for page in pages for repo in page]
         return repositories[:max_repos]
 
 
+REPOSITORY_SYNC_COLUMNS = (
+    "name",
+    "full_name",
+    "description",
+    "url",
+    "homepage",
+    "language",
+    "topics",
+    "stars",
+    "forks",
+    "is_fork",
+    "is_private",
+    "pushed_at",
+)
+
+
+def _repository_row(user_id: uuid.UUID, repo_data: dict[str, Any]) -> dict[str, Any]:
+    pushed = repo_data.get("pushed_at")
+    pushed_at = datetime.fromisoformat(pushed.replace("Z", "+00:00")) if pushed else None
+    return {
+        "id": uuid.uuid4(),
+        "user_id": user_id,
+        "github_id": repo_data["id"],
+        "name": repo_data["name"],
+        "full_name": repo_data["full_name"],
+        "description": repo_data.get("description"),
+        "url": repo_data["html_url"],
+        "homepage": repo_data.get("homepage"),
+        "language": repo_data.get("language"),
+        "languages": repo_data.get("languages", {}),
+        "topics": repo_data.get("topics", []),
+        "stars": repo_data.get("stargazers_count", 0),
+        "forks": repo_data.get("forks_count", 0),
+        "is_fork": repo_data.get("fork", False),
+        "is_private": repo_data.get("private", False),
+        "pushed_at": pushed_at,
+        # Language sizes in the payload (GraphQL backend) are current as of this push.
+        "languages_pushed_at": pushed_at if "languages" in repo_data else None,
+    }
+
+
+def repository_upsert_statement(user_id: uuid.UUID, payload: list[dict[str, Any]]) -> Insert | None:
+    """
+    Build one INSERT ... ON CONFLICT (github_id) DO UPDATE for a page of repositories.
+    Rows whose synced columns are unchanged are left untouched (the WHERE clause skips them),
+    so RETURNING yields only inserted/updated rows; `inserted` is true for fresh inserts.
+    Language sizes are only overwritten when the payload carries them (GraphQL backend).
+    """
+    rows = list({repo_data["id"]: _repository_row(user_id, repo_data) for repo_data in payload}.values())
+    if not rows:
+        return None
+    columns = list(REPOSITORY_SYNC_COLUMNS)
+    if all("languages" in repo_data for repo_data in payload):
+        columns.extend(("languages", "languages_pushed_at"))
+
+    statement = pg_insert(Repository).values(rows)
+    excluded = statement.excluded
+    return statement.on_conflict_do_update(
+        constraint="uq_repositories_github_id",
+        set_={**{column: excluded[column] for column in columns}, "updated_at": func.now()},
+        where=or_(*(getattr(Repository, column).is_distinct_from(excluded[column]) for column in columns)),
+    ).returning(Repository.id, literal_column("xmax = 0").label("inserted"))
+
+
+def get_github_service(rate_limiter: RateLimiter) -> GitHubService:
+    if settings.github_backend == "graphql":
+        from app.services.github_graphql import GitHubGraphQLService
+
+        return GitHubGraphQLService(rate_limiter)
+    return GitHubService(rate_limiter)
+
+
 def parse_github_username(github_input: str) -> str:
     raw = github_input.strip()
     if not raw:
@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+import base64
+import hashlib
+import json
+import re
+import time
+import zlib
+from dataclasses import dataclass
+
+import httpx
+from redis.asyncio import Redis
+
+from app.config import get_settings
+from app.utils.metrics import GITHUB_CACHE_REQUESTS
+
+settings = get_settings()
+
+_MAX_AGE_RE = re.compile(r"max-age=(\d+)")
+# Response headers replayed with a cached body; `link` drives pagination.
+_REPLAYED_HEADERS = ("content-type", "link")
+
+
+def token_fingerprint(token: str | None) -> str:
+    if not token:
+        return "anon"
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()[:16]
+
+
+@dataclass
+class CachedResponse:
+    etag: str | None
+    last_modified: str | None
+    headers: dict[str, str]
+    body: bytes
+    stored_at: float
+    max_age: int
+
+    def is_fresh(self) -> bool:
+        return time.time() - self.stored_at < self.max_age
+
+    def validators(self) -> dict[str, str]:
+        headers: dict[str, str] = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+    def to_response(self, request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, headers=self.headers, content=self.body, request=request)
+
+
+class GitHubResponseCache:
+    """
+    Redis-backed conditional request cache.
+    Entries keep the validators (ETag / Last-Modified) and a zlib-compressed body
+    so a 304 from GitHub can be answered from Redis without re-downloading.
+    """
+
+    def __init__(self, redis_client: Redis):
+        self.redis = redis_client
+
+    def cache_key(self, url: str, params: dict | None, token: str | None) -> str:
+        query = "&".join(f"{key}={params[key]}" for key in sorted(params or {}))
+        digest = hashlib.sha256(f"{url}?{query}|{token_fingerprint(token)}".encode()).hexdigest()
+        return f"{settings.redis_cache_prefix}github:{digest}"
+
+    async def get(self, key: str) -> CachedResponse | None:
+        payload = await self.redis.get(key)
+        if payload is None:
+            return None
+        try:
+            data = json.loads(payload)
+            body = zlib.decompress(base64.b64decode(data["body"]))
+        except (ValueError, KeyError, zlib.error):
+            return None
+        return CachedResponse(
+            etag=data.get("etag"),
+            last_modified=data.get("last_modified"),
+            headers=data.get("headers") or {},
+            body=body,
+            stored_at=float(data.get("stored_at", 0)),
+            max_age=int(data.get("max_age", 0)),
+        )
+
+    async def store(self, key: str, response: httpx.Response) -> None:
+        etag = response.headers.get("etag")
+        last_modified = response.headers.get("last-modified")
+        if not etag and not last_modified:
+            return
+        max_age_match = _MAX_AGE_RE.search(response.headers.get("cache-control", ""))
+        entry = CachedResponse(
+            etag=etag,
+            last_modified=last_modified,
+            headers={name: response.headers[name] for name in _REPLAYED_HEADERS if name in response.headers},
+            body=response.content,
+            stored_at=time.time(),
+            max_age=min(int(max_age_match.group(1)) if max_age_match else 0, settings.github_cache_max_age_seconds),
+        )
+        await self._write(key, entry)
+
+    async def touch(self, key: str, entry: CachedResponse) -> None:
+        entry.stored_at = time.time()
+        await self._write(key, entry)
+
+    async def _write(self, key: str, entry: CachedResponse) -> None:
+        payload = {
+            "etag": entry.etag,
+            "last_modified": entry.last_modified,
+            "headers": entry.headers,
+            "body": base64.b64encode(zlib.compress(entry.body)).decode("ascii"),
+            "stored_at": entry.stored_at,
+            "max_age": entry.max_age,
+        }
+        await self.redis.setex(key, settings.github_cache_ttl_seconds, json.dumps(payload))
+
+    @staticmethod
+    def record(result: str) -> None:
+        GITHUB_CACHE_REQUESTS.labels(result=result).inc()
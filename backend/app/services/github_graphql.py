@@ -0,0 +1,190 @@
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Any
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import get_settings
+from app.models.github_profile import GitHubProfile
+from app.models.user import User
+from app.services.github import GITHUB_GRAPHQL_URL, GitHubAPIError, GitHubService
+
+settings = get_settings()
+
+PROFILE_QUERY = """
+query {
+  viewer {
+    login
+    name
+    bio
+    location
+    company
+    websiteUrl
+    twitterUsername
+    followers { totalCount }
+    following { totalCount }
+    repositories(privacy: PUBLIC, ownerAffiliations: OWNER) { totalCount }
+  }
+}
+"""
+
+REPOSITORIES_QUERY = """
+query($first: Int!, $after: String) {
+  viewer {
+    repositories(
+      first: $first
+      after: $after
+      ownerAffiliations: [OWNER, COLLABORATOR, ORGANIZATION_MEMBER]
+      orderBy: {field: UPDATED_AT, direction: DESC}
+    ) {
+      pageInfo { hasNextPage endCursor }
+      nodes {
+        databaseId
+        name
+        nameWithOwner
+        description
+        url
+        homepageUrl
+        primaryLanguage { name }
+        stargazerCount
+        forkCount
+        isFork
+        isPrivate
+        pushedAt
+        repositoryTopics(first: 20) { nodes { topic { name } } }
+        languages(first: 20, orderBy: {field: SIZE, direction: DESC}) { edges { size node { name } } }
+      }
+    }
+  }
+}
+"""
+
+COMMIT_HISTORY_QUERY = """
+query($owner: String!, $name: String!, $first: Int!, $after: String, $since: GitTimestamp) {
+  repository(owner: $owner, name: $name) {
+    defaultBranchRef {
+      target {
+        ... on Commit {
+          history(first: $first, after: $after, since: $since) {
+            pageInfo { hasNextPage endCursor }
+            nodes {
+              oid
+              message
+              committedDate
+              additions
+              deletions
+              changedFilesIfAvailable
+              author { name email date }
+            }
+          }
+        }
+      }
+    }
+  }
+}
+"""
+
+
+def _repository_from_node(node: dict[str, Any]) -> dict[str, Any]:
+    """Map a GraphQL repository node onto the REST payload shape `_store_repositories` expects."""
+    return {
+        "id": node["databaseId"],
+        "name": node["name"],
+        "full_name": node["nameWithOwner"],
+        "description": node.get("description"),
+        "html_url": node["url"],
+        "homepage": node.get("homepageUrl"),
+        "language": (node.get("primaryLanguage") or {}).get("name"),
+        "topics": [item["topic"]["name"] for item in (node.get("repositoryTopics") or {}).get("nodes", [])],
+        "stargazers_count": node.get("stargazerCount") or 0,
+        "forks_count": node.get("forkCount") or 0,
+        "fork": bool(node.get("isFork")),
+        "private": bool(node.get("isPrivate")),
+        "pushed_at": node.get("pushedAt"),
+        "languages": {edge["node"]["name"]: edge["size"] for edge in (node.get("languages") or {}).get("edges", [])},
+    }
+
+
+def _commit_from_node(node: dict[str, Any]) -> dict[str, Any]:
+    author = node.get("author") or {}
+    committed_at_raw = author.get("date") or node["committedDate"]
+    return {
+        "sha": node["oid"],
+        "message": node.get("message") or "",
+        "author_name": (author.get("name") or "")[:255] or None,
+        "author_email": (author.get("email") or "")[:255] or None,
+        "committed_at": datetime.fromisoformat(committed_at_raw.replace("Z", "+00:00")),
+        "additions": int(node.get("additions") or 0),
+        "deletions": int(node.get("deletions") or 0),
+        "files_changed": int(node.get("changedFilesIfAvailable") or 0),
+    }
+
+
+class GitHubGraphQLService(GitHubService):
+    """GitHub backend that bulk-fetches profile, repositories and commit stats through the GraphQL API."""
+
+    async def _graphql(self, token: str, query: str, variables: dict | None = None) -> dict[str, Any]:
+        payload = await self._request("POST", GITHUB_GRAPHQL_URL, token, json={"query": query, "variables": variables or {}})
+        if payload.get("errors"):
+            raise GitHubAPIError(f"GitHub GraphQL error: {payload['errors'][0].get('message')}")
+        return payload.get("data") or {}
+
+    async def sync_profile(self, db: AsyncSession, user: User, token: str) -> GitHubProfile:
+        viewer = (await self._graphql(token, PROFILE_QUERY))["viewer"]
+        payload = {
+            "name": viewer.get("name"),
+            "bio": viewer.get("bio"),
+            "location": viewer.get("location"),
+            "company": viewer.get("company"),
+            "blog": viewer.get("websiteUrl"),
+            "twitter_username": viewer.get("twitterUsername"),
+            "public_repos": viewer["repositories"]["totalCount"],
+            "followers": viewer["followers"]["totalCount"],
+            "following": viewer["following"]["totalCount"],
+        }
+        return await self._store_profile(db, user, payload)
+
+    async def sync_repositories(self, db: AsyncSession, user: User, token: str) -> dict[str, int]:
+        stats = {"inserted": 0, "updated": 0, "unchanged": 0}
+        cursor = None
+        while True:
+            data = await self._graphql(token, REPOSITORIES_QUERY, {"first": 100, "after": cursor})
+            connection = data["viewer"]["repositories"]
+            nodes = [node for node in connection["nodes"] if node and node.get("databaseId")]
+            if nodes:
+                page_stats = await self._store_repositories(db, user, [_repository_from_node(node) for node in nodes])
+                for key, value in page_stats.items():
+                    stats[key] += value
+            if not connection["pageInfo"]["hasNextPage"]:
+                break
+            cursor = connection["pageInfo"]["endCursor"]
+        return stats
+
+    async def fetch_commit_history(
+        self,
+        token: str,
+        owner: str,
+        repo: str,
+        since: datetime | None = None,
+        after: str | None = None,
+        per_page: int = 100,
+    ) -> tuple[list[dict[str, Any]], str | None]:
+        """
+        Fetch one page of default-branch history with per-commit stats.
+        Returns normalized commit rows and the cursor for the next page (None when exhausted).
+        """
+        variables = {
+            "owner": owner,
+            "name": repo,
+            "first": per_page,
+            "after": after,
+            "since": since.isoformat() if since else None,
+        }
+        data = await self._graphql(token, COMMIT_HISTORY_QUERY, variables)
+        branch = (data.get("repository") or {}).get("defaultBranchRef")
+        if not branch:
+            return [], None
+        history = branch["target"]["history"]
+        next_cursor = history["pageInfo"]["endCursor"] if history["pageInfo"]["hasNextPage"] else None
+        return [_commit_from_node(node) for node in history["nodes"]], next_cursor
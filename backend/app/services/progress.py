@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+import json
+import uuid
+from collections.abc import Awaitable, Callable
+
+from redis.asyncio import Redis
+from sqlalchemy import update
+
+from app.config import get_settings
+from app.core.database import AsyncSessionLocal
+from app.models.generation_job import GenerationJob
+from app.services.events import publish_generation_event
+from app.utils.helpers import utcnow
+from app.utils.metrics import GENERATION_PROGRESS_EVENTS
+
+settings = get_settings()
+
+TERMINAL_STATUSES = ("completed", "failed")
+# Bookkeeping keys outlive any realistic job; they only gate and coalesce DB writes.
+STATE_TTL_SECONDS = 24 * 3600
+
+JobWriter = Callable[[uuid.UUID, dict], Awaitable[None]]
+
+
+async def write_job_progress(job_id: uuid.UUID, values: dict) -> None:
+    """One `UPDATE generation_jobs ... WHERE id = :id`; no SELECT, no refresh."""
+    async with AsyncSessionLocal() as db:
+        await db.execute(update(GenerationJob).where(GenerationJob.id == job_id).values(**values))
+        await db.commit()
+
+
+class ProgressReporter:
+    """
+    Progress for one generation job.
+    Every event is published to Redis (the WebSocket/SSE streams see all of them); Postgres
+    is written only when the status changes, when the job reaches a terminal status, or at
+    most once per GENERATION_PROGRESS_WRITE_SECONDS otherwise. The throttle and the latest
+    state live in Redis, so writes are coalesced across all tasks working on the job, and
+    `flush()` can persist the latest state from any of them.
+    """
+
+    def __init__(self, redis_client: Redis, job_id: str, writer: JobWriter = write_job_progress):
+        self.redis = redis_client
+        self.job_id = job_id
+        self.writer = writer
+
+    def _key(self, name: str) -> str:
+        return f"{settings.redis_cache_prefix}generation:{self.job_id}:progress:{name}"
+
+    async def report(self, status: str, progress: int, step: str, error: str | None = None, **extra) -> None:
+        payload = {"job_id": self.job_id, "status": status, "progress": progress, "step": step, **extra}
+        if error is not None:
+            payload["error"] = error
+        await publish_generation_event(self.redis, self.job_id, payload)
+
+        state = {"status": status, "progress": progress, "step": step, "error": error}
+        await self.redis.set(self._key("latest"), json.dumps(state), ex=STATE_TTL_SECONDS)
+        if await self._should_write(status):
+            await self._write(state)
+        else:
+            GENERATION_PROGRESS_EVENTS.labels(result="coalesced").inc()
+
+    async def flush(self) -> None:
+        """Persist the latest reported state regardless of the throttle."""
+        latest = await self.redis.get(self._key("latest"))
+        if latest is not None:
+            await self._write(json.loads(latest))
+
+    async def _should_write(self, status: str) -> bool:
+        if status in TERMINAL_STATUSES or await self.redis.get(self._key("status")) != status:
+            return True
+        # Whoever opens the next write window writes; everything inside it is only published.
+        return bool(await self.redis.set(self._key("throttle"), "1", px=self._interval_ms(), nx=True))
+
+    @staticmethod
+    def _interval_ms() -> int:
+        return int(settings.generation_progress_write_seconds * 1000)
+
+    async def _write(self, state: dict) -> None:
+        values = {
+            "status": state["status"],
+            "progress_percentage": state["progress"],
+            "current_step": state["step"],
+            "error_message": state["error"],
+        }
+        if state["status"] in TERMINAL_STATUSES:
+            values["completed_at"] = utcnow()
+        await self.writer(uuid.UUID(self.job_id), values)
+        await self.redis.set(self._key("status"), state["status"], ex=STATE_TTL_SECONDS)
+        await self.redis.set(self._key("throttle"), "1", px=self._interval_ms())
+        GENERATION_PROGRESS_EVENTS.labels(result="written").inc()
@@ -0,0 +1,159 @@
+from __future__ import annotations
+
+import json
+import re
+from collections.abc import Awaitable, Callable
+
+from redis.asyncio import Redis
+
+from app.config import get_settings
+from app.core.exceptions import DevForgeError
+from app.services.artifacts import ArtifactStore
+from app.services.cache import CacheService
+from app.services.deployer import DeployerService
+from app.services.events import publish_generation_event
+from app.services.fragment_cache import CardFragmentCache
+from app.services.github import GitHubAPIError, GitHubService
+from app.services.public_portfolio import (
+    build_summary,
+    describe_repo,
+    extract_skills,
+    public_data_fingerprint,
+    public_portfolio_context,
+)
+from app.services.rate_limiter import RateLimiter
+from app.services.renderer import get_template_registry
+from app.services.singleflight import SingleFlight
+
+settings = get_settings()
+
+ProgressCallback = Callable[[int, str], Awaitable[None]]
+
+
+class PublicGenerationError(DevForgeError):
+    """Public generation failed; carries the HTTP status the API should answer with."""
+
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+def to_safe_slug(value: str) -> str:
+    slug = re.sub(r"[^a-zA-Z0-9-]+", "-", value.strip().lower()).strip("-")
+    return slug or "portfolio"
+
+
+def generation_flight_key(username: str, template_id: str, refresh: bool) -> str:
+    return f"{username.lower()}:{template_id}:{'refresh' if refresh else 'cached'}"
+
+
+def public_generation_flights(redis_client: Redis) -> SingleFlight:
+    return SingleFlight(redis_client, "public-generate")
+
+
+async def _renew_slug(artifacts: ArtifactStore, cached: dict) -> bool:
+    """
+    A cached result is only as good as its slug: re-link it so the slug outlives the cache entry
+    again, or report a miss if artifact GC already collected it (or the entry predates `slug`).
+    """
+    slug = cached.get("slug")
+    digest = await artifacts.resolve(slug) if slug else None
+    if digest is None:
+        return False
+    await artifacts.link(slug, digest, ttl_seconds=settings.artifact_public_slug_ttl_seconds)
+    return True
+
+
+async def generate_public_portfolio(
+    redis_client: Redis,
+    username: str,
+    template_id: str,
+    refresh: bool = False,
+    progress: ProgressCallback | None = None,
+) -> dict:
+    """Fetch public GitHub data, render and deploy a portfolio; results are cached by content fingerprint."""
+
+    async def _progress(percentage: int, step: str) -> None:
+        if progress is not None:
+            await progress(percentage, step)
+
+    cache = CacheService(redis_client)
+    deployer = DeployerService(redis_client=redis_client)
+    if not refresh:
+        cached = await cache.get_public_result(username, template_id)
+        if cached is not None and await _renew_slug(deployer.artifacts, cached):
+            return {**cached, "cached": True}
+
+    await _progress(10, "Fetching GitHub profile")
+    github_service = GitHubService(RateLimiter(redis_client))
+    try:
+        profile = await github_service.get_public_user(username)
+        await _progress(30, "Fetching repositories")
+        repositories = await github_service.get_public_repositories(username, max_repos=120)
+    except GitHubAPIError as exc:
+        raise PublicGenerationError(404, str(exc)) from exc
+    except Exception as exc:
+        raise PublicGenerationError(502, "Failed to fetch GitHub data") from exc
+
+    fingerprint = public_data_fingerprint(profile, repositories, template_id)
+    if not refresh:
+        cached = await cache.get_public_result(username, template_id, fingerprint)
+        if cached is not None and await _renew_slug(deployer.artifacts, cached):
+            await cache.set_public_result(username, template_id, fingerprint, cached)
+            return {**cached, "cached": True}
+
+    await _progress(60, "Extracting skills")
+    filtered_repositories = [repo for repo in repositories if not repo.get("fork")]
+    for repository in filtered_repositories:
+        if not repository.get("description"):
+            repository["description"] = describe_repo(repository)
+
+    skills = extract_skills(filtered_repositories)
+    summary = build_summary(profile, filtered_repositories, skills)
+
+    await _progress(80, "Rendering portfolio")
+    stylesheet_url = await deployer.deploy_stylesheet(get_template_registry().render_stylesheet(template_id))
+    html = await CardFragmentCache(redis_client).render(
+        template_id,
+        public_portfolio_context(username, profile, filtered_repositories, skills),
+        stylesheet_url=stylesheet_url,
+    )
+
+    # Same content, same slug; identical pages share one stored object either way.
+    slug = to_safe_slug(f"{username}-{fingerprint[:8]}")
+    portfolio_path = await deployer.deploy_static_portfolio(slug, html, ttl_seconds=settings.artifact_public_slug_ttl_seconds)
+    result = {
+        "username": username,
+        "slug": slug,
+        "portfolio_path": portfolio_path,
+        "projects_analyzed": len(filtered_repositories),
+        "summary": summary,
+    }
+    await cache.set_public_result(username, template_id, fingerprint, result)
+    return result
+
+
+class PublicGenerationJobs:
+    """
+    Redis-backed state for asynchronous public generations.
+    Each update is stored under the job key (for polling) and published on the
+    generation channel, so `/ws/generation/{job_id}` streams it as it happens.
+    """
+
+    def __init__(self, redis_client: Redis):
+        self.redis = redis_client
+
+    @staticmethod
+    def _key(job_id: str) -> str:
+        return f"{settings.redis_cache_prefix}public-job:{job_id}"
+
+    async def get(self, job_id: str) -> dict | None:
+        payload = await self.redis.get(self._key(job_id))
+        return json.loads(payload) if payload is not None else None
+
+    async def update(self, job_id: str, status: str, progress: int, step: str, **extra) -> dict:
+        state = {"job_id": job_id, "status": status, "progress": progress, "step": step, **extra}
+        await self.redis.setex(self._key(job_id), settings.public_job_ttl_seconds, json.dumps(state))
+        await publish_generation_event(self.redis, job_id, state)
+        return state
@@ -0,0 +1,280 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import ipaddress
+import json
+import re
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+
+from redis.asyncio import Redis
+from sqlalchemy import select
+
+from app.config import get_settings
+from app.core.database import AsyncSessionLocal
+from app.models.portfolio import Portfolio
+from app.services.artifacts import ArtifactStore, object_key, slug_key
+from app.services.storage import StorageBackend
+from app.utils.logging import get_logger
+from app.utils.metrics import PUBLISHED_HOT_CACHE_BYTES, PUBLISHED_PAGE_REQUESTS
+
+settings = get_settings()
+logger = get_logger("app.services.published_sites")
+
+INVALIDATION_CHANNEL = "published-sites:invalidate"
+# Host -> digest memo entries kept per process (each is a few hundred bytes).
+MAX_HOST_MEMO = 100_000
+# Variant name -> object suffix written by the deployer; "identity" is the original.
+PAGE_VARIANTS = (("identity", ""), ("br", ".br"), ("gzip", ".gz"))
+# Slugs (subdomains and public slugs) are lowercase words and hyphens; anything else is not a legacy page.
+LEGACY_SLUG = re.compile(r"[a-z0-9][a-z0-9-]*")
+
+SiteLookup = Callable[[str], Awaitable[dict | None]]
+
+
+def normalize_host(host: str) -> str:
+    """Lowercase host without port or trailing dot; `[::1]:8000` becomes `::1`."""
+    host = host.strip().lower() if host else ""
+    if host.startswith("["):
+        return host[1:].split("]", 1)[0]
+    if host.count(":") > 1:
+        # Bare IPv6 literal: nothing to strip.
+        return host
+    return host.rsplit(":", 1)[0].rstrip(".")
+
+
+def _is_ip_literal(host: str) -> bool:
+    try:
+        ipaddress.ip_address(host)
+    except ValueError:
+        return False
+    return True
+
+
+def subdomain_for_host(host: str) -> str | None:
+    """The portfolio subdomain a `<subdomain>.<base domain>` host names, or None."""
+    suffix = f".{settings.portfolio_base_domain}"
+    if not host.endswith(suffix):
+        return None
+    label = host[: -len(suffix)]
+    if not label or "." in label or label in settings.portfolio_reserved_subdomains_list:
+        return None
+    return label
+
+
+def is_app_host(host: str) -> bool:
+    """Hosts that reach the app without a site lookup: IP literals (health checks), APP_HOSTS,
+    the base domain and its reserved subdomains."""
+    if host in settings.app_hosts_list or host == settings.portfolio_base_domain or _is_ip_literal(host):
+        return True
+    return host.endswith(f".{settings.portfolio_base_domain}") and subdomain_for_host(host) is None
+
+
+def portfolio_hosts(subdomain: str | None, *custom_domains: str | None) -> list[str]:
+    """Every host that can serve a portfolio: its subdomain host plus any custom domains."""
+    hosts = [f"{subdomain}.{settings.portfolio_base_domain}"] if subdomain else []
+    hosts.extend(normalize_host(domain) for domain in custom_domains if domain)
+    return list(dict.fromkeys(hosts))
+
+
+def site_index_key(host: str) -> str:
+    return f"{settings.redis_cache_prefix}site:{host}"
+
+
+async def invalidate_published_hosts(redis_client: Redis, hosts: list[str]) -> None:
+    """Drop hosts from the shared index and tell every API replica to evict them from memory."""
+    if not hosts:
+        return
+    await redis_client.delete(*(site_index_key(host) for host in hosts))
+    await redis_client.publish(INVALIDATION_CHANNEL, json.dumps(hosts))
+
+
+async def lookup_published_site(host: str) -> dict | None:
+    """Resolve a host against Postgres; only reached when the Redis index has no entry."""
+    subdomain = subdomain_for_host(host)
+    condition = Portfolio.subdomain == subdomain if subdomain else Portfolio.custom_domain == host
+    async with AsyncSessionLocal() as db:
+        row = (
+            await db.execute(
+                select(Portfolio.id, Portfolio.subdomain).where(condition, Portfolio.is_published.is_(True))
+            )
+        ).first()
+    return {"portfolio_id": str(row.id), "subdomain": row.subdomain} if row else None
+
+
+@dataclass
+class PublishedPage:
+    digest: str
+    variants: dict[str, bytes]
+    size: int = field(init=False)
+
+    def __post_init__(self) -> None:
+        self.size = sum(len(content) for content in self.variants.values())
+
+    def etag(self, variant: str) -> str:
+        # Content-addressed: the digest already identifies the bytes, no hashing per load.
+        return self.digest[:32] if variant == "identity" else f"{self.digest[:32]}-{variant}"
+
+
+class PageLRU:
+    """
+    Bounded in-memory LRU of page bytes keyed by content digest; the bound is total bytes,
+    not entry count. Entries never go stale (a digest names immutable content).
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._entries: OrderedDict[str, PublishedPage] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, digest: str) -> PublishedPage | None:
+        page = self._entries.get(digest)
+        if page is not None:
+            self._entries.move_to_end(digest)
+        return page
+
+    def put(self, page: PublishedPage) -> None:
+        if page.digest in self._entries or page.size > self.max_bytes:
+            return
+        self._entries[page.digest] = page
+        self.size += page.size
+        while self.size > self.max_bytes:
+            _, oldest = self._entries.popitem(last=False)
+            self.size -= oldest.size
+        PUBLISHED_HOT_CACHE_BYTES.set(self.size)
+
+
+class PublishedSiteResolver:
+    """
+    Host -> published page, cheapest source first:
+    1. in process: host -> digest memo plus the byte LRU (no I/O at all),
+    2. the Redis host index (host -> subdomain) and artifact index (subdomain -> digest),
+       then the object from storage,
+    3. Postgres, only when the host index has no entry; misses are indexed too, briefly.
+    Publish, unpublish and regeneration call `invalidate_published_hosts`, which clears the
+    index and broadcasts the hosts so every replica drops its memo for them.
+    """
+
+    def __init__(
+        self,
+        redis_client: Redis,
+        storage: StorageBackend | None = None,
+        lookup: SiteLookup = lookup_published_site,
+        max_bytes: int | None = None,
+    ):
+        self.redis = redis_client
+        self.artifacts = ArtifactStore(redis_client, storage)
+        self.lookup = lookup
+        self.pages = PageLRU(max_bytes if max_bytes is not None else settings.published_hot_cache_bytes)
+        self.hosts: OrderedDict[str, tuple[str, float]] = OrderedDict()
+        self._listener: asyncio.Task | None = None
+
+    async def page(self, host: str) -> PublishedPage | None:
+        self._ensure_listener()
+        memo = self.hosts.get(host)
+        if memo is not None and memo[1] > time.monotonic():
+            page = self.pages.get(memo[0])
+            if page is not None:
+                PUBLISHED_PAGE_REQUESTS.labels(source="memory").inc()
+                return page
+
+        site = await self._resolve(host)
+        if site is None:
+            return None
+        page = await self.page_for_slug(site["subdomain"])
+        if page is not None:
+            self.hosts[host] = (page.digest, time.monotonic() + settings.published_hot_cache_ttl_seconds)
+            self.hosts.move_to_end(host)
+            while len(self.hosts) > MAX_HOST_MEMO:
+                self.hosts.popitem(last=False)
+        return page
+
+    async def page_for_slug(self, slug: str) -> PublishedPage | None:
+        digest = await self.artifacts.resolve(slug)
+        if digest is None:
+            return await self._load_legacy(slug)
+        page = self.pages.get(digest)
+        if page is None:
+            page = await self._load(digest)
+            if page is not None:
+                self.pages.put(page)
+        return page
+
+    async def _resolve(self, host: str) -> dict | None:
+        key = site_index_key(host)
+        cached = await self.redis.get(key)
+        if cached is not None:
+            site = json.loads(cached)
+            PUBLISHED_PAGE_REQUESTS.labels(source="index" if site else "missing").inc()
+            return site or None
+
+        site = await self.lookup(host)
+        PUBLISHED_PAGE_REQUESTS.labels(source="database" if site else "missing").inc()
+        ttl = settings.published_site_index_ttl_seconds if site else settings.published_site_missing_ttl_seconds
+        await self.redis.set(key, json.dumps(site or {}), ex=ttl)
+        return site
+
+    async def _load(self, digest: str) -> PublishedPage | None:
+        storage = self.artifacts.storage
+        contents = await asyncio.gather(*(storage.read(object_key(digest, suffix)) for _, suffix in PAGE_VARIANTS))
+        variants = {name: content for (name, _), content in zip(PAGE_VARIANTS, contents, strict=True) if content}
+        if "identity" not in variants:
+            return None
+        return PublishedPage(digest=digest, variants=variants)
+
+    async def _load_legacy(self, slug: str) -> PublishedPage | None:
+        """
+        Pages deployed before content addressing live at `<slug>/index.html` with no index entry;
+        serve them from there (one storage read, as the static mount did) until
+        `scripts/index_legacy_pages.py` has indexed them.
+        """
+        if not LEGACY_SLUG.fullmatch(slug):
+            return None
+        storage = self.artifacts.storage
+        contents = await asyncio.gather(*(storage.read(slug_key(slug, suffix)) for _, suffix in PAGE_VARIANTS))
+        variants = {name: content for (name, _), content in zip(PAGE_VARIANTS, contents, strict=True) if content}
+        if "identity" not in variants:
+            return None
+        PUBLISHED_PAGE_REQUESTS.labels(source="legacy").inc()
+        page = PublishedPage(digest=hashlib.sha256(variants["identity"]).hexdigest(), variants=variants)
+        self.pages.put(page)
+        return page
+
+    def _ensure_listener(self) -> None:
+        if self._listener is None or self._listener.done():
+            self._listener = asyncio.create_task(self._listen())
+
+    async def _listen(self) -> None:
+        while True:
+            pubsub = self.redis.pubsub()
+            try:
+                await pubsub.subscribe(INVALIDATION_CHANNEL)
+                async for message in pubsub.listen():
+                    if message["type"] != "message":
+                        continue
+                    for host in json.loads(message["data"]):
+                        self.hosts.pop(host, None)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                # Missed invalidations are bounded by PUBLISHED_HOT_CACHE_TTL_SECONDS; start clean.
+                logger.warning("published_sites_listener_failed", exc_info=True)
+                self.hosts.clear()
+                await asyncio.sleep(1)
+            finally:
+                await pubsub.close()
+
+    async def close(self) -> None:
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except (asyncio.CancelledError, Exception):
+                pass
+            self._listener = None
@@ -0,0 +1,56 @@
+from __future__ import annotations
+
+import json
+import time
+
+from redis.asyncio import Redis
+
+from app.tasks.celery_app import PRIORITY_QUEUE_SEP, PRIORITY_STEPS, QUEUES
+from app.utils.metrics import CELERY_QUEUE_DEPTH, CELERY_QUEUE_WAIT_SECONDS
+
+
+def priority_lists(queue: str) -> list[str]:
+    """Broker lists backing `queue`, highest priority first (kombu's Redis layout)."""
+    return [queue if step == 0 else f"{queue}{PRIORITY_QUEUE_SEP}{step}" for step in PRIORITY_STEPS]
+
+
+class QueueMonitor:
+    """
+    Depth and head-of-line wait of the Celery queues, read straight from the Redis broker.
+    Messages are LPUSHed and consumed from the right, so the oldest waiting message of each
+    priority list is at index -1; its `sent_at` header (stamped at publish) gives the wait.
+    """
+
+    def __init__(self, broker: Redis):
+        self.broker = broker
+
+    async def stats(self, now: float | None = None) -> dict[str, dict]:
+        now = time.time() if now is None else now
+        stats = {}
+        for queue in QUEUES:
+            depth, oldest = 0, None
+            for key in priority_lists(queue):
+                length = await self.broker.llen(key)
+                if not length:
+                    continue
+                depth += length
+                sent_at = self._sent_at(await self.broker.lindex(key, -1))
+                if sent_at is not None and (oldest is None or sent_at < oldest):
+                    oldest = sent_at
+            stats[queue] = {"depth": depth, "wait_seconds": max(0.0, now - oldest) if oldest is not None else 0.0}
+        return stats
+
+    @staticmethod
+    def _sent_at(message: str | None) -> float | None:
+        if message is None:
+            return None
+        try:
+            sent_at = json.loads(message).get("headers", {}).get("sent_at")
+        except (ValueError, AttributeError):
+            return None
+        return float(sent_at) if sent_at is not None else None
+
+    async def refresh_metrics(self) -> None:
+        for queue, stats in (await self.stats()).items():
+            CELERY_QUEUE_DEPTH.labels(queue=queue).set(stats["depth"])
+            CELERY_QUEUE_WAIT_SECONDS.labels(queue=queue).set(stats["wait_seconds"])
@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from urllib.parse import urlsplit
+
+import httpx
+from redis.asyncio import Redis
+
+from app.config import get_settings
+from app.core.exceptions import RateLimitExceeded
+from app.services.github_cache import token_fingerprint
+
+settings = get_settings()
+
+
+def is_rate_limited(response: httpx.Response) -> bool:
+    # 403 + Retry-After is GitHub's secondary rate limit; 403 + remaining=0 the primary one.
+    headers = response.headers
+    return response.status_code == 429 or (
+        response.status_code == 403
+        and (headers.get("x-ratelimit-remaining") == "0" or headers.get("retry-after") is not None)
+    )
+
+
+def rate_identity(token: str | None) -> str:
+    """Budget owner: the token for authenticated calls, the egress IP for anonymous ones."""
+    if token:
+        return f"token:{token_fingerprint(token)}"
+    return f"ip:{settings.github_egress_ip}"
+
+
+def rate_resource(url: str) -> str:
+    """GitHub budget a request draws on (its `x-ratelimit-resource`), decided before sending."""
+    return "graphql" if urlsplit(url).path.rstrip("/") == "/graphql" else "core"
+
+
+class GitHubRateGovernor:
+    """
+    Header-driven GitHub budget tracker.
+    Each identity keeps a Redis hash per resource (REST `core` and `graphql` have separate
+    budgets, so draining one never stalls the other) mirroring GitHub's own accounting:
+    - remaining: requests left in the current window (decremented optimistically)
+    - reset: epoch seconds when the window resets
+    - blocked_until: epoch seconds from Retry-After / exhausted budgets
+    Callers wait for the window to reset instead of failing.
+    """
+
+    def __init__(self, redis_client: Redis):
+        self.redis = redis_client
+
+    @staticmethod
+    def _key(identity: str, resource: str) -> str:
+        return f"github:budget:{identity}:{resource}"
+
+    async def acquire(self, identity: str, resource: str = "core", max_wait: float | None = None) -> None:
+        max_wait = settings.github_rate_max_wait_seconds if max_wait is None else max_wait
+        key = self._key(identity, resource)
+        deadline = time.time() + max_wait
+        while True:
+            state = await self.redis.hgetall(key)
+            now = time.time()
+            wait = self._wait_seconds(state, now)
+            if wait <= 0:
+                if state.get("remaining") is not None:
+                    await self.redis.hincrby(key, "remaining", -1)
+                return
+            if now + wait > deadline:
+                raise RateLimitExceeded(f"GitHub {resource} budget for {identity} exhausted. Retry in {int(wait) + 1}s")
+            await asyncio.sleep(min(wait, settings.github_rate_poll_seconds))
+
+    @staticmethod
+    def _wait_seconds(state: dict, now: float) -> float:
+        blocked_until = float(state.get("blocked_until", 0))
+        if blocked_until > now:
+            return blocked_until - now
+        remaining = state.get("remaining")
+        reset = float(state.get("reset", 0))
+        if remaining is not None and int(remaining) <= settings.github_rate_reserve and reset > now:
+            return reset - now
+        return 0.0
+
+    async def observe(self, identity: str, response: httpx.Response, resource: str = "core") -> bool:
+        """
+        Record budget headers from a response, under the resource GitHub reports charging
+        (`resource` when it does not say). Returns True when the call was rate limited.
+        """
+        headers = response.headers
+        key = self._key(identity, headers.get("x-ratelimit-resource") or resource)
+        now = time.time()
+        mapping: dict[str, str] = {}
+        remaining = headers.get("x-ratelimit-remaining")
+        reset = headers.get("x-ratelimit-reset")
+        retry_after = headers.get("retry-after")
+        if remaining is not None and reset is not None:
+            state = await self.redis.hgetall(key)
+            tracked = remaining
+            # Out-of-order responses from the same window must not raise the optimistic count.
+            if state.get("reset") == reset and state.get("remaining") is not None:
+                tracked = str(min(int(remaining), int(state["remaining"])))
+            mapping["remaining"] = tracked
+            mapping["reset"] = reset
+
+        limited = is_rate_limited(response)
+        if limited:
+            if retry_after is not None:
+                blocked_until = now + float(retry_after)
+            elif reset is not None:
+                blocked_until = float(reset)
+            else:
+                blocked_until = now + 60
+            mapping["blocked_until"] = str(blocked_until)
+
+        if mapping:
+            await self.redis.hset(key, mapping=mapping)
+            expires_at = max(float(mapping.get("reset", 0)), float(mapping.get("blocked_until", 0)), now + 60)
+            await self.redis.expire(key, int(expires_at - now) + 60)
+        return limited
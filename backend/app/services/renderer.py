@@ -0,0 +1,173 @@
+from __future__ import annotations
+
+import hashlib
+import re
+from functools import lru_cache
+from pathlib import Path
+from typing import Any
+
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader, Template, select_autoescape
+from markupsafe import Markup
+
+from app.config import get_settings
+
+settings = get_settings()
+
+TEMPLATE_DIR = Path(__file__).resolve().parent.parent / "templates" / "portfolio"
+DEFAULT_TEMPLATE_ID = "minimal"
+
+TEMPLATES = [
+    {
+        "id": "minimal",
+        "name": "Minimal Pro",
+        "description": "Clean engineering-focused template.",
+        "defaults": {"accent": "#0f766e", "font": "Space Grotesk"},
+    },
+    {
+        "id": "modern",
+        "name": "Modern Grid",
+        "description": "Balanced layout with metrics-first sections.",
+        "defaults": {"accent": "#1d4ed8", "font": "Sora"},
+    },
+    {
+        "id": "creative",
+        "name": "Creative Systems",
+        "description": "Bold visual narrative for senior portfolio storytelling.",
+        "defaults": {"accent": "#ea580c", "font": "General Sans"},
+    },
+]
+
+# Stylesheets concatenated (in order) from templates/portfolio/styles for each template.
+TEMPLATE_STYLESHEETS = {
+    "minimal": ["base.css"],
+    "modern": ["base.css", "modern.css"],
+    "creative": ["base.css", "creative.css"],
+}
+
+# Theme values land inside a <style> block, where HTML escaping does not apply.
+# Keep only characters that cannot end a declaration or the block.
+_CSS_UNSAFE = re.compile(r"[^\w\s#%(),.'\"-]")
+
+
+def css_value(value: Any) -> Markup:
+    return Markup(_CSS_UNSAFE.sub("", str(value or "")).strip())
+
+
+class TemplateRegistry:
+    """
+    Portfolio templates compiled once per process.
+    Compiled templates are kept on the registry (and in a bytecode cache on disk,
+    so new worker processes skip the parse step); content is auto-escaped.
+    """
+
+    def __init__(self, template_dir: Path = TEMPLATE_DIR, bytecode_cache_dir: str | None = None):
+        cache_dir = Path(bytecode_cache_dir or settings.template_bytecode_cache_dir)
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        self.env = Environment(
+            loader=FileSystemLoader(str(template_dir)),
+            autoescape=select_autoescape(["html"]),
+            bytecode_cache=FileSystemBytecodeCache(str(cache_dir)),
+            auto_reload=False,
+            trim_blocks=True,
+            lstrip_blocks=True,
+        )
+        self.env.filters["css_value"] = css_value
+        self.version = self._source_version(template_dir)
+        self._metadata = {template["id"]: template for template in TEMPLATES}
+        self._compiled: dict[str, Template] = {
+            template_id: self.env.get_template(f"{template_id}.html") for template_id in self._metadata
+        }
+        self._repo_card = self.env.get_template("_macros.html").module.repo_card
+        self._stylesheet = self.env.get_template("stylesheet.css")
+
+    @staticmethod
+    def _source_version(template_dir: Path) -> str:
+        """Digest of every template source; cached fragments are keyed on it."""
+        digest = hashlib.sha256()
+        for path in sorted(template_dir.rglob("*")):
+            if path.is_file():
+                digest.update(path.relative_to(template_dir).as_posix().encode())
+                digest.update(path.read_bytes())
+        return digest.hexdigest()[:12]
+
+    def list(self) -> list[dict]:
+        return list(self._metadata.values())
+
+    def get(self, template_id: str) -> dict | None:
+        return self._metadata.get(template_id)
+
+    def resolve(self, template_id: str | None) -> dict:
+        return self._metadata.get(template_id or "", self._metadata[DEFAULT_TEMPLATE_ID])
+
+    def resolve_theme(self, template_id: str | None, theme: dict | None = None) -> dict:
+        return {**self.resolve(template_id)["defaults"], **(theme or {})}
+
+    def render_stylesheet(self, template_id: str | None, theme: dict | None = None) -> str:
+        """The full stylesheet for a template/theme combination; identical inputs give identical bytes."""
+        template = self.resolve(template_id)
+        return self._stylesheet.render(
+            sheets=TEMPLATE_STYLESHEETS[template["id"]],
+            theme=self.resolve_theme(template["id"], theme),
+        )
+
+    def render(
+        self,
+        template_id: str | None,
+        context: dict[str, Any],
+        card_fragments: list[Markup] | None = None,
+        stylesheet_url: str | None = None,
+    ) -> str:
+        """
+        Render a page. Pre-rendered `card_fragments` (one per repository) are spliced in as-is.
+        With `stylesheet_url` the page links its shared stylesheet; without it the CSS is inlined.
+        """
+        template = self.resolve(template_id)
+        theme = context.get("theme")
+        inline_stylesheet = None if stylesheet_url else Markup(self.render_stylesheet(template["id"], theme))
+        return self._compiled[template["id"]].render(
+            {
+                **context,
+                "template": template,
+                "card_fragments": card_fragments,
+                "stylesheet_url": stylesheet_url,
+                "inline_stylesheet": inline_stylesheet,
+            }
+        )
+
+    def render_card(self, card: dict[str, Any]) -> Markup:
+        """Render one repository card exactly as the page loop would."""
+        return self._repo_card(card)
+
+
+@lru_cache
+def get_template_registry() -> TemplateRegistry:
+    return TemplateRegistry()
+
+
+def portfolio_context(
+    username: str,
+    headline: str,
+    repositories: list[dict],
+    skills: list[dict],
+    display_name: str | None = None,
+    bio: str | None = None,
+    stats: list[tuple[str, Any]] | None = None,
+    theme: dict | None = None,
+    empty_message: str = "No repositories found.",
+) -> dict[str, Any]:
+    """
+    Template context shared by private and public portfolios.
+    `repositories` items carry id, name, description, stars, forks and url;
+    `skills` items carry name and proficiency.
+    """
+    return {
+        "username": username,
+        "display_name": display_name or username,
+        "headline": headline,
+        "bio": bio,
+        "stats": stats or [],
+        "skills": skills,
+        "repositories": repositories,
+        "theme": theme or {},
+        "empty_message": empty_message,
+    }
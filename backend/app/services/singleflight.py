@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import time
+import uuid
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from redis.asyncio import Redis
+
+from app.config import get_settings
+from app.utils.metrics import SINGLEFLIGHT_CALLS
+
+settings = get_settings()
+
+# Compare-and-delete: a leader whose lock expired (and was taken over) must not release its successor's.
+_RELEASE = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls that share a key into one computation.
+    - In-process: followers await the leader's future.
+    - Across replicas: the leader holds a Redis NX lock and publishes its result under a
+      short-lived key scoped to its lock token; followers read the token from the lock and
+      poll that key, so they never pick up an earlier flight's result.
+    If the leader fails, followers on other replicas retry for the lock; if waiting exceeds
+    SINGLEFLIGHT_WAIT_SECONDS they compute themselves. Results must be JSON serializable.
+    """
+
+    def __init__(self, redis_client: Redis, namespace: str):
+        self.redis = redis_client
+        self.namespace = namespace
+        self._inflight: dict[str, asyncio.Future] = {}
+
+    def _key(self, key: str, suffix: str) -> str:
+        return f"{settings.redis_cache_prefix}singleflight:{self.namespace}:{key}:{suffix}"
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        future = self._inflight.get(key)
+        if future is not None:
+            self._record("local_follower")
+            return await asyncio.shield(future)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            result = await self._do_distributed(key, fn)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as exc:
+            future.set_exception(exc)
+            # Mark retrieved so a flight without followers does not log "exception never retrieved".
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            self._inflight.pop(key, None)
+
+    async def _do_distributed(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        lock_key = self._key(key, "lock")
+        deadline = time.monotonic() + settings.singleflight_wait_seconds
+        while True:
+            token = uuid.uuid4().hex
+            if await self.redis.set(lock_key, token, px=int(settings.singleflight_lock_ttl_seconds * 1000), nx=True):
+                self._record("leader")
+                try:
+                    result = await fn()
+                    await self.redis.set(
+                        self._key(key, f"result:{token}"),
+                        json.dumps(result),
+                        px=int(settings.singleflight_result_ttl_seconds * 1000),
+                    )
+                    return result
+                finally:
+                    await self.redis.eval(_RELEASE, 1, lock_key, token)
+
+            leader = await self.redis.get(lock_key)
+            if leader is None:
+                # Released between our attempt and the lookup: contend again.
+                continue
+            # Another replica is computing the same key: wait for its published result.
+            result_key = self._key(key, f"result:{leader}")
+            while True:
+                cached = await self.redis.get(result_key)
+                if cached is not None:
+                    self._record("remote_follower")
+                    return json.loads(cached)
+                if time.monotonic() >= deadline:
+                    self._record("timeout")
+                    return await fn()
+                if await self.redis.get(lock_key) != leader:
+                    # The leader published just before releasing; no result means it failed
+                    # (or its lock expired): contend for the lock again.
+                    cached = await self.redis.get(result_key)
+                    if cached is not None:
+                        self._record("remote_follower")
+                        return json.loads(cached)
+                    break
+                await asyncio.sleep(settings.singleflight_poll_seconds)
+
+    def _record(self, role: str) -> None:
+        SINGLEFLIGHT_CALLS.labels(namespace=self.namespace, role=role).inc()
@@ -0,0 +1,186 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import uuid
+from abc import ABC, abstractmethod
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache, partial
+from pathlib import Path
+from typing import Any, TypeVar
+
+from app.config import get_settings
+from app.core.exceptions import DevForgeError
+
+try:
+    import boto3
+except ImportError:  # pragma: no cover - only needed for STORAGE_BACKEND=s3 (pip install ".[s3]")
+    boto3 = None
+
+settings = get_settings()
+
+T = TypeVar("T")
+
+_io_executor: ThreadPoolExecutor | None = None
+
+
+def _executor() -> ThreadPoolExecutor:
+    # Dedicated, bounded pool: a burst of deploys queues here instead of occupying the
+    # default executor other request paths (and asyncio.to_thread) depend on.
+    global _io_executor
+    if _io_executor is None:
+        _io_executor = ThreadPoolExecutor(max_workers=settings.storage_io_workers, thread_name_prefix="storage-io")
+    return _io_executor
+
+
+async def run_io(fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Run blocking storage I/O (or compression) off the event loop."""
+    return await asyncio.get_running_loop().run_in_executor(_executor(), partial(fn, *args, **kwargs))
+
+
+class StorageError(DevForgeError):
+    """Raised when a storage backend is misconfigured or unavailable."""
+
+
+class StorageBackend(ABC):
+    """
+    Where deployed artifacts live. Keys are `/`-separated paths relative to the artifact
+    root (`octocat/index.html`, `_assets/<hash>.css`). A write is atomic: readers see the
+    previous object or the new one, never a partial one.
+    `serves_public_urls` marks backends whose objects browsers fetch directly (a bucket behind
+    STORAGE_PUBLIC_URL) rather than through the app.
+    """
+
+    serves_public_urls: bool = False
+
+    @abstractmethod
+    async def write(self, key: str, content: bytes, content_type: str | None = None, encoding: str | None = None) -> None:
+        ...
+
+    @abstractmethod
+    async def read(self, key: str) -> bytes | None:
+        ...
+
+    @abstractmethod
+    async def exists(self, key: str) -> bool:
+        ...
+
+    @abstractmethod
+    async def delete(self, key: str) -> None:
+        ...
+
+
+def _write_atomic(path: Path, content: bytes) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temp = path.with_name(f".{path.name}.{os.getpid()}.{uuid.uuid4().hex[:8]}.tmp")
+    try:
+        temp.write_bytes(content)
+        os.replace(temp, path)
+    finally:
+        temp.unlink(missing_ok=True)
+
+
+def _read_or_none(path: Path) -> bytes | None:
+    try:
+        return path.read_bytes()
+    except FileNotFoundError:
+        return None
+
+
+class LocalStorage(StorageBackend):
+    """Files under a local directory (served by the `/generated` static mount)."""
+
+    def __init__(self, root: str):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def path(self, key: str) -> Path:
+        path = (self.root / key).resolve()
+        if not path.is_relative_to(self.root.resolve()):
+            raise StorageError(f"Key escapes the storage root: {key}")
+        return path
+
+    async def write(self, key: str, content: bytes, content_type: str | None = None, encoding: str | None = None) -> None:
+        # Temp file in the same directory, then rename: the swap is atomic on POSIX.
+        await run_io(_write_atomic, self.path(key), content)
+
+    async def read(self, key: str) -> bytes | None:
+        return await run_io(_read_or_none, self.path(key))
+
+    async def exists(self, key: str) -> bool:
+        return await run_io(self.path(key).is_file)
+
+    async def delete(self, key: str) -> None:
+        await run_io(self.path(key).unlink, missing_ok=True)
+
+
+def _is_missing(exc: Exception) -> bool:
+    response = getattr(exc, "response", None)
+    if not isinstance(response, dict):
+        return False
+    return response.get("Error", {}).get("Code") in {"404", "NoSuchKey", "NotFound"}
+
+
+class S3Storage(StorageBackend):
+    """
+    Objects in an S3-compatible bucket (AWS S3, Cloudflare R2, MinIO). PUTs are atomic by
+    construction. `client` may be injected (tests use an in-memory stand-in); otherwise a
+    boto3 client is built from the CLOUDFLARE_R2_* settings. boto3 calls block, so they run
+    on the storage I/O pool.
+    """
+
+    serves_public_urls = True
+
+    def __init__(self, bucket: str, prefix: str = "", client: Any = None):
+        if client is None:
+            if boto3 is None:
+                raise StorageError('STORAGE_BACKEND=s3 requires boto3 (pip install ".[s3]")')
+            client = boto3.client(
+                "s3",
+                endpoint_url=settings.cloudflare_r2_endpoint or None,
+                aws_access_key_id=settings.cloudflare_r2_access_key or None,
+                aws_secret_access_key=settings.cloudflare_r2_secret_key or None,
+            )
+        self.client = client
+        self.bucket = bucket
+        self.prefix = prefix.strip("/")
+
+    def object_key(self, key: str) -> str:
+        return f"{self.prefix}/{key}" if self.prefix else key
+
+    async def write(self, key: str, content: bytes, content_type: str | None = None, encoding: str | None = None) -> None:
+        extra = {}
+        if content_type:
+            extra["ContentType"] = content_type
+        if encoding:
+            extra["ContentEncoding"] = encoding
+        await run_io(self.client.put_object, Bucket=self.bucket, Key=self.object_key(key), Body=content, **extra)
+
+    async def read(self, key: str) -> bytes | None:
+        try:
+            response = await run_io(self.client.get_object, Bucket=self.bucket, Key=self.object_key(key))
+        except Exception as exc:
+            if _is_missing(exc):
+                return None
+            raise
+        return await run_io(response["Body"].read)
+
+    async def exists(self, key: str) -> bool:
+        try:
+            await run_io(self.client.head_object, Bucket=self.bucket, Key=self.object_key(key))
+        except Exception as exc:
+            if _is_missing(exc):
+                return False
+            raise
+        return True
+
+    async def delete(self, key: str) -> None:
+        await run_io(self.client.delete_object, Bucket=self.bucket, Key=self.object_key(key))
+
+
+@lru_cache
+def get_storage_backend() -> StorageBackend:
+    if settings.storage_backend == "s3":
+        return S3Storage(settings.cloudflare_r2_bucket, prefix=settings.storage_s3_prefix)
+    return LocalStorage(settings.storage_local_dir)
@@ -1,6 +1,5 @@
 from __future__ import annotations
 
-import asyncio
 import uuid
 
 from sqlalchemy import select
@@ -9,7 +8,7 @@ from app.config import get_settings
 from app.core.database import AsyncSessionLocal
 from app.models.repository import Repository
 from app.services.ai import AIService
-from app.tasks.celery_app import celery_app
+from app.tasks.celery_app import celery_app, run_async
 
 settings = get_settings()
 
@@ -37,6 +36,6 @@ def generate_project_description(self, repository_id: str) -> dict:
             return {"repository_id": repository_id, "cached": False}
 
     try:
-        return asyncio.run(_run())
+        return run_async(_run())
     except Exception as exc:
         raise self.retry(exc=exc, countdown=2 ** self.request.retries)
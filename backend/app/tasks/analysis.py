@@ -1,11 +1,14 @@
 from __future__ import annotations
 
 import asyncio
+import math
 import uuid
 from datetime import datetime
 
-from celery import chord, group
+from celery import Signature, chord, group
 from sqlalchemy import delete, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.config import get_settings
 from app.core.database import AsyncSessionLocal
@@ -15,12 +18,15 @@ from app.models.commit import Commit
 from app.models.repository import Repository
 from app.models.skill import Skill
 from app.models.user import User
-from app.services.github import GitHubService
+from app.services.github import GitHubService, get_github_service
+from app.services.github_graphql import GitHubGraphQLService
 from app.services.rate_limiter import RateLimiter
-from app.tasks.celery_app import celery_app
+from app.tasks.celery_app import PRIORITY_LOW, PRIORITY_NORMAL, celery_app, run_async
 from app.utils.helpers import utcnow
+from app.utils.logging import get_logger
 
 settings = get_settings()
+logger = get_logger("app.tasks.analysis")
 
 
 def _parse_owner_repo(full_name: str) -> tuple[str, str]:
@@ -30,9 +36,180 @@ def _parse_owner_repo(full_name: str) -> tuple[str, str]:
     return parts[0], parts[1]
 
 
+def _commit_row(repository_id: uuid.UUID, sha: str, detail: dict) -> dict:
+    commit_data = detail.get("commit", {})
+    author = commit_data.get("author") or {}
+    stats = detail.get("stats") or {}
+    committed_at_raw = author.get("date")
+    return {
+        "repository_id": repository_id,
+        "sha": sha,
+        "message": commit_data.get("message", ""),
+        "author_name": (author.get("name") or "")[:255] or None,
+        "author_email": (author.get("email") or "")[:255] or None,
+        "committed_at": (
+            datetime.fromisoformat(committed_at_raw.replace("Z", "+00:00")) if committed_at_raw else utcnow()
+        ),
+        "additions": int(stats.get("additions") or 0),
+        "deletions": int(stats.get("deletions") or 0),
+        "files_changed": len(detail.get("files") or []),
+    }
+
+
+async def _insert_commits(db: AsyncSession, rows: list[dict]) -> int:
+    """Bulk insert commit rows, ignoring SHAs that are already stored."""
+    if not rows:
+        return 0
+    statement = (
+        pg_insert(Commit)
+        .values([{"id": uuid.uuid4(), **row} for row in rows])
+        .on_conflict_do_nothing(constraint="uq_commits_sha")
+        .returning(Commit.id)
+    )
+    inserted = len((await db.execute(statement)).all())
+    await db.commit()
+    return inserted
+
+
+async def _fetch_and_store_commit_details(
+    db: AsyncSession,
+    github: GitHubService,
+    token: str,
+    repo: Repository,
+    shas: list[str],
+) -> dict:
+    """
+    Fetch commit details concurrently (bounded by GITHUB_COMMIT_DETAIL_CONCURRENCY, and paced by
+    the rate governor inside the GitHub client) and stream rows into bulk inserts as they arrive.
+    SHAs whose fetch failed are returned so they can be retried on their own.
+    """
+    owner, repo_name = _parse_owner_repo(repo.full_name)
+    semaphore = asyncio.Semaphore(settings.github_commit_detail_concurrency)
+
+    async def _fetch(sha: str) -> tuple[str, dict | None]:
+        async with semaphore:
+            try:
+                return sha, await github.fetch_commit_detail(token, owner, repo_name, sha)
+            except Exception:
+                logger.warning("commit_detail_failed", repository=repo.full_name, sha=sha, exc_info=True)
+                return sha, None
+
+    result = {"inserted": 0, "failed": [], "additions": 0, "deletions": 0, "files_changed": 0}
+    buffer: list[dict] = []
+    for next_detail in asyncio.as_completed([_fetch(sha) for sha in shas]):
+        sha, detail = await next_detail
+        if detail is None:
+            result["failed"].append(sha)
+            continue
+        row = _commit_row(repo.id, sha, detail)
+        for field in ("additions", "deletions", "files_changed"):
+            result[field] += row[field]
+        buffer.append(row)
+        if len(buffer) >= settings.commit_insert_batch_size:
+            result["inserted"] += await _insert_commits(db, buffer)
+            buffer = []
+    result["inserted"] += await _insert_commits(db, buffer)
+    return result
+
+
+def _commit_timestamp(item: dict) -> datetime | None:
+    """Committer date of a REST commit listing item; this is the date `since=` filters on."""
+    commit_data = item.get("commit") or {}
+    raw = (commit_data.get("committer") or {}).get("date") or (commit_data.get("author") or {}).get("date")
+    return datetime.fromisoformat(raw.replace("Z", "+00:00")) if raw else None
+
+
+def _commits_after_cursor(items: list[dict], cursor_sha: str | None) -> list[dict]:
+    """Trim a newest-first listing at the cursor commit (`since=` is inclusive)."""
+    fresh: list[dict] = []
+    for item in items:
+        if cursor_sha is not None and item.get("sha") == cursor_sha:
+            break
+        fresh.append(item)
+    return fresh
+
+
+def _advance_cursor(repo: Repository, sha: str | None, committed_at: datetime | None) -> None:
+    if sha is None or committed_at is None:
+        return
+    if repo.commit_cursor_at is None or committed_at >= repo.commit_cursor_at:
+        repo.commit_cursor_sha = sha
+        repo.commit_cursor_at = committed_at
+
+
+async def _unknown_shas(db: AsyncSession, shas: list[str]) -> list[str]:
+    known = set((await db.scalars(select(Commit.sha).where(Commit.sha.in_(shas)))).all()) if shas else set()
+    return [sha for sha in shas if sha not in known]
+
+
+def _commit_batches(
+    repository_id: str,
+    shas: list[str],
+    cursor: dict | None = None,
+    backfill: bool = False,
+    priority: int = PRIORITY_NORMAL,
+) -> Signature:
+    """Chord analyzing `shas` in batches of 100 in parallel, then aggregating (and advancing the cursor)."""
+    batches = [shas[i : i + 100] for i in range(0, len(shas), 100)]
+    job = group([analyze_commits_batch.s(repository_id, batch).set(priority=priority) for batch in batches])
+    aggregate = aggregate_commit_analysis.s(repository_id, cursor=cursor, backfill=backfill).set(priority=priority)
+    return chord(job, aggregate)
+
+
+async def _ingest_commit_history(
+    db: AsyncSession,
+    github: GitHubGraphQLService,
+    token: str,
+    repo: Repository,
+    since: datetime | None = None,
+    limit: int | None = None,
+    stop_at_known: bool = True,
+    resumable: bool = False,
+) -> tuple[int, dict | None]:
+    """
+    Page through history (stats included) newest first and bulk insert unseen commits.
+    Incremental runs pass the repository cursor as `since` and stop at the first known SHA;
+    backfills walk past known SHAs up to `limit`. Returns the number inserted and the newest row.
+
+    A resumable walk only advances the cursor once it has read back to `since`. If `limit`
+    or an error cuts it short, `repo.commit_resume` keeps the next page and the head the walk
+    started from (committed with each page), and the next run continues from there.
+    """
+    owner, repo_name = _parse_owner_repo(repo.full_name)
+    limit = settings.github_commit_history_limit if limit is None else limit
+    resume = (repo.commit_resume or {}) if resumable else {}
+    after = resume.get("after")
+    head = None
+    if resume:
+        since = datetime.fromisoformat(resume["since"]) if resume.get("since") else None
+        head = {"sha": resume["head"]["sha"], "committed_at": datetime.fromisoformat(resume["head"]["at"])}
+    inserted = 0
+    seen = 0
+    done = False
+    while seen < limit and not done:
+        rows, after = await github.fetch_commit_history(token, owner, repo_name, since=since, after=after)
+        head = head or (rows[0] if rows else None)
+        seen += len(rows)
+        fresh = set(await _unknown_shas(db, [row["sha"] for row in rows]))
+        done = not rows or after is None or (stop_at_known and len(fresh) < len(rows))
+        if resumable:
+            repo.commit_resume = None if done else {
+                "after": after,
+                "since": since.isoformat() if since else None,
+                "head": {"sha": head["sha"], "at": head["committed_at"].isoformat()},
+            }
+            if done and head:
+                _advance_cursor(repo, head["sha"], head["committed_at"])
+        inserted += await _insert_commits(
+            db, [{"repository_id": repo.id, **row} for row in rows if row["sha"] in fresh]
+        )
+        await db.commit()
+    return inserted, head
+
+
 @celery_app.task(bind=True, max_retries=settings.celery_max_retries)
 def analyze_repository(self, repository_id: str) -> dict:
-    async def _run() -> dict:
+    async def _run() -> dict | Signature:
         repo_uuid = uuid.UUID(repository_id)
         async with AsyncSessionLocal() as db:
             repo = await db.scalar(select(Repository).where(Repository.id == repo_uuid))
@@ -45,39 +222,117 @@ def analyze_repository(self, repository_id: str) -> dict:
             token = decrypt_token(user.access_token)
 
             owner, repo_name = _parse_owner_repo(repo.full_name)
-            github = GitHubService(RateLimiter(get_redis_client()))
+            github = get_github_service(RateLimiter(get_redis_client()))
+            first_sync = repo.commit_cursor_at is None
+            if first_sync and repo.commits_backfilled_at is None:
+                # Deep history is pulled separately so the first analysis stays fast.
+                backfill_repository_commits.apply_async((repository_id,), priority=PRIORITY_LOW)
 
-            # Incremental update: only fetch recent commits and skip known SHAs.
-            commits = await github.fetch_repo_commits(token, owner, repo_name, per_page=100, page=1)
-            existing_shas = {
-                sha
-                for sha in (
-                    await db.scalars(
-                        select(Commit.sha).where(Commit.repository_id == repo.id).limit(5000)
-                    )
-                ).all()
-            }
-            new_commits = [item for item in commits if item.get("sha") not in existing_shas]
-            shas = [item.get("sha") for item in new_commits if item.get("sha")]
+            if isinstance(github, GitHubGraphQLService):
+                # A first sync takes the latest page and starts the cursor there (the backfill
+                # covers the rest); later runs read back to the cursor, resuming if cut short.
+                inserted, head = await _ingest_commit_history(
+                    db,
+                    github,
+                    token,
+                    repo,
+                    since=repo.commit_cursor_at,
+                    limit=100 if first_sync else None,
+                    resumable=not first_sync,
+                )
+                if first_sync and head:
+                    _advance_cursor(repo, head["sha"], head["committed_at"])
+                repo.analyzed_at = utcnow()
+                await db.commit()
+                return {"repository_id": repository_id, "new_commits": inserted, "batched": 0}
+
+            # Incremental update: list everything since the cursor (`since=` bounds it, and a capped
+            # listing would advance the cursor past commits it never read); a first sync takes the latest page.
+            commits = await github.list_repo_commits(
+                token,
+                owner,
+                repo_name,
+                since=repo.commit_cursor_at,
+                max_items=100 if first_sync else None,
+            )
+            new_commits = _commits_after_cursor(commits, repo.commit_cursor_sha)
+            cursor = None
+            if new_commits:
+                head_at = _commit_timestamp(new_commits[0])
+                cursor = {"sha": new_commits[0].get("sha"), "at": head_at.isoformat() if head_at else None}
+            shas = await _unknown_shas(db, [item["sha"] for item in new_commits if item.get("sha")])
             if not shas:
+                if cursor:
+                    _advance_cursor(repo, cursor["sha"], head_at)
                 repo.analyzed_at = utcnow()
                 await db.commit()
                 return {"repository_id": repository_id, "new_commits": 0, "batched": 0}
 
-        # partition into batches of 100 and analyze in parallel via chord
-        batches = [shas[i : i + 100] for i in range(0, len(shas), 100)]
-        job = group([analyze_commits_batch.s(repository_id, batch) for batch in batches])
-        result = chord(job)(aggregate_commit_analysis.s(repository_id))
-        return result.get(timeout=120)
+        # Batches keep the priority this analysis was sent with (high when a generation waits on it).
+        priority = (self.request.delivery_info or {}).get("priority")
+        return _commit_batches(repository_id, shas, cursor=cursor, priority=PRIORITY_NORMAL if priority is None else priority)
 
     try:
-        return asyncio.run(_run())
+        outcome = run_async(_run())
     except Exception as exc:
         raise self.retry(exc=exc, countdown=2 ** self.request.retries)
+    if isinstance(outcome, Signature):
+        # Hand over to the batch chord instead of blocking on it: anything waiting on this task
+        # (a generation chord, link callbacks) now waits on the aggregate, whose result becomes ours.
+        raise self.replace(outcome)
+    return outcome
 
 
 @celery_app.task(bind=True, max_retries=settings.celery_max_retries)
-def analyze_commits_batch(self, repository_id: str, commit_shas: list[str]) -> dict:
+def backfill_repository_commits(self, repository_id: str) -> dict:
+    """One-off deep history import for a repository, bounded by GITHUB_COMMIT_BACKFILL_LIMIT."""
+
+    async def _run() -> dict:
+        async with AsyncSessionLocal() as db:
+            repo = await db.scalar(select(Repository).where(Repository.id == uuid.UUID(repository_id)))
+            if repo is None:
+                raise ValueError("Repository not found")
+            if repo.commits_backfilled_at is not None:
+                return {"repository_id": repository_id, "backfilled": 0, "skipped": True}
+            user = await db.scalar(select(User).where(User.id == repo.user_id))
+            if user is None or not user.access_token:
+                raise ValueError("Repository owner token unavailable")
+            token = decrypt_token(user.access_token)
+
+            owner, repo_name = _parse_owner_repo(repo.full_name)
+            github = get_github_service(RateLimiter(get_redis_client()))
+            if isinstance(github, GitHubGraphQLService):
+                inserted, _ = await _ingest_commit_history(
+                    db, github, token, repo, limit=settings.github_commit_backfill_limit, stop_at_known=False
+                )
+                repo.commits_backfilled_at = utcnow()
+                await db.commit()
+                return {"repository_id": repository_id, "backfilled": inserted, "batched": 0}
+
+            commits = await github.list_repo_commits(
+                token, owner, repo_name, max_items=settings.github_commit_backfill_limit
+            )
+            shas: list[str] = []
+            all_shas = [item["sha"] for item in commits if item.get("sha")]
+            for index in range(0, len(all_shas), 1000):
+                shas.extend(await _unknown_shas(db, all_shas[index : index + 1000]))
+            if not shas:
+                repo.commits_backfilled_at = utcnow()
+                await db.commit()
+                return {"repository_id": repository_id, "backfilled": 0, "batched": 0}
+
+        # Deep history yields to fresh analyses (and to anything a user waits on) on the github-io queue.
+        _commit_batches(repository_id, shas, backfill=True, priority=PRIORITY_LOW).apply_async()
+        return {"repository_id": repository_id, "backfilled": len(shas), "batched": math.ceil(len(shas) / 100)}
+
+    try:
+        return run_async(_run())
+    except Exception as exc:
+        raise self.retry(exc=exc, countdown=2 ** self.request.retries)
+
+
+@celery_app.task(bind=True, max_retries=settings.celery_max_retries)
+def analyze_commits_batch(self, repository_id: str, commit_shas: list[str], attempt: int = 0) -> dict:
     async def _run() -> dict:
         repo_uuid = uuid.UUID(repository_id)
         async with AsyncSessionLocal() as db:
@@ -88,10 +343,8 @@ def analyze_commits_batch(self, repository_id: str, commit_shas: list[str]) -> d
             if user is None or not user.access_token:
                 raise ValueError("Repository owner token unavailable")
             token = decrypt_token(user.access_token)
-            owner, repo_name = _parse_owner_repo(repo.full_name)
             github = GitHubService(RateLimiter(get_redis_client()))
 
-            inserted = 0
             existing = {
                 sha
                 for sha in (
@@ -100,74 +353,58 @@ def analyze_commits_batch(self, repository_id: str, commit_shas: list[str]) -> d
                     )
                 ).all()
             }
-            for sha in commit_shas:
-                if sha in existing:
-                    continue
-                # Use commit endpoint for detailed stats
-                detail = await github.fetch_commit_detail(token, owner, repo_name, sha)
-                commit_data = detail.get("commit", {})
-                author = commit_data.get("author") or {}
-                stats = detail.get("stats") or {}
-                files = detail.get("files") or []
-
-                committed_at_raw = author.get("date")
-                committed_at = (
-                    datetime.fromisoformat(committed_at_raw.replace("Z", "+00:00"))
-                    if committed_at_raw
-                    else utcnow()
-                )
-
-                commit = Commit(
-                    repository_id=repo.id,
-                    sha=sha,
-                    message=commit_data.get("message", ""),
-                    author_name=(author.get("name") or "")[:255] or None,
-                    author_email=(author.get("email") or "")[:255] or None,
-                    committed_at=committed_at,
-                    additions=int(stats.get("additions") or 0),
-                    deletions=int(stats.get("deletions") or 0),
-                    files_changed=len(files),
-                )
-                db.add(commit)
-                inserted += 1
+            pending = [sha for sha in commit_shas if sha not in existing]
+            result = await _fetch_and_store_commit_details(db, github, token, repo, pending)
 
-            await db.commit()
-            return {
-                "repository_id": repository_id,
-                "processed": len(commit_shas),
-                "inserted": inserted,
-                "additions": 0,
-                "deletions": 0,
-                "files_changed": 0,
-            }
+        # Only the SHAs that failed are retried; everything fetched so far is already committed.
+        if result["failed"] and attempt < settings.celery_max_retries:
+            analyze_commits_batch.apply_async(
+                args=(repository_id, result["failed"]),
+                kwargs={"attempt": attempt + 1},
+                countdown=2 ** (attempt + 1),
+            )
+        return {
+            "repository_id": repository_id,
+            "processed": len(commit_shas),
+            "inserted": result["inserted"],
+            "failed": len(result["failed"]),
+            "additions": result["additions"],
+            "deletions": result["deletions"],
+            "files_changed": result["files_changed"],
+        }
 
     try:
-        return asyncio.run(_run())
+        return run_async(_run())
     except Exception as exc:
         raise self.retry(exc=exc, countdown=2 ** self.request.retries)
 
 
 @celery_app.task
-def aggregate_commit_analysis(batch_results: list[dict], repository_id: str) -> dict:
+def aggregate_commit_analysis(
+    batch_results: list[dict],
+    repository_id: str,
+    cursor: dict | None = None,
+    backfill: bool = False,
+) -> dict:
     async def _run() -> dict:
-        total_processed = 0
-        total_inserted = 0
+        totals = {key: 0 for key in ("processed", "inserted", "failed", "additions", "deletions", "files_changed")}
         for item in batch_results:
-            total_processed += int(item.get("processed", 0))
-            total_inserted += int(item.get("inserted", 0))
+            for key in totals:
+                totals[key] += int(item.get(key, 0))
 
         async with AsyncSessionLocal() as db:
             repo = await db.scalar(select(Repository).where(Repository.id == uuid.UUID(repository_id)))
             if repo:
                 repo.analyzed_at = utcnow()
+                # The cursor only moves once the batches covering it have run.
+                if cursor and cursor.get("at"):
+                    _advance_cursor(repo, cursor.get("sha"), datetime.fromisoformat(cursor["at"]))
+                if backfill:
+                    repo.commits_backfilled_at = utcnow()
                 await db.commit()
-        return {
-            "repository_id": repository_id,
-            "processed": total_processed,
-            "inserted": total_inserted,
-        }
+        return {"repository_id": repository_id, **totals}
 
-    return asyncio.run(_run())
+    return run_async(_run())
 
 
 @celery_app.task(bind=True, max_retries=settings.celery_max_retries)
@@ -208,6 +445,6 @@ def extract_skills(self, user_id: str) -> dict:
             return {"user_id": user_id, "skills": len(language_usage)}
 
     try:
-        return asyncio.run(_run())
+        return run_async(_run())
     except Exception as exc:
         raise self.retry(exc=exc, countdown=2 ** self.request.retries)
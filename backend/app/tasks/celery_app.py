@@ -1,9 +1,48 @@
+import asyncio
+import time
+from collections.abc import Coroutine
+from typing import Any, TypeVar
+
 from celery import Celery
+from celery.signals import before_task_publish, worker_process_init, worker_process_shutdown
+from kombu import Queue
 
 from app.config import get_settings
+from app.core.database import engine
+from app.core.http import close_http_client
+from app.core.redis import close_redis
+from app.tasks.runtime import reset_inherited_connections, runtime
+
+T = TypeVar("T")
 
 settings = get_settings()
 
+# Named queues, each consumed by its own worker pool (see docker-compose.yml), so a deep
+# backlog in one (a commit backfill, a burst of AI calls) never delays the others.
+QUEUE_INTERACTIVE = "interactive"
+QUEUE_GITHUB_IO = "github-io"
+QUEUE_AI = "ai"
+QUEUE_MAINTENANCE = "maintenance"
+QUEUES = (QUEUE_INTERACTIVE, QUEUE_GITHUB_IO, QUEUE_AI, QUEUE_MAINTENANCE)
+
+# Redis broker priorities: each step is a separate list per queue, and lower values are
+# consumed first. User-triggered work jumps ahead of background work sharing its queue.
+PRIORITY_STEPS = [0, 3, 6, 9]
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 3
+PRIORITY_LOW = 9
+# Priority lists are stored as `<queue><sep><step>` (step 0 is the bare queue name).
+PRIORITY_QUEUE_SEP = ":"
+
+TASK_ROUTES = {
+    "app.tasks.generation.*": {"queue": QUEUE_INTERACTIVE},
+    "app.tasks.public_generation.*": {"queue": QUEUE_INTERACTIVE},
+    "app.tasks.github_sync.*": {"queue": QUEUE_GITHUB_IO},
+    "app.tasks.analysis.*": {"queue": QUEUE_GITHUB_IO},
+    "app.tasks.ai_tasks.*": {"queue": QUEUE_AI},
+    "app.tasks.maintenance.*": {"queue": QUEUE_MAINTENANCE},
+}
+
 celery_app = Celery(
     "devforge",
     broker=settings.celery_broker_url,
@@ -13,6 +52,8 @@ celery_app = Celery(
         "app.tasks.analysis",
         "app.tasks.ai_tasks",
         "app.tasks.generation",
+        "app.tasks.public_generation",
+        "app.tasks.maintenance",
     ],
 )
 
@@ -28,6 +69,59 @@ celery_app.conf.update(
     task_default_retry_delay=5,
     broker_connection_retry_on_startup=True,
     worker_prefetch_multiplier=1,
+    task_queues=[Queue(name) for name in QUEUES],
+    task_default_queue=QUEUE_INTERACTIVE,
+    task_routes=TASK_ROUTES,
+    task_default_priority=PRIORITY_NORMAL,
+    broker_transport_options={
+        "queue_order_strategy": "priority",
+        "priority_steps": PRIORITY_STEPS,
+        "sep": PRIORITY_QUEUE_SEP,
+    },
     task_acks_late=True,
     result_expires=3600,
+    beat_schedule={
+        "collect-artifact-garbage": {
+            "task": "app.tasks.maintenance.collect_artifact_garbage",
+            "schedule": settings.artifact_gc_interval_seconds,
+        },
+    },
 )
+
+
+@before_task_publish.connect
+def stamp_sent_at(headers: dict | None = None, **_: Any) -> None:
+    # Queue wait is measured from this stamp (see app.services.queue_metrics).
+    if headers is not None:
+        headers.setdefault("sent_at", time.time())
+
+
+@worker_process_init.connect
+def start_worker_runtime(**_: Any) -> None:
+    reset_inherited_connections()
+    runtime.start()
+
+
+@worker_process_shutdown.connect
+def stop_worker_runtime(**_: Any) -> None:
+    runtime.stop()
+
+
+def run_async(coro: Coroutine[Any, Any, T]) -> T:
+    """
+    Run a task coroutine on the worker process's persistent loop.
+    Outside a worker process (tests, scripts, eager calls) it falls back to a throwaway loop
+    and closes the loop-bound clients before that loop goes away.
+    """
+    if runtime.running:
+        return runtime.run(coro)
+
+    async def _wrapped() -> T:
+        try:
+            return await coro
+        finally:
+            await close_http_client()
+            await close_redis()
+            await engine.dispose()
+
+    return asyncio.run(_wrapped())
@@ -1,9 +1,13 @@
 from __future__ import annotations
 
-import asyncio
+import hashlib
+import json
 import uuid
 
+from celery import Signature, chord, group
+from redis.asyncio import Redis
 from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.config import get_settings
 from app.core.database import AsyncSessionLocal
@@ -14,16 +18,21 @@ from app.models.repository import Repository
 from app.models.skill import Skill
 from app.models.user import User
 from app.services.deployer import DeployerService
-from app.services.events import publish_generation_event
+from app.services.fragment_cache import CardFragmentCache
+from app.services.generation_lease import GenerationLease
+from app.services.progress import ProgressReporter
+from app.services.published_sites import invalidate_published_hosts, portfolio_hosts
+from app.services.renderer import get_template_registry, portfolio_context
 from app.tasks.ai_tasks import generate_project_description
 from app.tasks.analysis import analyze_repository
-from app.tasks.celery_app import celery_app
+from app.tasks.celery_app import PRIORITY_HIGH, celery_app, run_async
 from app.utils.helpers import utcnow
+from app.utils.metrics import GENERATION_JOBS_TOTAL
 
 settings = get_settings()
 
 
-def _render_basic_portfolio(
+async def _render_portfolio(
     username: str,
     subdomain: str,
     template_id: str,
@@ -31,266 +40,301 @@ def _render_basic_portfolio(
     repositories: list[Repository],
     skills: list[Skill],
 ) -> str:
-    accent = theme.get("accent", "#0f766e")
-    font = theme.get("font", "system-ui, sans-serif")
-    repo_cards = []
-    for repo in repositories:
-        desc = repo.ai_description or repo.description or "No description available."
-        repo_cards.append(
-            f"""
-            <article class="card">
-              <h3>{repo.name}</h3>
-              <p>{desc}</p>
-              <div class="meta">
-                <span>Stars: {repo.stars}</span>
-                <span>Forks: {repo.forks}</span>
-                <a href="{repo.url}" target="_blank" rel="noreferrer">Source</a>
-              </div>
-            </article>
-            """
+    context = portfolio_context(
+        username=username,
+        headline=f"AI-enhanced engineering portfolio hosted at {subdomain}.devforge.dev",
+        repositories=[
+            {
+                "id": str(repo.id),
+                "name": repo.name,
+                "description": repo.ai_description or repo.description or "No description available.",
+                "stars": repo.stars,
+                "forks": repo.forks,
+                "url": repo.url,
+            }
+            for repo in repositories
+        ],
+        skills=[{"name": skill.name, "proficiency": skill.proficiency} for skill in skills[:30]],
+        theme=theme,
+        empty_message="No repositories synced yet.",
+    )
+    stylesheet_url = await DeployerService().deploy_stylesheet(
+        get_template_registry().render_stylesheet(template_id, theme)
+    )
+    # Unchanged repositories reuse their cached card HTML; only dirty cards are rendered.
+    return await CardFragmentCache(get_redis_client()).render(template_id, context, stylesheet_url=stylesheet_url)
+
+
+async def _render_inputs(
+    db: AsyncSession,
+    portfolio: Portfolio,
+    user_id: uuid.UUID,
+) -> tuple[str, list[Repository], list[Skill]]:
+    """Everything `_render_portfolio` reads besides the portfolio row itself."""
+    repos = (
+        await db.scalars(
+            select(Repository)
+            .where(Repository.user_id == portfolio.user_id)
+            .order_by(Repository.stars.desc())
+            .limit(20)
         )
-    skill_tags = " ".join(
-        [
-            f'<span class="skill">{skill.name} ({skill.proficiency}/5)</span>'
-            for skill in skills[:30]
-        ]
+    ).all()
+    skills = (
+        await db.scalars(select(Skill).where(Skill.user_id == portfolio.user_id).order_by(Skill.proficiency.desc()))
+    ).all()
+    user = await db.scalar(select(User).where(User.id == user_id))
+    return (user.github_username if user else "Developer"), list(repos), list(skills)
+
+
+def _input_fingerprint(portfolio: Portfolio, username: str, repositories: list[Repository], skills: list[Skill]) -> str:
+    """
+    Digest of the render inputs. Repository and skill rows contribute their `updated_at`,
+    which moves on any change (including new AI descriptions), so an equal fingerprint
+    means a render would reproduce the deployed page.
+    """
+    inputs = {
+        "template_version": get_template_registry().version,
+        "template_id": portfolio.template_id,
+        "theme": portfolio.theme_config or {},
+        "subdomain": portfolio.subdomain,
+        "username": username,
+        "repositories": [[str(repo.id), repo.updated_at] for repo in repositories],
+        "skills": [[str(skill.id), skill.updated_at] for skill in skills[:30]],
+    }
+    payload = json.dumps(inputs, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+async def _current_artifact_url(
+    portfolio: Portfolio,
+    username: str,
+    repos: list[Repository],
+    skills: list[Skill],
+) -> str | None:
+    """URL of the deployed page if it was rendered from exactly these inputs and is still stored."""
+    if portfolio.input_fingerprint is None or portfolio.last_generated_at is None:
+        return None
+    if portfolio.input_fingerprint != _input_fingerprint(portfolio, username, repos, skills):
+        return None
+    deployer = DeployerService()
+    if await deployer.artifacts.resolve(portfolio.subdomain) is None:
+        return None
+    return deployer.url(f"{portfolio.subdomain}/index.html")
+
+
+async def start_generation(
+    db: AsyncSession,
+    redis: Redis,
+    portfolio: Portfolio,
+    rerun_on_attach: bool = True,
+) -> GenerationJob | None:
+    """
+    Start a generation job for `portfolio`, or return the one already holding its lease.
+    Attaching leaves a trailing re-run flag (unless `rerun_on_attach` is False), so edits
+    made while a job runs are picked up once it finishes. Returns None in the brief window
+    where another request holds the lease but has not committed its job row yet.
+    """
+    lease = GenerationLease(redis, str(portfolio.id))
+    job_id = uuid.uuid4()
+    for _ in range(2):
+        if await lease.acquire(str(job_id)):
+            break
+        holder = await lease.holder()
+        if holder is None:
+            # Released between our attempt and the lookup: contend once more.
+            continue
+        if rerun_on_attach:
+            await lease.request_rerun()
+        GENERATION_JOBS_TOTAL.labels(status="attached").inc()
+        return await db.scalar(select(GenerationJob).where(GenerationJob.id == uuid.UUID(holder)))
+    else:
+        return None
+
+    job = GenerationJob(
+        id=job_id,
+        user_id=portfolio.user_id,
+        portfolio_id=portfolio.id,
+        status="pending",
+        progress_percentage=0,
+        current_step="Queued",
+        started_at=utcnow(),
     )
-    return f"""
-<!doctype html>
-<html lang="en">
-<head>
-  <meta charset="UTF-8" />
-  <meta name="viewport" content="width=device-width, initial-scale=1.0" />
-  <title>{username} | DevForge Portfolio</title>
-  <style>
-    :root {{
-      --accent: {accent};
-      --font: {font};
-      --bg: #f6f8fb;
-      --fg: #0f172a;
-      --card: #ffffff;
-      --muted: #475569;
-    }}
-    * {{ box-sizing: border-box; }}
-    body {{
-      margin: 0;
-      font-family: var(--font);
-      color: var(--fg);
-      background:
-        radial-gradient(circle at 10% 10%, #dbeafe 0, transparent 35%),
-        radial-gradient(circle at 90% 90%, #cffafe 0, transparent 40%),
-        var(--bg);
-    }}
-    main {{ max-width: 1100px; margin: 0 auto; padding: 2rem 1rem 4rem; }}
-    .hero {{
-      display: grid;
-      gap: 0.5rem;
-      margin-bottom: 2rem;
-      padding: 1.5rem;
-      border-radius: 16px;
-      background: linear-gradient(135deg, #ffffff, #eff6ff);
-      border: 1px solid #e2e8f0;
-    }}
-    .badge {{
-      display: inline-block;
-      padding: 0.35rem 0.75rem;
-      border-radius: 999px;
-      background: color-mix(in srgb, var(--accent) 14%, white);
-      color: #0f172a;
-      font-size: 0.8rem;
-      width: fit-content;
-    }}
-    h1 {{ margin: 0; font-size: clamp(2rem, 4vw, 3rem); }}
-    p {{ color: var(--muted); }}
-    .skills {{
-      display: flex;
-      flex-wrap: wrap;
-      gap: 0.5rem;
-      margin: 1rem 0 2rem;
-    }}
-    .skill {{
-      padding: 0.35rem 0.7rem;
-      border: 1px solid #cbd5e1;
-      border-radius: 999px;
-      background: #fff;
-      font-size: 0.8rem;
-    }}
-    .grid {{
-      display: grid;
-      grid-template-columns: repeat(auto-fit, minmax(260px, 1fr));
-      gap: 1rem;
-    }}
-    .card {{
-      background: var(--card);
-      border: 1px solid #e2e8f0;
-      border-radius: 14px;
-      padding: 1rem;
-      box-shadow: 0 8px 30px rgba(15, 23, 42, 0.04);
-    }}
-    .card h3 {{ margin-top: 0; margin-bottom: 0.5rem; }}
-    .meta {{
-      display: flex;
-      flex-wrap: wrap;
-      gap: 0.75rem;
-      margin-top: 0.75rem;
-      font-size: 0.85rem;
-    }}
-    .meta a {{ color: var(--accent); text-decoration: none; }}
-    @media (max-width: 640px) {{
-      main {{ padding: 1rem 0.75rem 3rem; }}
-    }}
-  </style>
-</head>
-<body>
-  <main>
-    <section class="hero">
-      <span class="badge">DevForge • {template_id}</span>
-      <h1>{username}</h1>
-      <p>AI-enhanced engineering portfolio hosted at {subdomain}.devforge.dev</p>
-    </section>
-    <section>
-      <h2>Core Skills</h2>
-      <div class="skills">{skill_tags or "<span class='skill'>No skills extracted yet</span>"}</div>
-    </section>
-    <section>
-      <h2>Projects</h2>
-      <div class="grid">{''.join(repo_cards) or "<p>No repositories synced yet.</p>"}</div>
-    </section>
-  </main>
-</body>
-</html>
-"""
-
-
-async def _update_job(
-    job_id: uuid.UUID,
-    status: str,
-    progress: int,
-    step: str,
-    error_message: str | None = None,
-    completed: bool = False,
-) -> GenerationJob:
-    async with AsyncSessionLocal() as db:
-        job = await db.scalar(select(GenerationJob).where(GenerationJob.id == job_id))
-        if job is None:
-            raise ValueError("Generation job not found")
-        job.status = status
-        job.progress_percentage = progress
-        job.current_step = step
-        job.error_message = error_message
-        if completed:
-            job.completed_at = utcnow()
+    db.add(job)
+    try:
         await db.commit()
-        await db.refresh(job)
-        return job
+    except Exception:
+        await lease.release(str(job_id))
+        raise
+    await db.refresh(job)
+
+    generate_portfolio.delay(str(job.id))
+    GENERATION_JOBS_TOTAL.labels(status="queued").inc()
+    return job
 
 
-async def _emit(job_id: str, payload: dict) -> None:
+async def _release(job_id: str) -> None:
+    """Give up the portfolio lease and start the trailing re-run if one was requested and is needed."""
     redis = get_redis_client()
-    await publish_generation_event(redis, job_id, payload)
+    async with AsyncSessionLocal() as db:
+        portfolio_id = await db.scalar(select(GenerationJob.portfolio_id).where(GenerationJob.id == uuid.UUID(job_id)))
+        if portfolio_id is None:
+            return
+        lease = GenerationLease(redis, str(portfolio_id))
+        # A job that lost its lease leaves the re-run to the current holder.
+        if not await lease.release(job_id) or not await lease.take_rerun():
+            return
+        portfolio = await db.scalar(select(Portfolio).where(Portfolio.id == portfolio_id))
+        if portfolio is None:
+            return
+        username, repos, skills = await _render_inputs(db, portfolio, portfolio.user_id)
+        if await _current_artifact_url(portfolio, username, repos, skills) is not None:
+            # Nothing changed while the job ran.
+            return
+        await start_generation(db, redis, portfolio, rerun_on_attach=False)
+
+
+def _progress(job_id: str) -> ProgressReporter:
+    return ProgressReporter(get_redis_client(), job_id)
+
+
+async def _report(job_id: str, status: str, progress: int, step: str, **extra) -> None:
+    await _progress(job_id).report(status, progress, step, **extra)
+
+
+def _generation_key(job_id: str, name: str) -> str:
+    return f"{settings.redis_cache_prefix}generation:{job_id}:{name}"
+
+
+def _generation_pipeline(generation_job_id: str, repository_ids: list[str]) -> Signature:
+    """
+    analyze + describe every repository in parallel (one chord header, published together),
+    then render once all of them have finished. Each stage reports its own completion, on
+    success or failure, so progress follows the work actually done. A failed stage means the
+    chord body never runs; the last completion then starts the render itself.
+    """
+    stages = [
+        stage
+        for repository_id in repository_ids
+        for stage in (analyze_repository.si(repository_id), generate_project_description.si(repository_id))
+    ]
+    # A user is waiting on these: they go ahead of background work on the github-io and ai queues.
+    for stage in stages:
+        stage.set(priority=PRIORITY_HIGH)
+    for stage in stages:
+        stage.link(record_generation_progress.si(generation_job_id, len(stages)))
+        stage.link_error(record_generation_progress.si(generation_job_id, len(stages), failed=True))
+    return chord(group(stages), render_generated_portfolio.s(generation_job_id))
 
 
 @celery_app.task(bind=True, max_retries=settings.celery_max_retries)
 def generate_portfolio(self, generation_job_id: str) -> dict:
     async def _run() -> dict:
-        job_uuid = uuid.UUID(generation_job_id)
-
-        await _update_job(job_uuid, status="processing", progress=5, step="Starting generation")
-        await _emit(
-            generation_job_id,
-            {"job_id": generation_job_id, "status": "processing", "progress": 5, "step": "Starting generation"},
-        )
-
+        await _report(generation_job_id, "processing", 5, "Starting generation")
         async with AsyncSessionLocal() as db:
-            job = await db.scalar(select(GenerationJob).where(GenerationJob.id == job_uuid))
+            job = await db.scalar(select(GenerationJob).where(GenerationJob.id == uuid.UUID(generation_job_id)))
             if job is None:
                 raise ValueError("Generation job not found")
             portfolio = await db.scalar(select(Portfolio).where(Portfolio.id == job.portfolio_id))
             if portfolio is None:
                 raise ValueError("Portfolio not found")
+            username, repos, skills = await _render_inputs(db, portfolio, job.user_id)
+            url = await _current_artifact_url(portfolio, username, repos, skills)
+        if url is not None:
+            # Nothing the page depends on changed since the last render: the deployed page stands.
+            await _report(generation_job_id, "completed", 100, "Completed (up to date)", url=url)
+            await _release(generation_job_id)
+            return {"job_id": generation_job_id, "status": "completed", "url": url, "skipped": True}
 
-            repos = (
-                await db.scalars(
-                    select(Repository)
-                    .where(Repository.user_id == portfolio.user_id)
-                    .order_by(Repository.stars.desc())
-                    .limit(20)
-                )
-            ).all()
-            skills = (
-                await db.scalars(
-                    select(Skill).where(Skill.user_id == portfolio.user_id).order_by(Skill.proficiency.desc())
-                )
-            ).all()
-            user = await db.scalar(select(User).where(User.id == job.user_id))
-            username = user.github_username if user else "Developer"
-
-        await _update_job(job_uuid, status="processing", progress=20, step="Analyzing repositories")
-        await _emit(
+        await _report(
             generation_job_id,
-            {
-                "job_id": generation_job_id,
-                "status": "processing",
-                "progress": 20,
-                "step": f"Analyzing repositories (0/{len(repos)})",
-            },
+            "processing",
+            10,
+            f"Analyzing repositories and generating descriptions (0/{2 * len(repos)})",
         )
+        return {"job_id": generation_job_id, "status": "processing", "repository_ids": [str(repo.id) for repo in repos]}
 
-        for index, repo in enumerate(repos, start=1):
-            analyze_repository.delay(str(repo.id))
-            await _emit(
-                generation_job_id,
-                {
-                    "job_id": generation_job_id,
-                    "status": "processing",
-                    "progress": min(45, 20 + int(index / max(len(repos), 1) * 25)),
-                    "step": f"Analyzing repositories ({index}/{len(repos)})",
-                },
-            )
+    try:
+        outcome = run_async(_run())
+    except Exception as exc:
+        _fail(generation_job_id, exc, final=self.request.retries >= self.max_retries)
+        raise self.retry(exc=exc, countdown=2 ** self.request.retries)
 
-        await _update_job(job_uuid, status="processing", progress=50, step="Generating AI descriptions")
-        await _emit(
-            generation_job_id,
-            {"job_id": generation_job_id, "status": "processing", "progress": 50, "step": "Generating AI descriptions"},
+    if outcome["status"] == "completed":
+        return outcome
+    repository_ids = outcome.pop("repository_ids")
+    if repository_ids:
+        _generation_pipeline(generation_job_id, repository_ids).apply_async()
+        # Deadline fallback: if the parallel stages overrun, render with whatever has finished.
+        render_generated_portfolio.apply_async(
+            args=(None, generation_job_id),
+            countdown=settings.generation_deadline_seconds,
         )
+    else:
+        render_generated_portfolio.delay([], generation_job_id)
+    return {**outcome, "stages": 2 * len(repository_ids)}
 
-        for index, repo in enumerate(repos, start=1):
-            generate_project_description.delay(str(repo.id))
-            await _emit(
+
+@celery_app.task
+def record_generation_progress(generation_job_id: str, total: int, failed: bool = False) -> dict:
+    """Linked to every pipeline stage (success and error): counts completions and reports progress."""
+
+    async def _run() -> dict:
+        redis = get_redis_client()
+        counter = _generation_key(generation_job_id, "completed")
+        done = await redis.incr(counter)
+        await redis.expire(counter, settings.generation_deadline_seconds * 2)
+        failures_key = _generation_key(generation_job_id, "failed")
+        if failed:
+            await redis.incr(failures_key)
+            await redis.expire(failures_key, settings.generation_deadline_seconds * 2)
+        # Once rendering has started (possibly via the deadline), late stages must not move progress back.
+        if done <= total and not await redis.get(_generation_key(generation_job_id, "render")):
+            await _report(
                 generation_job_id,
-                {
-                    "job_id": generation_job_id,
-                    "status": "processing",
-                    "progress": min(75, 50 + int(index / max(len(repos), 1) * 25)),
-                    "step": f"Generating descriptions ({index}/{len(repos)})",
-                },
+                "processing",
+                10 + int(done / max(total, 1) * 70),
+                f"Analyzing repositories and generating descriptions ({done}/{total})",
             )
+            if done == total:
+                # The last stage may have landed inside a throttle window; persist it before rendering.
+                await _progress(generation_job_id).flush()
+        if done == total and await redis.get(failures_key):
+            # A failed stage aborts the chord body: render now with what succeeded rather than
+            # waiting for the deadline. The render claim makes this a no-op if rendering started.
+            render_generated_portfolio.delay([], generation_job_id)
+        return {"job_id": generation_job_id, "completed": done, "total": total}
+
+    return run_async(_run())
+
+
+@celery_app.task(bind=True, max_retries=settings.celery_max_retries)
+def render_generated_portfolio(self, stage_results: list | None, generation_job_id: str) -> dict:
+    """
+    Chord body of the generation pipeline, and its deadline fallback (`stage_results` None).
+    Whichever arrives first claims the render; the other is a no-op.
+    """
+    render_key = _generation_key(generation_job_id, "render")
 
-        # Reload data to capture updates committed by above task triggers.
+    async def _run() -> dict:
+        redis = get_redis_client()
+        if not await redis.set(render_key, "1", nx=True, ex=settings.generation_deadline_seconds * 2):
+            return {"job_id": generation_job_id, "status": "skipped"}
+
+        step = "Rendering portfolio" if stage_results is not None else "Rendering portfolio (deadline reached)"
+        await _report(generation_job_id, "processing", 85, step)
         async with AsyncSessionLocal() as db:
-            job = await db.scalar(select(GenerationJob).where(GenerationJob.id == job_uuid))
+            job = await db.scalar(select(GenerationJob).where(GenerationJob.id == uuid.UUID(generation_job_id)))
             if job is None:
                 raise ValueError("Generation job missing")
             portfolio = await db.scalar(select(Portfolio).where(Portfolio.id == job.portfolio_id))
             if portfolio is None:
                 raise ValueError("Portfolio missing")
-            repos = (
-                await db.scalars(
-                    select(Repository)
-                    .where(Repository.user_id == portfolio.user_id)
-                    .order_by(Repository.stars.desc())
-                    .limit(20)
-                )
-            ).all()
-            skills = (
-                await db.scalars(
-                    select(Skill).where(Skill.user_id == portfolio.user_id).order_by(Skill.proficiency.desc())
-                )
-            ).all()
-            user = await db.scalar(select(User).where(User.id == job.user_id))
-            username = user.github_username if user else "Developer"
-
-            html = _render_basic_portfolio(
+            lease = GenerationLease(redis, str(portfolio.id))
+            if not await lease.renew(generation_job_id):
+                return await _superseded(generation_job_id)
+            username, repos, skills = await _render_inputs(db, portfolio, job.user_id)
+
+            html = await _render_portfolio(
                 username=username,
                 subdomain=portfolio.subdomain,
                 template_id=portfolio.template_id,
@@ -299,46 +343,50 @@ def generate_portfolio(self, generation_job_id: str) -> dict:
                 skills=skills,
             )
 
+            # Fence: a job whose lease expired (and was taken over) must not publish over the newer
+            # one. The token is checked atomically where the page is linked, not just here.
+            fence = await lease.fence(generation_job_id)
+            if fence is None:
+                return await _superseded(generation_job_id)
             deployer = DeployerService()
-            deployed_path = deployer.deploy_static_portfolio(portfolio.subdomain, html)
+            deployed_path = await deployer.deploy_static_portfolio(portfolio.subdomain, html, fence=fence)
+            if deployed_path is None:
+                return await _superseded(generation_job_id)
 
             portfolio.generated_html = html
+            portfolio.input_fingerprint = _input_fingerprint(portfolio, username, repos, skills)
             portfolio.last_generated_at = utcnow()
             await db.commit()
+            await invalidate_published_hosts(
+                get_redis_client(), portfolio_hosts(portfolio.subdomain, portfolio.custom_domain)
+            )
 
-        await _update_job(job_uuid, status="completed", progress=100, step="Completed", completed=True)
-        await _emit(
-            generation_job_id,
-            {
-                "job_id": generation_job_id,
-                "status": "completed",
-                "progress": 100,
-                "step": "Completed",
-                "url": deployed_path,
-            },
-        )
+        await _report(generation_job_id, "completed", 100, "Completed", url=deployed_path)
+        await _release(generation_job_id)
         return {"job_id": generation_job_id, "status": "completed", "url": deployed_path}
 
     try:
-        return asyncio.run(_run())
+        return run_async(_run())
     except Exception as exc:
+        # Release the claim so the retry (or the other trigger) can render.
         try:
-            asyncio.run(
-                _update_job(
-                    uuid.UUID(generation_job_id),
-                    status="failed",
-                    progress=100,
-                    step="Failed",
-                    error_message=str(exc),
-                    completed=True,
-                )
-            )
-            asyncio.run(
-                _emit(
-                    generation_job_id,
-                    {"job_id": generation_job_id, "status": "failed", "progress": 100, "step": "Failed", "error": str(exc)},
-                )
-            )
+            run_async(get_redis_client().delete(render_key))
         except Exception:
             pass
+        _fail(generation_job_id, exc, final=self.request.retries >= self.max_retries)
         raise self.retry(exc=exc, countdown=2 ** self.request.retries)
+
+
+async def _superseded(generation_job_id: str) -> dict:
+    await _report(generation_job_id, "failed", 100, "Superseded", error="Generation lease lost to a newer job")
+    return {"job_id": generation_job_id, "status": "superseded"}
+
+
+def _fail(generation_job_id: str, exc: Exception, final: bool = False) -> None:
+    """Report the failure; once retries are exhausted (`final`) the portfolio lease is released too."""
+    try:
+        run_async(_report(generation_job_id, "failed", 100, "Failed", error=str(exc)))
+        if final:
+            run_async(_release(generation_job_id))
+    except Exception:
+        pass
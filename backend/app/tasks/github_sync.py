@@ -1,6 +1,5 @@
 from __future__ import annotations
 
-import asyncio
 import uuid
 from typing import Any
 
@@ -12,10 +11,10 @@ from app.core.database import AsyncSessionLocal
 from app.core.redis import get_redis_client
 from app.core.security import decrypt_token
 from app.models.user import User
-from app.services.github import GitHubService
+from app.services.github import get_github_service
 from app.services.rate_limiter import RateLimiter
 from app.tasks.analysis import extract_skills
-from app.tasks.celery_app import celery_app
+from app.tasks.celery_app import celery_app, run_async
 
 settings = get_settings()
 
@@ -36,7 +35,7 @@ def sync_github_profile(self, user_id: str) -> dict[str, Any]:
     async def _run() -> dict[str, Any]:
         user, token = await _load_user_and_token(user_id)
         redis = get_redis_client()
-        github_service = GitHubService(RateLimiter(redis))
+        github_service = get_github_service(RateLimiter(redis))
         async with AsyncSessionLocal() as db:
             # Reload user in this session
             db_user = await db.scalar(select(User).where(User.id == user.id))
@@ -45,7 +44,7 @@ def sync_github_profile(self, user_id: str) -> dict[str, Any]:
             return {"user_id": user_id, "profile_synced": True, "profile_id": str(profile.id)}
 
     try:
-        return asyncio.run(_run())
+        return run_async(_run())
     except Exception as exc:
         raise self.retry(exc=exc, countdown=2 ** self.request.retries)
 
@@ -55,15 +54,33 @@ def sync_repositories(self, user_id: str) -> dict[str, Any]:
     async def _run() -> dict[str, Any]:
         user, token = await _load_user_and_token(user_id)
         redis = get_redis_client()
-        github_service = GitHubService(RateLimiter(redis))
+        github_service = get_github_service(RateLimiter(redis))
         async with AsyncSessionLocal() as db:
             db_user = await db.scalar(select(User).where(User.id == user.id))
-            count = await github_service.sync_repositories(db, db_user, token)
+            stats = await github_service.sync_repositories(db, db_user, token)
             await db.commit()
-            return {"user_id": user_id, "repositories_synced": count}
+            return {"user_id": user_id, "repositories_synced": sum(stats.values()), **stats}
 
     try:
-        return asyncio.run(_run())
+        return run_async(_run())
+    except Exception as exc:
+        raise self.retry(exc=exc, countdown=2 ** self.request.retries)
+
+
+@celery_app.task(bind=True, max_retries=settings.celery_max_retries)
+def sync_repository_languages(self, user_id: str) -> dict[str, Any]:
+    async def _run() -> dict[str, Any]:
+        user, token = await _load_user_and_token(user_id)
+        redis = get_redis_client()
+        github_service = get_github_service(RateLimiter(redis))
+        async with AsyncSessionLocal() as db:
+            db_user = await db.scalar(select(User).where(User.id == user.id))
+            stats = await github_service.sync_repository_languages(db, db_user, token)
+            await db.commit()
+            return {"user_id": user_id, **stats}
+
+    try:
+        return run_async(_run())
     except Exception as exc:
         raise self.retry(exc=exc, countdown=2 ** self.request.retries)
 
@@ -74,6 +91,7 @@ def sync_user_github(self, user_id: str) -> dict[str, Any]:
         workflow = chain(
             sync_github_profile.s(user_id),
             sync_repositories.si(user_id),
+            sync_repository_languages.si(user_id),
             extract_skills.si(user_id),
         )
         async_result = workflow.apply_async()
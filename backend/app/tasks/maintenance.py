@@ -0,0 +1,24 @@
+from __future__ import annotations
+
+from app.config import get_settings
+from app.core.redis import get_redis_client
+from app.services.artifacts import ArtifactStore
+from app.tasks.celery_app import celery_app, run_async
+
+settings = get_settings()
+
+
+@celery_app.task(bind=True, max_retries=settings.celery_max_retries)
+def collect_artifact_garbage(self) -> dict:
+    """Drop expired slugs and delete page objects nothing references (scheduled by beat)."""
+
+    async def _run() -> dict:
+        store = ArtifactStore(get_redis_client())
+        result = await store.collect_garbage()
+        await store.refresh_metrics()
+        return result
+
+    try:
+        return run_async(_run())
+    except Exception as exc:
+        raise self.retry(exc=exc, countdown=2 ** self.request.retries)
@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+from app.config import get_settings
+from app.core.redis import get_redis_client
+from app.services.public_generation import (
+    PublicGenerationError,
+    PublicGenerationJobs,
+    generate_public_portfolio,
+    generation_flight_key,
+    public_generation_flights,
+)
+from app.tasks.celery_app import celery_app, run_async
+
+settings = get_settings()
+
+
+@celery_app.task(bind=True, max_retries=settings.celery_max_retries)
+def generate_public_portfolio_job(
+    self,
+    job_id: str,
+    username: str,
+    template_id: str,
+    refresh: bool = False,
+) -> dict:
+    async def _run() -> dict:
+        redis = get_redis_client()
+        jobs = PublicGenerationJobs(redis)
+        await jobs.update(job_id, "processing", 5, "Starting generation")
+
+        async def _progress(percentage: int, step: str) -> None:
+            await jobs.update(job_id, "processing", percentage, step)
+
+        try:
+            result = await public_generation_flights(redis).do(
+                generation_flight_key(username, template_id, refresh),
+                lambda: generate_public_portfolio(redis, username, template_id, refresh=refresh, progress=_progress),
+            )
+        except PublicGenerationError as exc:
+            # Upstream answered definitively (unknown user, GitHub unavailable); retrying won't help.
+            await jobs.update(job_id, "failed", 100, "Failed", error=exc.detail, status_code=exc.status_code)
+            return {"job_id": job_id, "status": "failed", "error": exc.detail}
+
+        await jobs.update(job_id, "completed", 100, "Completed", result=result)
+        return {"job_id": job_id, "status": "completed", **result}
+
+    try:
+        return run_async(_run())
+    except Exception as exc:
+        if self.request.retries >= self.max_retries:
+            try:
+                run_async(PublicGenerationJobs(get_redis_client()).update(job_id, "failed", 100, "Failed", error=str(exc)))
+            except Exception:
+                pass
+        raise self.retry(exc=exc, countdown=2 ** self.request.retries)
@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+from collections.abc import Coroutine
+from typing import Any, TypeVar
+
+from app.core.database import engine
+from app.core.http import close_http_client, reset_http_clients
+from app.core.redis import close_redis, reset_redis_client
+from app.utils.logging import get_logger
+
+T = TypeVar("T")
+
+logger = get_logger("app.tasks.runtime")
+
+
+class WorkerRuntime:
+    """
+    One long-lived event loop per worker process, running on a daemon thread.
+    Tasks stay synchronous for Celery and submit their coroutines here, so the DB engine
+    pool, the Redis client and the pooled HTTP client are created once on this loop and
+    reused by every task, instead of being rebuilt (or broken) by a fresh loop per task.
+    """
+
+    def __init__(self):
+        self.loop: asyncio.AbstractEventLoop | None = None
+        self._thread: threading.Thread | None = None
+
+    @property
+    def running(self) -> bool:
+        return self.loop is not None and self.loop.is_running()
+
+    def start(self) -> None:
+        if self.running:
+            return
+        loop = asyncio.new_event_loop()
+        ready = threading.Event()
+
+        def _serve() -> None:
+            asyncio.set_event_loop(loop)
+            loop.call_soon(ready.set)
+            loop.run_forever()
+
+        self.loop = loop
+        self._thread = threading.Thread(target=_serve, name="worker-async-runtime", daemon=True)
+        self._thread.start()
+        ready.wait()
+        logger.info("worker_runtime_started")
+
+    def run(self, coro: Coroutine[Any, Any, T]) -> T:
+        if threading.current_thread() is self._thread:
+            coro.close()
+            raise RuntimeError("run() called from the runtime loop itself; await the coroutine instead")
+        future = asyncio.run_coroutine_threadsafe(coro, self.loop)
+        try:
+            return future.result()
+        except BaseException:
+            # Time limits and worker shutdown interrupt the waiting thread; stop the coroutine too.
+            future.cancel()
+            raise
+
+    def stop(self) -> None:
+        if not self.running:
+            return
+
+        async def _close() -> None:
+            await close_http_client()
+            await close_redis()
+            await engine.dispose()
+
+        try:
+            self.run(_close())
+        finally:
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self._thread.join(timeout=5)
+            self.loop.close()
+            self.loop, self._thread = None, None
+            logger.info("worker_runtime_stopped")
+
+
+def reset_inherited_connections() -> None:
+    """
+    Drop connection state copied from the parent on fork; sockets must not be shared
+    between processes. The pools are rebuilt lazily on this process's runtime loop.
+    """
+    engine.sync_engine.dispose(close=False)
+    reset_redis_client()
+    reset_http_clients()
+
+
+runtime = WorkerRuntime()
@@ -1,6 +1,8 @@
-from prometheus_client import CONTENT_TYPE_LATEST, Counter, Histogram, generate_latest
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, generate_latest
 from starlette.responses import Response
 
+from app.core.http import http_pool_stats
+
 REQUEST_COUNT = Counter(
     "devforge_http_requests_total",
     "Total HTTP requests",
@@ -16,6 +18,70 @@ GENERATION_JOBS_TOTAL = Counter(
     "Total generation jobs created",
     ["status"],
 )
+GITHUB_CACHE_REQUESTS = Counter(
+    "devforge_github_cache_requests_total",
+    "GitHub conditional cache lookups (hit=served fresh, revalidated=304 replay, miss=full fetch)",
+    ["result"],
+)
+CARD_FRAGMENTS = Counter(
+    "devforge_card_fragments_total",
+    "Repository card fragments served from cache (hit) or rendered (rendered)",
+    ["result"],
+)
+SINGLEFLIGHT_CALLS = Counter(
+    "devforge_singleflight_calls_total",
+    "Coalesced calls by role (leader computed; local/remote followers shared its result)",
+    ["namespace", "role"],
+)
+PUBLISHED_PAGE_REQUESTS = Counter(
+    "devforge_published_page_requests_total",
+    "Host-served portfolio lookups by the source that answered (memory, index, database, legacy, missing)",
+    ["source"],
+)
+PUBLISHED_HOT_CACHE_BYTES = Gauge(
+    "devforge_published_hot_cache_bytes",
+    "Bytes held by the in-process published page LRU",
+)
+ARTIFACT_WRITES = Counter(
+    "devforge_artifact_writes_total",
+    "Page deploys by outcome (stored=new object, deduplicated=identical object already stored)",
+    ["result"],
+)
+ARTIFACT_GC_DELETED = Counter(
+    "devforge_artifact_gc_deleted_total",
+    "Artifact garbage collection removals (expired slugs, unreferenced objects)",
+    ["kind"],
+)
+ARTIFACT_OBJECTS = Gauge("devforge_artifact_objects", "Stored content-addressed page objects")
+ARTIFACT_SLUGS = Gauge("devforge_artifact_slugs", "Slugs pointing at page objects")
+ARTIFACT_BYTES = Gauge("devforge_artifact_bytes", "Bytes of stored page objects (uncompressed originals)")
+GENERATION_PROGRESS_EVENTS = Counter(
+    "devforge_generation_progress_events_total",
+    "Generation progress events by outcome (written=persisted to Postgres, coalesced=published only)",
+    ["result"],
+)
+CELERY_QUEUE_DEPTH = Gauge(
+    "devforge_celery_queue_depth",
+    "Messages waiting in each Celery queue (all priority levels)",
+    ["queue"],
+)
+CELERY_QUEUE_WAIT_SECONDS = Gauge(
+    "devforge_celery_queue_wait_seconds",
+    "Age of the oldest message waiting in each Celery queue",
+    ["queue"],
+)
+HTTP_POOL_CONNECTIONS = Gauge(
+    "devforge_http_pool_connections",
+    "Outbound HTTP pool connections by state",
+    ["state"],
+)
+for _state in ("active", "idle"):
+    HTTP_POOL_CONNECTIONS.labels(state=_state).set_function(lambda state=_state: http_pool_stats()[state])
+HTTP_POOL_CLIENTS = Gauge(
+    "devforge_http_pool_clients",
+    "Open pooled outbound HTTP clients (one per event loop)",
+)
+HTTP_POOL_CLIENTS.set_function(lambda: http_pool_stats()["clients"])
 
 
 def metrics_response() -> Response:
@@ -0,0 +1,87 @@
+"""
+Render-time benchmark for the portfolio template registry.
+
+    cd backend && python scripts/benchmark_templates.py [--repeat 20]
+
+Reports the one-off compile cost and the mean/p95 render time per template
+at 20, 200 and 2,000 repository cards.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+# Settings require these at import time; the benchmark never connects to them.
+for _name, _value in {
+    "DATABASE_URL": "postgresql+asyncpg://bench@localhost/bench",
+    "SYNC_DATABASE_URL": "postgresql+psycopg://bench@localhost/bench",
+    "REDIS_URL": "redis://localhost:6379/0",
+    "CELERY_BROKER_URL": "redis://localhost:6379/0",
+    "CELERY_RESULT_BACKEND": "redis://localhost:6379/1",
+    "SECRET_KEY": "benchmark",
+}.items():
+    os.environ.setdefault(_name, _value)
+
+from app.services.renderer import TemplateRegistry, portfolio_context  # noqa: E402
+
+CARD_COUNTS = (20, 200, 2000)
+
+
+def _context(cards: int) -> dict:
+    return portfolio_context(
+        username="octocat",
+        headline="@octocat - San Francisco",
+        bio="Benchmark <profile> & friends",
+        stats=[("Followers", 4200), ("Public Repos", cards)],
+        repositories=[
+            {
+                "name": f"repo-{index}",
+                "description": f"Repository {index} does <useful> things & more.",
+                "stars": index * 3,
+                "forks": index,
+                "url": f"https://github.com/octocat/repo-{index}",
+            }
+            for index in range(cards)
+        ],
+        skills=[{"name": f"Skill {index}", "proficiency": index % 5 + 1} for index in range(24)],
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        started = time.perf_counter()
+        registry = TemplateRegistry(bytecode_cache_dir=cache_dir)
+        print(f"compile (cold, {len(registry.list())} templates): {(time.perf_counter() - started) * 1000:.1f} ms")
+        started = time.perf_counter()
+        TemplateRegistry(bytecode_cache_dir=cache_dir)
+        print(f"compile (bytecode cache hit):  {(time.perf_counter() - started) * 1000:.1f} ms\n")
+
+        print(f"{'template':<10}{'cards':>7}{'mean ms':>10}{'p95 ms':>10}{'KiB':>9}")
+        for template in registry.list():
+            for cards in CARD_COUNTS:
+                context = _context(cards)
+                timings = []
+                for _ in range(args.repeat):
+                    started = time.perf_counter()
+                    html = registry.render(template["id"], context)
+                    timings.append((time.perf_counter() - started) * 1000)
+                p95 = statistics.quantiles(timings, n=20)[-1] if len(timings) > 1 else timings[0]
+                print(
+                    f"{template['id']:<10}{cards:>7}{statistics.mean(timings):>10.2f}{p95:>10.2f}"
+                    f"{len(html.encode()) / 1024:>9.1f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+One-off migration: index pages deployed before content addressing.
+
+    cd backend && python scripts/index_legacy_pages.py [--dry-run]
+
+Pages used to be written to STORAGE_LOCAL_DIR/<slug>/index.html. They are still served
+from there (PublishedSiteResolver falls back to that path), but every request costs a
+storage read. This stores each one as a content-addressed object and links its slug,
+so it is served like any other page. Slugs that are already indexed are left alone.
+Legacy files are not deleted. Indexed slugs get no expiry (legacy pages never expired).
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.config import get_settings  # noqa: E402
+from app.core.redis import close_redis, get_redis_client  # noqa: E402
+from app.services.artifacts import OBJECTS_DIR  # noqa: E402
+from app.services.deployer import ASSETS_DIR, DeployerService  # noqa: E402
+from app.services.published_sites import LEGACY_SLUG  # noqa: E402
+from app.services.storage import LocalStorage  # noqa: E402
+
+
+async def index_legacy_pages(root: Path, dry_run: bool) -> int:
+    deployer = DeployerService(storage=LocalStorage(str(root)), redis_client=get_redis_client())
+    indexed = 0
+    for page in sorted(root.glob("*/index.html")):
+        slug = page.parent.name
+        if slug in (OBJECTS_DIR, ASSETS_DIR) or not LEGACY_SLUG.fullmatch(slug):
+            continue
+        if await deployer.artifacts.resolve(slug) is not None:
+            continue
+        print(f"{'would index' if dry_run else 'indexing'} {slug}")
+        if not dry_run:
+            await deployer.deploy_static_portfolio(slug, page.read_text(encoding="utf-8"))
+        indexed += 1
+    return indexed
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+    try:
+        indexed = await index_legacy_pages(Path(get_settings().storage_local_dir), args.dry_run)
+    finally:
+        await close_redis()
+    print(f"{indexed} legacy page(s) {'to index' if args.dry_run else 'indexed'}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
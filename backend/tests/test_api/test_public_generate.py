@@ -0,0 +1,114 @@
+import json
+from types import SimpleNamespace
+
+from fastapi.testclient import TestClient
+
+from app.api import public
+from app.core import hosting
+from app.main import app
+from app.services import public_generation
+from app.services.artifacts import ArtifactStore
+from app.services.deployer import DeployerService
+from app.services.github import GitHubService
+from app.services.published_sites import PublishedSiteResolver
+from app.services.storage import LocalStorage
+from app.tasks import public_generation as public_tasks
+
+
+def test_public_generation_results_are_content_keyed(monkeypatch, fake_redis, tmp_path):
+    calls = {"github": 0}
+    repositories = [{"id": 1, "name": "hello", "language": "Python", "stargazers_count": 2, "fork": False}]
+
+    async def fake_user(self, username):
+        calls["github"] += 1
+        return {"login": username, "bio": "Builds things"}
+
+    async def fake_repositories(self, username, max_repos=100):
+        return [dict(repo) for repo in repositories]
+
+    monkeypatch.setattr(public, "get_redis_client", lambda: fake_redis)
+    monkeypatch.setattr(public, "_generation_flights", None)
+    monkeypatch.setattr(hosting, "_resolver", PublishedSiteResolver(fake_redis, storage=LocalStorage(str(tmp_path))))
+    monkeypatch.setattr(public_generation, "DeployerService", lambda **kwargs: DeployerService(str(tmp_path), **kwargs))
+    monkeypatch.setattr(GitHubService, "get_public_user", fake_user)
+    monkeypatch.setattr(GitHubService, "get_public_repositories", fake_repositories)
+
+    with TestClient(app) as client:
+        body = {"github_url": "octocat", "template_id": "minimal"}
+        first = client.post("/api/public/generate", json=body).json()
+        second = client.post("/api/public/generate", json=body).json()
+        assert first["cached"] is False
+        assert second["cached"] is True
+        assert second["portfolio_path"] == first["portfolio_path"]
+        assert calls["github"] == 1
+
+        # Refresh revalidates upstream; unchanged data keeps the same slug.
+        refreshed = client.post("/api/public/generate", json={**body, "refresh": True}).json()
+        assert refreshed["cached"] is False
+        assert refreshed["portfolio_path"] == first["portfolio_path"]
+        assert calls["github"] == 2
+
+        repositories[0]["stargazers_count"] = 3
+        changed = client.post("/api/public/generate", json={**body, "refresh": True}).json()
+        assert changed["portfolio_path"] != first["portfolio_path"]
+
+        # Once artifact GC collects a slug, its cached result no longer answers.
+        slugs = fake_redis.hashes[ArtifactStore._key("slugs")]
+        slugs.pop(changed["portfolio_path"].split("/")[-2])
+        regenerated = client.post("/api/public/generate", json=body).json()
+        assert regenerated["cached"] is False
+        assert regenerated["portfolio_path"] == changed["portfolio_path"]
+        assert client.get(regenerated["portfolio_path"]).status_code == 200
+
+        page = client.get(first["portfolio_path"])
+        assert page.status_code == 200
+        # Both generations link the same shared stylesheet instead of inlining it.
+        assert '<link rel="stylesheet" href="/generated/_assets/' in page.text and "<style>" not in page.text
+
+    # Pages live in the sharded, content-addressed object store; one object per distinct page.
+    assert len(list((tmp_path / "objects").glob("*/*/*.html"))) == 2
+    assert len(list((tmp_path / "_assets").glob("*.css"))) == 1
+
+
+def test_async_mode_returns_job_and_streams_progress(monkeypatch, fake_redis, tmp_path):
+    queued = []
+
+    async def fake_user(self, username):
+        return {"login": username}
+
+    async def fake_repositories(self, username, max_repos=100):
+        return [{"id": 1, "name": "hello", "language": "Go", "fork": False}]
+
+    monkeypatch.setattr(public, "get_redis_client", lambda: fake_redis)
+    monkeypatch.setattr(public_tasks, "get_redis_client", lambda: fake_redis)
+    monkeypatch.setattr(public_generation, "DeployerService", lambda **kwargs: DeployerService(str(tmp_path), **kwargs))
+    monkeypatch.setattr(GitHubService, "get_public_user", fake_user)
+    monkeypatch.setattr(GitHubService, "get_public_repositories", fake_repositories)
+    monkeypatch.setattr(public_tasks.generate_public_portfolio_job, "delay", lambda *args: queued.append(args))
+
+    with TestClient(app) as client:
+        accepted = client.post("/api/public/generate", json={"github_url": "octocat", "mode": "async"})
+        assert accepted.status_code == 202
+        job_id = accepted.json()["job_id"]
+        assert accepted.json()["events_url"] == f"/ws/generation/{job_id}"
+        assert client.get(f"/api/public/jobs/{job_id}").json()["status"] == "pending"
+
+        # Run the queued worker task inline.
+        public_tasks.generate_public_portfolio_job.run(*queued[0])
+
+        status = client.get(f"/api/public/jobs/{job_id}").json()
+        assert status["status"] == "completed"
+        assert status["result"]["portfolio_url"].endswith(status["result"]["portfolio_path"])
+
+    progress = [json.loads(message)["progress"] for channel, message in fake_redis.published]
+    assert progress == sorted(progress) and progress[-1] == 100
+    assert {channel for channel, _ in fake_redis.published} == {f"generation:{job_id}"}
+
+
+def test_portfolio_url_keeps_absolute_storage_urls():
+    request = SimpleNamespace(base_url="http://testserver/")
+    result = {"username": "octo", "projects_analyzed": 1, "summary": ""}
+    relative = public._to_response({**result, "portfolio_path": "/generated/octo-1/index.html"}, request)
+    absolute = public._to_response({**result, "portfolio_path": "https://cdn.example.com/octo-1/index.html"}, request)
+    assert relative.portfolio_url == "http://testserver/generated/octo-1/index.html"
+    assert absolute.portfolio_url == "https://cdn.example.com/octo-1/index.html"
@@ -0,0 +1,40 @@
+import time
+
+from app.services.artifacts import object_key
+from app.services.deployer import DeployerService
+
+
+async def test_identical_pages_share_one_sharded_object(tmp_path, fake_redis):
+    deployer = DeployerService(str(tmp_path), redis_client=fake_redis)
+
+    await deployer.deploy_static_portfolio("alice-1234abcd", "<html>same</html>", ttl_seconds=60)
+    await deployer.deploy_static_portfolio("alice", "<html>same</html>")
+
+    digest = await deployer.artifacts.resolve("alice")
+    assert digest == await deployer.artifacts.resolve("alice-1234abcd")
+    assert object_key(digest) == f"objects/{digest[:2]}/{digest[2:4]}/{digest}.html"
+    assert [path.name for path in (tmp_path / "objects").rglob("*.html")] == [f"{digest}.html"]
+    assert await deployer.artifacts.stats() == {"objects": 1, "slugs": 2, "bytes": len("<html>same</html>")}
+
+
+async def test_gc_drops_expired_slugs_and_unreferenced_objects(tmp_path, fake_redis, monkeypatch):
+    monkeypatch.setattr("app.services.artifacts.settings.artifact_gc_grace_seconds", 60)
+    deployer = DeployerService(str(tmp_path), redis_client=fake_redis)
+    store = deployer.artifacts
+
+    await deployer.deploy_static_portfolio("public-slug", "<html>public</html>", ttl_seconds=30)
+    await deployer.deploy_static_portfolio("octocat", "<html>v1</html>")
+    await deployer.deploy_static_portfolio("octocat", "<html>v2</html>")
+    public, current = await store.resolve("public-slug"), await store.resolve("octocat")
+
+    # Within the grace period nothing is collected, even unreferenced v1.
+    assert await store.collect_garbage(now=time.time() + 10) == {"expired_slugs": 0, "deleted_objects": 0, "freed_bytes": 0}
+
+    result = await store.collect_garbage(now=time.time() + 120)
+
+    assert result == {"expired_slugs": 1, "deleted_objects": 2, "freed_bytes": len("<html>public</html><html>v1</html>")}
+    assert await store.resolve("public-slug") is None and await store.resolve("octocat") == current
+    assert not (tmp_path / object_key(public)).exists()
+    assert not (tmp_path / object_key(public, ".gz")).exists()
+    assert (tmp_path / object_key(current)).read_text() == "<html>v2</html>"
+    assert await store.stats() == {"objects": 1, "slugs": 1, "bytes": len("<html>v2</html>")}
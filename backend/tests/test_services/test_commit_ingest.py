@@ -0,0 +1,130 @@
+import asyncio
+import uuid
+from datetime import UTC, datetime
+from types import SimpleNamespace
+
+import pytest
+
+from app.tasks import analysis
+
+
+class FakeGitHub:
+    def __init__(self, failing: set[str]):
+        self.failing = failing
+        self.in_flight = 0
+        self.peak = 0
+
+    async def fetch_commit_detail(self, token, owner, repo, sha):
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        await asyncio.sleep(0)
+        self.in_flight -= 1
+        if sha in self.failing:
+            raise RuntimeError("boom")
+        return {
+            "commit": {"message": f"msg {sha}", "author": {"name": "Octo", "date": "2026-01-02T03:04:05Z"}},
+            "stats": {"additions": 3, "deletions": 1},
+            "files": [{"filename": "a.py"}, {"filename": "b.py"}],
+        }
+
+
+@pytest.mark.asyncio
+async def test_details_are_fetched_concurrently_and_inserted_in_batches(monkeypatch):
+    batches: list[list[dict]] = []
+
+    async def fake_insert(db, rows):
+        batches.append(list(rows))
+        return len(rows)
+
+    monkeypatch.setattr(analysis, "_insert_commits", fake_insert)
+    monkeypatch.setattr(analysis.settings, "github_commit_detail_concurrency", 3)
+    monkeypatch.setattr(analysis.settings, "commit_insert_batch_size", 2)
+
+    github = FakeGitHub(failing={"sha-2"})
+    repo = SimpleNamespace(id=uuid.uuid4(), full_name="octocat/hello")
+    shas = [f"sha-{index}" for index in range(5)]
+
+    result = await analysis._fetch_and_store_commit_details(None, github, "token", repo, shas)
+
+    assert 1 < github.peak <= 3
+    assert result["failed"] == ["sha-2"]
+    assert result["inserted"] == 4
+    assert [len(batch) for batch in batches] == [2, 2, 0]
+    assert (result["additions"], result["deletions"], result["files_changed"]) == (12, 4, 8)
+    assert {row["sha"] for batch in batches for row in batch} == {"sha-0", "sha-1", "sha-3", "sha-4"}
+
+
+def test_listing_is_trimmed_at_cursor_and_cursor_only_moves_forward():
+    items = [
+        {"sha": "c3", "commit": {"committer": {"date": "2026-03-03T00:00:00Z"}}},
+        {"sha": "c2", "commit": {"committer": {"date": "2026-03-02T00:00:00Z"}}},
+        {"sha": "c1", "commit": {"committer": {"date": "2026-03-01T00:00:00Z"}}},
+    ]
+    assert [item["sha"] for item in analysis._commits_after_cursor(items, "c2")] == ["c3"]
+    assert len(analysis._commits_after_cursor(items, None)) == 3
+
+    repo = SimpleNamespace(commit_cursor_sha=None, commit_cursor_at=None)
+    analysis._advance_cursor(repo, "c3", analysis._commit_timestamp(items[0]))
+    analysis._advance_cursor(repo, "c1", analysis._commit_timestamp(items[2]))
+    assert repo.commit_cursor_sha == "c3"
+
+
+class FakeHistory:
+    """GraphQL history of `shas` (newest first) in pages of two; page cursors are offsets."""
+
+    def __init__(self, shas: list[str]):
+        self.rows = [
+            {"sha": sha, "committed_at": datetime(2026, 3, 30 - index, tzinfo=UTC)} for index, sha in enumerate(shas)
+        ]
+        self.calls: list[str | None] = []
+
+    async def fetch_commit_history(self, token, owner, repo, since=None, after=None):
+        self.calls.append(after)
+        start = int(after or 0)
+        page = [row for row in self.rows[start : start + 2] if since is None or row["committed_at"] >= since]
+        more = start + 2 < len(self.rows) and len(page) == 2
+        return page, str(start + 2) if more else None
+
+
+class FakeSession:
+    def __init__(self):
+        self.commits = 0
+
+    async def commit(self):
+        self.commits += 1
+
+
+@pytest.mark.asyncio
+async def test_incremental_walk_cut_short_resumes_before_advancing_cursor(monkeypatch):
+    stored: set[str] = {"c0"}
+
+    async def fake_unknown(db, shas):
+        return [sha for sha in shas if sha not in stored]
+
+    async def fake_insert(db, rows):
+        stored.update(row["sha"] for row in rows)
+        return len(rows)
+
+    monkeypatch.setattr(analysis, "_unknown_shas", fake_unknown)
+    monkeypatch.setattr(analysis, "_insert_commits", fake_insert)
+    github = FakeHistory(["c6", "c5", "c4", "c3", "c2", "c1", "c0"])
+    old_cursor = github.rows[-1]["committed_at"]
+    repo = SimpleNamespace(
+        id=uuid.uuid4(), full_name="octocat/hello", commit_cursor_sha="c0", commit_cursor_at=old_cursor, commit_resume=None
+    )
+
+    inserted, _ = await analysis._ingest_commit_history(
+        FakeSession(), github, "token", repo, since=old_cursor, limit=4, resumable=True
+    )
+    # Stopped short of the old cursor: it stays put and the next page is recorded instead.
+    assert inserted == 4
+    assert (repo.commit_cursor_sha, repo.commit_resume["after"], repo.commit_resume["head"]["sha"]) == ("c0", "4", "c6")
+
+    inserted, _ = await analysis._ingest_commit_history(
+        FakeSession(), github, "token", repo, since=old_cursor, limit=4, resumable=True
+    )
+    assert inserted == 2
+    assert github.calls == [None, "2", "4", "6"]
+    assert repo.commit_resume is None
+    assert repo.commit_cursor_sha == "c6"
+    assert stored == {f"c{index}" for index in range(7)}
@@ -0,0 +1,157 @@
+import asyncio
+import io
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.core.static import IMMUTABLE_CACHE_CONTROL, PrecompressedStaticFiles, accepted_encodings
+from app.services.artifacts import object_key
+from app.services.deployer import DeployerService
+from app.services.storage import LocalStorage, S3Storage, StorageError
+
+
+async def test_stylesheets_are_content_addressed_and_shared(tmp_path):
+    deployer = DeployerService(str(tmp_path))
+    first = await deployer.deploy_stylesheet("body { color: red; }")
+    again = await deployer.deploy_stylesheet("body { color: red; }")
+    other = await deployer.deploy_stylesheet("body { color: blue; }")
+
+    assert first == again != other
+    assert first.startswith("/generated/_assets/") and first.endswith(".css")
+    assert sorted(path.name for path in (tmp_path / "_assets").glob("*.css")) == sorted(
+        url.rsplit("/", 1)[1] for url in (first, other)
+    )
+
+
+async def test_preview_inlines_shared_stylesheet(tmp_path):
+    deployer = DeployerService(str(tmp_path))
+    url = await deployer.deploy_stylesheet(".card { margin: 0; }")
+    html = f'<head><link rel="stylesheet" href="{url}" /></head>'
+
+    inlined = await deployer.inline_stylesheets(html)
+
+    assert "<link" not in inlined
+    assert ".card { margin: 0; }" in inlined
+
+
+async def test_assets_are_served_with_immutable_cache_headers(tmp_path):
+    deployer = DeployerService(str(tmp_path))
+    url = await deployer.deploy_stylesheet("h1 { font-weight: 700; }")
+    app = FastAPI()
+    app.mount(
+        "/generated/_assets",
+        PrecompressedStaticFiles(directory=str(tmp_path / "_assets"), cache_control=IMMUTABLE_CACHE_CONTROL),
+    )
+
+    response = TestClient(app).get(url)
+
+    assert response.status_code == 200
+    assert response.headers["cache-control"] == IMMUTABLE_CACHE_CONTROL
+    assert "font-weight: 700" in response.text
+
+
+async def test_pages_are_precompressed_and_negotiated(tmp_path, fake_redis):
+    deployer = DeployerService(str(tmp_path), redis_client=fake_redis)
+    html = "<html><body>" + "<p>portfolio</p>" * 200 + "</body></html>"
+    assert await deployer.deploy_static_portfolio("octocat", html) == "/generated/octocat/index.html"
+    key = object_key(await deployer.artifacts.resolve("octocat"))
+    path = f"/generated/{key}"
+    assert {item.name for item in (tmp_path / key).parent.iterdir()} == {
+        name + suffix for name in [key.rsplit("/", 1)[1]] for suffix in ("", ".gz", ".br")
+    }
+
+    app = FastAPI()
+    app.mount("/generated", PrecompressedStaticFiles(directory=str(tmp_path)))
+    client = TestClient(app)
+
+    br = client.get(path, headers={"Accept-Encoding": "gzip, br"})
+    gz = client.get(path, headers={"Accept-Encoding": "gzip;q=1, br;q=0"})
+    identity = client.get(path, headers={"Accept-Encoding": "identity"})
+
+    assert br.headers["content-encoding"] == "br"
+    assert gz.headers["content-encoding"] == "gzip"
+    assert "content-encoding" not in identity.headers
+    assert br.text == gz.text == identity.text == html
+    assert br.headers["content-type"].startswith("text/html")
+    assert int(br.headers["content-length"]) < len(html)
+    assert br.headers["vary"] == "Accept-Encoding"
+    assert len({br.headers["etag"], gz.headers["etag"], identity.headers["etag"]}) == 3
+
+    cached = client.get(path, headers={"Accept-Encoding": "br", "If-None-Match": br.headers["etag"]})
+    assert cached.status_code == 304
+    assert cached.headers["etag"] == br.headers["etag"]
+
+
+def test_accept_encoding_parsing():
+    assert accepted_encodings("gzip, deflate, br;q=0.5") == {"gzip", "deflate", "br"}
+    assert accepted_encodings("br;q=0, gzip;q=0.0") == set()
+
+
+class FakeS3Client:
+    """In-memory stand-in for the boto3 S3 client calls the storage backend makes."""
+
+    class NoSuchKey(Exception):
+        response = {"Error": {"Code": "NoSuchKey"}}
+
+    def __init__(self):
+        self.objects = {}
+
+    def put_object(self, Bucket, Key, Body, **extra):
+        self.objects[(Bucket, Key)] = (Body, extra)
+
+    def get_object(self, Bucket, Key):
+        if (Bucket, Key) not in self.objects:
+            raise self.NoSuchKey()
+        return {"Body": io.BytesIO(self.objects[(Bucket, Key)][0])}
+
+    def head_object(self, Bucket, Key):
+        self.get_object(Bucket, Key)
+        return {}
+
+    def delete_object(self, Bucket, Key):
+        self.objects.pop((Bucket, Key), None)
+
+
+async def test_s3_backend_stores_pages_and_variants(fake_redis):
+    client = FakeS3Client()
+    deployer = DeployerService(storage=S3Storage("portfolios", prefix="sites", client=client), redis_client=fake_redis)
+
+    path = await deployer.deploy_static_portfolio("octocat", "<html>hi</html>")
+    url = await deployer.deploy_stylesheet("p { margin: 0; }")
+    inlined = await deployer.inline_stylesheets(f'<link rel="stylesheet" href="{url}" />')
+
+    key = f"sites/{object_key(await deployer.artifacts.resolve('octocat'))}"
+    assert path == "/generated/octocat/index.html"
+    assert client.objects[("portfolios", key)][0] == b"<html>hi</html>"
+    assert client.objects[("portfolios", key + ".gz")][1]["ContentEncoding"] == "gzip"
+    assert "p { margin: 0; }" in inlined
+    assert await deployer.storage.read("missing/index.html") is None
+    # Browsers read the bucket directly: the slug URL is a real object, removed with the slug.
+    assert client.objects[("portfolios", "sites/octocat/index.html")][0] == b"<html>hi</html>"
+    await deployer.artifacts.unlink("octocat")
+    assert ("portfolios", "sites/octocat/index.html") not in client.objects
+
+
+async def test_local_writes_are_atomic_and_off_the_event_loop(tmp_path, fake_redis):
+    storage = LocalStorage(str(tmp_path))
+    deployer = DeployerService(storage=storage, redis_client=fake_redis)
+    html = "<html>" + "<p>portfolio</p>" * 50_000 + "</html>"
+    ticks = 0
+
+    async def ticker():
+        nonlocal ticks
+        while True:
+            ticks += 1
+            await asyncio.sleep(0)
+
+    task = asyncio.create_task(ticker())
+    await asyncio.gather(*(deployer.deploy_static_portfolio(f"user-{index}", f"{html}{index}") for index in range(4)))
+    task.cancel()
+
+    # The loop kept running while pages were compressed and written.
+    assert ticks > 10
+    assert (tmp_path / object_key(await deployer.artifacts.resolve("user-3"))).read_text() == f"{html}3"
+    assert not list(tmp_path.rglob("*.tmp"))
+    with pytest.raises(StorageError):
+        await storage.write("../escape.html", b"x")
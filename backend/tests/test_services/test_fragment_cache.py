@@ -0,0 +1,52 @@
+import pytest
+
+from app.services.fragment_cache import CardFragmentCache
+from app.services.renderer import TemplateRegistry, portfolio_context
+
+
+class CountingRegistry(TemplateRegistry):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.cards_rendered = []
+
+    def render_card(self, card):
+        self.cards_rendered.append(card["id"])
+        return super().render_card(card)
+
+
+def _cards(count, **changes):
+    cards = [
+        {"id": f"repo-{index}", "name": f"repo-{index}", "description": "d", "stars": index, "forks": 0, "url": "u"}
+        for index in range(count)
+    ]
+    for index, fields in changes.items():
+        cards[int(index)].update(fields)
+    return cards
+
+
+@pytest.mark.asyncio
+async def test_regeneration_renders_only_dirty_cards(fake_redis, tmp_path):
+    registry = CountingRegistry(bytecode_cache_dir=str(tmp_path))
+    cache = CardFragmentCache(fake_redis, registry)
+
+    first = await cache.render("modern", portfolio_context(username="o", headline="h", repositories=_cards(50), skills=[]))
+    assert len(registry.cards_rendered) == 50
+
+    registry.cards_rendered.clear()
+    changed = _cards(50, **{"7": {"stars": 999}})
+    second = await cache.render("modern", portfolio_context(username="o", headline="h", repositories=changed, skills=[]))
+
+    assert registry.cards_rendered == ["repo-7"]
+    assert "Stars: 999" in second and "Stars: 999" not in first
+    # Spliced output is byte-identical to a full render.
+    full = registry.render("modern", portfolio_context(username="o", headline="h", repositories=changed, skills=[]))
+    assert second == full
+
+
+@pytest.mark.asyncio
+async def test_template_source_version_is_part_of_the_key(fake_redis, tmp_path):
+    registry = TemplateRegistry(bytecode_cache_dir=str(tmp_path))
+    card = _cards(1)[0]
+    key = CardFragmentCache(fake_redis, registry).key(card)
+    assert registry.version in key
+    assert key != CardFragmentCache(fake_redis, registry).key({**card, "description": "new"})
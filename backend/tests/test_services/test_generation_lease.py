@@ -0,0 +1,83 @@
+import uuid
+from types import SimpleNamespace
+
+import pytest
+
+from app.services.deployer import DeployerService
+from app.services.generation_lease import GenerationLease
+from app.tasks import generation
+
+
+class FakeSession:
+    def __init__(self):
+        self.jobs = {}
+
+    def add(self, job):
+        self.jobs[job.id] = job
+
+    async def commit(self):
+        pass
+
+    async def refresh(self, job):
+        pass
+
+    async def scalar(self, statement):
+        job_id = statement.whereclause.right.value
+        return self.jobs.get(job_id)
+
+
+@pytest.mark.asyncio
+async def test_lease_is_held_by_one_job_and_fenced_by_its_id(fake_redis):
+    lease = GenerationLease(fake_redis, "portfolio-1")
+
+    assert await lease.acquire("job-a") is True
+    assert await lease.acquire("job-b") is False
+    assert await lease.renew("job-b") is False and await lease.release("job-b") is False
+    assert await lease.holds("job-a") and await lease.renew("job-a")
+
+    assert await lease.release("job-a") is True
+    assert await lease.acquire("job-b") is True
+
+
+@pytest.mark.asyncio
+async def test_stale_fence_cannot_publish_over_a_newer_job(fake_redis, tmp_path):
+    lease = GenerationLease(fake_redis, "portfolio-1")
+    await lease.acquire("job-a")
+    stale = await lease.fence("job-a")
+    # job-a's lease expires and job-b takes over with a larger token.
+    fake_redis.store.pop(lease._key("lease"))
+    await lease.acquire("job-b")
+    fresh = await lease.fence("job-b")
+    assert fresh > stale and await lease.fence("job-a") is None
+    assert await lease.renew("job-a") is False and await lease.release("job-a") is False
+
+    deployer = DeployerService(str(tmp_path), redis_client=fake_redis)
+    assert await deployer.deploy_static_portfolio("octo", "<p>new</p>", fence=fresh) is not None
+    assert await deployer.deploy_static_portfolio("octo", "<p>old</p>", fence=stale) is None
+    digest = await deployer.artifacts.resolve("octo")
+    assert (tmp_path / "objects" / digest[:2] / digest[2:4] / f"{digest}.html").read_text() == "<p>new</p>"
+
+
+@pytest.mark.asyncio
+async def test_trailing_reruns_coalesce_into_one(fake_redis):
+    lease = GenerationLease(fake_redis, "portfolio-1")
+    for _ in range(3):
+        await lease.request_rerun()
+
+    assert [await lease.take_rerun() for _ in range(2)] == [True, False]
+
+
+@pytest.mark.asyncio
+async def test_repeated_requests_attach_to_the_running_job(fake_redis, monkeypatch):
+    enqueued = []
+    monkeypatch.setattr(generation.generate_portfolio, "delay", lambda job_id: enqueued.append(job_id))
+    db = FakeSession()
+    portfolio = SimpleNamespace(id=uuid.uuid4(), user_id=uuid.uuid4())
+
+    jobs = [await generation.start_generation(db, fake_redis, portfolio) for _ in range(5)]
+
+    assert len({job.id for job in jobs}) == 1
+    assert enqueued == [str(jobs[0].id)]
+    lease = GenerationLease(fake_redis, str(portfolio.id))
+    assert await lease.holder() == str(jobs[0].id)
+    assert await lease.take_rerun() is True
@@ -0,0 +1,121 @@
+from types import SimpleNamespace
+
+import pytest
+
+from app.services.deployer import DeployerService
+from app.tasks import generation
+
+
+def test_pipeline_is_one_chord_with_tracked_stages():
+    pipeline = generation._generation_pipeline("job-1", ["repo-a", "repo-b"])
+
+    stages = list(pipeline.tasks)
+    assert [(stage.task.rsplit(".", 1)[1], stage.args) for stage in stages] == [
+        ("analyze_repository", ("repo-a",)),
+        ("generate_project_description", ("repo-a",)),
+        ("analyze_repository", ("repo-b",)),
+        ("generate_project_description", ("repo-b",)),
+    ]
+    for stage in stages:
+        (completed,) = stage.options["link"]
+        (failed,) = stage.options["link_error"]
+        assert completed.task == failed.task == generation.record_generation_progress.name
+        assert completed.args == failed.args == ("job-1", 4)
+        assert failed.kwargs == {"failed": True}
+    assert pipeline.body.task == generation.render_generated_portfolio.name
+    assert pipeline.body.args == ("job-1",)
+
+
+@pytest.fixture
+def reports(monkeypatch, fake_redis):
+    recorded = []
+
+    async def fake_report(job_id, status, progress, step, **extra):
+        recorded.append((status, progress, step))
+
+    monkeypatch.setattr(generation, "get_redis_client", lambda: fake_redis)
+    monkeypatch.setattr(generation, "_report", fake_report)
+    return recorded
+
+
+def test_progress_follows_stage_completions(reports, fake_redis):
+    for _ in range(2):
+        generation.record_generation_progress.run("job-1", 4)
+    # Rendering started (e.g. the deadline fired): late completions no longer report.
+    fake_redis.store[generation._generation_key("job-1", "render")] = "1"
+    generation.record_generation_progress.run("job-1", 4)
+
+    assert reports == [
+        ("processing", 27, "Analyzing repositories and generating descriptions (1/4)"),
+        ("processing", 45, "Analyzing repositories and generating descriptions (2/4)"),
+    ]
+
+
+def test_a_failed_stage_renders_without_waiting_for_the_deadline(reports, fake_redis, monkeypatch):
+    renders = []
+    monkeypatch.setattr(generation.render_generated_portfolio, "delay", lambda *args: renders.append(args))
+
+    generation.record_generation_progress.run("job-1", 2, failed=True)
+    assert renders == []
+    generation.record_generation_progress.run("job-1", 2)
+
+    assert renders == [([], "job-1")]
+    assert reports[-1] == ("processing", 80, "Analyzing repositories and generating descriptions (2/2)")
+
+
+def test_successful_stages_leave_rendering_to_the_chord_body(reports, fake_redis, monkeypatch):
+    renders = []
+    monkeypatch.setattr(generation.render_generated_portfolio, "delay", lambda *args: renders.append(args))
+
+    for _ in range(2):
+        generation.record_generation_progress.run("job-1", 2)
+
+    assert renders == []
+
+
+def test_render_runs_once_between_chord_and_deadline(reports, fake_redis):
+    fake_redis.store[generation._generation_key("job-1", "render")] = "1"
+
+    assert generation.render_generated_portfolio.run(None, "job-1") == {"job_id": "job-1", "status": "skipped"}
+    assert reports == []
+
+
+def render_inputs(theme=None, repo_updated_at="2026-10-01T00:00:00+00:00"):
+    portfolio = SimpleNamespace(
+        subdomain="octo",
+        template_id="minimal",
+        theme_config=theme or {},
+        input_fingerprint=None,
+        last_generated_at=None,
+    )
+    repos = [SimpleNamespace(id="repo-a", updated_at=repo_updated_at)]
+    skills = [SimpleNamespace(id="skill-a", updated_at="2026-10-01T00:00:00+00:00")]
+    return portfolio, "octocat", repos, skills
+
+
+def test_fingerprint_moves_with_any_render_input():
+    baseline = generation._input_fingerprint(*render_inputs())
+
+    assert generation._input_fingerprint(*render_inputs()) == baseline
+    assert generation._input_fingerprint(*render_inputs(theme={"accent": "#000000"})) != baseline
+    assert generation._input_fingerprint(*render_inputs(repo_updated_at="2026-10-02T00:00:00+00:00")) != baseline
+
+
+@pytest.mark.asyncio
+async def test_unchanged_inputs_reuse_the_deployed_page(monkeypatch, fake_redis, tmp_path):
+    monkeypatch.setattr(
+        generation, "DeployerService", lambda **kwargs: DeployerService(str(tmp_path), redis_client=fake_redis)
+    )
+    portfolio, username, repos, skills = render_inputs()
+    portfolio.input_fingerprint = generation._input_fingerprint(portfolio, username, repos, skills)
+    portfolio.last_generated_at = "2026-10-01T00:00:00+00:00"
+
+    # Fingerprint matches but nothing is deployed (e.g. collected): regenerate.
+    assert await generation._current_artifact_url(portfolio, username, repos, skills) is None
+
+    await DeployerService(str(tmp_path), redis_client=fake_redis).deploy_static_portfolio("octo", "<html>octo</html>")
+    url = await generation._current_artifact_url(portfolio, username, repos, skills)
+    assert url is not None and url.endswith("/octo/index.html")
+
+    changed = render_inputs(repo_updated_at="2026-10-02T00:00:00+00:00")[2]
+    assert await generation._current_artifact_url(portfolio, username, changed, skills) is None
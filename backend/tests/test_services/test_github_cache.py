@@ -0,0 +1,58 @@
+from datetime import UTC, datetime
+
+import httpx
+import pytest
+
+from app.config import get_settings
+from app.services.github import GitHubService
+from app.services.rate_limiter import RateLimiter
+
+settings = get_settings()
+
+
+@pytest.mark.asyncio
+async def test_conditional_request_replays_cached_body_on_304(monkeypatch, fake_redis):
+    seen_headers = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen_headers.append(dict(request.headers))
+        if request.headers.get("if-none-match") == '"v1"':
+            return httpx.Response(304, headers={"etag": '"v1"'})
+        return httpx.Response(200, json={"login": "octocat"}, headers={"etag": '"v1"'})
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    monkeypatch.setattr("app.services.github.get_http_client", lambda: client)
+    service = GitHubService(RateLimiter(fake_redis))
+
+    first = await service._request("GET", "https://api.github.com/user", "token-a")
+    second = await service._request("GET", "https://api.github.com/user", "token-a")
+    other_token = await service._request("GET", "https://api.github.com/user", "token-b")
+
+    assert first == second == other_token == {"login": "octocat"}
+    assert "if-none-match" not in seen_headers[0]
+    assert seen_headers[1]["if-none-match"] == '"v1"'
+    # Entries are scoped per token, so a different token starts cold.
+    assert "if-none-match" not in seen_headers[2]
+    await client.aclose()
+
+
+@pytest.mark.asyncio
+async def test_commit_details_and_since_listings_are_not_cached(monkeypatch, fake_redis):
+    def handler(request: httpx.Request) -> httpx.Response:
+        body = [] if request.url.path.endswith("/commits") else {"sha": "abc"}
+        return httpx.Response(200, json=body, headers={"etag": '"v1"'})
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    monkeypatch.setattr("app.services.github.get_http_client", lambda: client)
+    service = GitHubService(RateLimiter(fake_redis))
+
+    def cached_keys():
+        return [key for key in fake_redis.store if key.startswith(f"{settings.redis_cache_prefix}github:")]
+
+    await service.fetch_commit_detail("token-a", "octo", "repo", "abc")
+    await service.list_repo_commits("token-a", "octo", "repo", since=datetime(2026, 10, 1, tzinfo=UTC))
+    assert cached_keys() == []
+
+    await service.list_repo_commits("token-a", "octo", "repo")
+    assert len(cached_keys()) == 1
+    await client.aclose()
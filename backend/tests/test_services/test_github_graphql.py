@@ -0,0 +1,51 @@
+from app.services.github_graphql import _commit_from_node, _repository_from_node
+
+
+def test_repository_node_maps_to_rest_shape():
+    node = {
+        "databaseId": 42,
+        "name": "devforge",
+        "nameWithOwner": "octocat/devforge",
+        "description": "Portfolio generator",
+        "url": "https://github.com/octocat/devforge",
+        "homepageUrl": None,
+        "primaryLanguage": {"name": "Python"},
+        "stargazerCount": 7,
+        "forkCount": 2,
+        "isFork": False,
+        "isPrivate": True,
+        "pushedAt": "2026-01-02T03:04:05Z",
+        "repositoryTopics": {"nodes": [{"topic": {"name": "fastapi"}}]},
+        "languages": {"edges": [{"size": 1200, "node": {"name": "Python"}}, {"size": 80, "node": {"name": "HTML"}}]},
+    }
+
+    repo = _repository_from_node(node)
+
+    assert repo["id"] == 42
+    assert repo["full_name"] == "octocat/devforge"
+    assert repo["html_url"] == "https://github.com/octocat/devforge"
+    assert repo["language"] == "Python"
+    assert repo["topics"] == ["fastapi"]
+    assert repo["stargazers_count"] == 7
+    assert repo["private"] is True
+    assert repo["languages"] == {"Python": 1200, "HTML": 80}
+
+
+def test_commit_node_carries_stats():
+    node = {
+        "oid": "a" * 40,
+        "message": "Add feature",
+        "committedDate": "2026-01-02T03:04:05Z",
+        "additions": 10,
+        "deletions": 3,
+        "changedFilesIfAvailable": 2,
+        "author": {"name": "Octo Cat", "email": "octo@example.com", "date": "2026-01-01T00:00:00Z"},
+    }
+
+    commit = _commit_from_node(node)
+
+    assert commit["sha"] == "a" * 40
+    assert commit["additions"] == 10
+    assert commit["deletions"] == 3
+    assert commit["files_changed"] == 2
+    assert commit["committed_at"].year == 2026 and commit["committed_at"].day == 1
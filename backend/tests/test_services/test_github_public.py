@@ -1,6 +1,10 @@
+import asyncio
+
+import httpx
 import pytest
 
-from app.services.github import parse_github_username
+from app.services.github import GitHubService, last_page_number, parse_github_username, parse_link_header
+from app.services.rate_limiter import RateLimiter
 
 
 @pytest.mark.parametrize(
@@ -27,3 +31,49 @@ def test_parse_github_username_valid(raw: str, expected: str):
 def test_parse_github_username_invalid(raw: str):
     with pytest.raises(ValueError):
         parse_github_username(raw)
+
+
+def test_parse_link_header_and_last_page():
+    link = (
+        '<https://api.github.com/user/repos?page=2&per_page=100>; rel="next", '
+        '<https://api.github.com/user/repos?page=7&per_page=100>; rel="last"'
+    )
+    links = parse_link_header(link)
+    assert links["next"].endswith("page=2&per_page=100")
+
+    response = httpx.Response(200, headers={"link": link})
+    assert last_page_number(response) == 7
+    assert last_page_number(httpx.Response(200)) == 1
+
+
+@pytest.mark.asyncio
+async def test_public_repositories_fan_out_keeps_page_order(monkeypatch, fake_redis):
+    requested_pages = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        page = int(request.url.params["page"])
+        requested_pages.append(page)
+        # Later pages answer first to prove ordering does not depend on arrival.
+        await asyncio.sleep(0.01 * (5 - page))
+        link = '<https://api.github.com/users/octocat/repos?page=5>; rel="last"'
+        size = 100 if page < 5 else 30
+        return httpx.Response(
+            200,
+            json=[{"id": page * 1000 + index} for index in range(size)],
+            headers={"link": link},
+        )
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    monkeypatch.setattr("app.services.github.get_http_client", lambda: client)
+    monkeypatch.setattr("app.services.github.settings.github_cache_enabled", False)
+    service = GitHubService(RateLimiter(fake_redis))
+
+    repos = await service.get_public_repositories("octocat", max_repos=250)
+
+    assert len(repos) == 250
+    assert [repo["id"] for repo in repos[:2]] == [1000, 1001]
+    assert repos[100]["id"] == 2000
+    assert repos[-1]["id"] == 3049
+    # max_repos=250 needs only three pages, so pages 4-5 are never requested.
+    assert sorted(requested_pages) == [1, 2, 3]
+    await client.aclose()
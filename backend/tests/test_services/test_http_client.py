@@ -0,0 +1,15 @@
+import pytest
+
+from app.core.http import close_http_client, get_http_client, http_pool_stats
+
+
+@pytest.mark.asyncio
+async def test_http_client_is_shared_per_loop_and_closable():
+    client = get_http_client()
+    assert get_http_client() is client
+    assert http_pool_stats()["clients"] >= 1
+
+    await close_http_client()
+    assert client.is_closed
+    assert get_http_client() is not client
+    await close_http_client()
@@ -0,0 +1,44 @@
+import pytest
+
+from app.services.progress import ProgressReporter
+
+
+def recording_writer():
+    writes = []
+
+    async def writer(job_id, values):
+        writes.append(values)
+
+    return writer, writes
+
+
+@pytest.mark.asyncio
+async def test_progress_events_are_all_published_but_writes_are_coalesced(fake_redis):
+    job_id = "7f1c2a3e-0000-4000-8000-000000000001"
+    writer, writes = recording_writer()
+    reporter = ProgressReporter(fake_redis, job_id, writer=writer)
+
+    for progress in range(10, 20):
+        await reporter.report("processing", progress, f"step {progress}")
+    await reporter.report("completed", 100, "Completed", url="/generated/octo/index.html")
+
+    assert len(fake_redis.published) == 11
+    assert [(values["status"], values["progress_percentage"]) for values in writes] == [
+        ("processing", 10),
+        ("completed", 100),
+    ]
+    assert writes[-1]["completed_at"] is not None and "completed_at" not in writes[0]
+
+
+@pytest.mark.asyncio
+async def test_flush_persists_the_latest_coalesced_state(fake_redis):
+    job_id = "7f1c2a3e-0000-4000-8000-000000000002"
+    writer, writes = recording_writer()
+    reporter = ProgressReporter(fake_redis, job_id, writer=writer)
+
+    await reporter.report("processing", 10, "Starting")
+    await ProgressReporter(fake_redis, job_id, writer=writer).report("processing", 45, "Analyzing (3/6)")
+    await reporter.flush()
+
+    assert [values["progress_percentage"] for values in writes] == [10, 45]
+    assert writes[-1]["current_step"] == "Analyzing (3/6)"
@@ -0,0 +1,139 @@
+import asyncio
+
+import httpx
+import pytest
+from starlette.responses import PlainTextResponse
+
+from app.core.hosting import PublishedSiteMiddleware
+from app.services.deployer import DeployerService
+from app.services.published_sites import (
+    PageLRU,
+    PublishedPage,
+    PublishedSiteResolver,
+    invalidate_published_hosts,
+    normalize_host,
+    portfolio_hosts,
+)
+from app.services.storage import LocalStorage
+
+
+async def fallthrough_app(scope, receive, send):
+    await PlainTextResponse("app", status_code=404)(scope, receive, send)
+
+
+def make_lookup(sites: dict[str, dict]):
+    calls = []
+
+    async def lookup(host):
+        calls.append(host)
+        return sites.get(host)
+
+    return lookup, calls
+
+
+async def wait_for(predicate):
+    for _ in range(100):
+        if predicate():
+            return
+        await asyncio.sleep(0)
+    raise AssertionError("condition not reached")
+
+
+@pytest.mark.asyncio
+async def test_hosts_are_served_from_memory_after_the_first_lookup(fake_redis, tmp_path):
+    await DeployerService(str(tmp_path), redis_client=fake_redis).deploy_static_portfolio("octo", "<html>octo</html>")
+    lookup, calls = make_lookup({"octo.devforge.dev": {"portfolio_id": "1", "subdomain": "octo"}})
+    resolver = PublishedSiteResolver(fake_redis, storage=LocalStorage(str(tmp_path)), lookup=lookup)
+    transport = httpx.ASGITransport(app=PublishedSiteMiddleware(fallthrough_app, resolver=resolver))
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://octo.devforge.dev") as client:
+        first = await client.get("/", headers={"Accept-Encoding": "identity"})
+        second = await client.get("/", headers={"Accept-Encoding": "gzip"})
+        revalidated = await client.get("/", headers={"Accept-Encoding": "gzip", "If-None-Match": second.headers["etag"]})
+        api = await client.get("/api/portfolios")
+        app_host = await client.get("/", headers={"Host": "www.devforge.dev"})
+
+    assert first.status_code == 200 and first.text == "<html>octo</html>"
+    assert second.headers["content-encoding"] == "gzip" and second.text == "<html>octo</html>"
+    assert revalidated.status_code == 304
+    assert (api.text, app_host.text) == ("app", "app")
+    assert calls == ["octo.devforge.dev"]
+    assert len(resolver.pages) == 1 and list(resolver.hosts) == ["octo.devforge.dev"]
+    await resolver.close()
+
+
+@pytest.mark.asyncio
+async def test_unknown_hosts_fall_through_and_are_indexed_as_missing(fake_redis, tmp_path):
+    lookup, calls = make_lookup({})
+    resolver = PublishedSiteResolver(fake_redis, storage=LocalStorage(str(tmp_path)), lookup=lookup)
+    transport = httpx.ASGITransport(app=PublishedSiteMiddleware(fallthrough_app, resolver=resolver))
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://nobody.example.com") as client:
+        responses = [await client.get("/") for _ in range(3)]
+
+    assert [response.text for response in responses] == ["app"] * 3
+    assert calls == ["nobody.example.com"]
+    await resolver.close()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("base_url", ["http://localhost:8000", "http://127.0.0.1:8000", "http://[::1]:8000"])
+async def test_app_hosts_and_ip_literals_never_reach_the_resolver(fake_redis, tmp_path, base_url):
+    lookup, calls = make_lookup({})
+    resolver = PublishedSiteResolver(fake_redis, storage=LocalStorage(str(tmp_path)), lookup=lookup)
+    transport = httpx.ASGITransport(app=PublishedSiteMiddleware(fallthrough_app, resolver=resolver))
+
+    async with httpx.AsyncClient(transport=transport, base_url=base_url) as client:
+        assert (await client.get("/")).text == "app"
+
+    assert calls == [] and fake_redis.store == {}
+    await resolver.close()
+
+
+def test_normalize_host_strips_ports_from_ipv6_literals():
+    assert normalize_host("[::1]:8000") == "::1"
+    assert normalize_host("[2001:DB8::1]") == "2001:db8::1"
+    assert normalize_host("Octo.Devforge.dev.:443") == "octo.devforge.dev"
+
+
+@pytest.mark.asyncio
+async def test_invalidation_evicts_the_page_on_every_replica(fake_redis, tmp_path):
+    deployer = DeployerService(str(tmp_path), redis_client=fake_redis)
+    await deployer.deploy_static_portfolio("octo", "<html>v1</html>")
+    lookup, calls = make_lookup({"octo.dev": {"portfolio_id": "1", "subdomain": "octo"}})
+    replicas = [PublishedSiteResolver(fake_redis, storage=LocalStorage(str(tmp_path)), lookup=lookup) for _ in range(2)]
+
+    for replica in replicas:
+        assert (await replica.page("octo.dev")).variants["identity"] == b"<html>v1</html>"
+    await wait_for(lambda: len(fake_redis.subscribers) == 2)
+
+    await deployer.deploy_static_portfolio("octo", "<html>v2</html>")
+    await invalidate_published_hosts(fake_redis, portfolio_hosts("octo", "Octo.dev"))
+    await wait_for(lambda: not any(replica.hosts for replica in replicas))
+
+    for replica in replicas:
+        assert (await replica.page("octo.dev")).variants["identity"] == b"<html>v2</html>"
+        await replica.close()
+    assert calls == ["octo.dev", "octo.dev"]
+
+
+def test_page_lru_is_bounded_by_bytes():
+    pages = PageLRU(max_bytes=10)
+    for digest in ("a", "b", "c"):
+        pages.put(PublishedPage(digest=digest, variants={"identity": b"12345"}))
+
+    assert (len(pages), pages.size) == (2, 10)
+    assert pages.get("a") is None and pages.get("c") is not None
+
+
+@pytest.mark.asyncio
+async def test_pages_deployed_before_content_addressing_are_still_served(fake_redis, tmp_path):
+    (tmp_path / "octo").mkdir()
+    (tmp_path / "octo" / "index.html").write_text("<html>legacy</html>")
+    resolver = PublishedSiteResolver(fake_redis, storage=LocalStorage(str(tmp_path)))
+
+    page = await resolver.page_for_slug("octo")
+
+    assert page is not None and page.variants == {"identity": b"<html>legacy</html>"}
+    assert await resolver.page_for_slug("missing") is None
+    assert await resolver.page_for_slug("..") is None
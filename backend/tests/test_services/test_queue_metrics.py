@@ -0,0 +1,45 @@
+import json
+
+import pytest
+
+from app.services.queue_metrics import QueueMonitor, priority_lists
+from app.tasks import analysis, generation
+from app.tasks.celery_app import PRIORITY_HIGH, PRIORITY_LOW, celery_app
+
+
+def message(sent_at):
+    return json.dumps({"body": "", "headers": {"sent_at": sent_at}, "properties": {}})
+
+
+def test_tasks_are_routed_to_their_queues():
+    queues = {
+        task.name: celery_app.amqp.router.route({}, task.name)["queue"].name
+        for task in (
+            generation.generate_portfolio,
+            analysis.analyze_commits_batch,
+            generation.generate_project_description,
+        )
+    }
+
+    assert list(queues.values()) == ["interactive", "github-io", "ai"]
+
+
+def test_generation_stages_outrank_backfills():
+    stages = list(generation._generation_pipeline("job-1", ["repo-a"]).tasks)
+    backfill = analysis._commit_batches("repo-a", ["sha"], backfill=True, priority=PRIORITY_LOW)
+
+    assert {stage.options["priority"] for stage in stages} == {PRIORITY_HIGH}
+    assert backfill.tasks[0].options["priority"] == PRIORITY_LOW
+
+
+@pytest.mark.asyncio
+async def test_depth_and_wait_cover_every_priority_list(fake_redis):
+    high, low = priority_lists("github-io")[0], priority_lists("github-io")[-1]
+    await fake_redis.lpush(low, message(100.0))
+    await fake_redis.lpush(low, message(130.0))
+    await fake_redis.lpush(high, message(120.0))
+
+    stats = await QueueMonitor(fake_redis).stats(now=160.0)
+
+    assert stats["github-io"] == {"depth": 3, "wait_seconds": 60.0}
+    assert stats["interactive"] == {"depth": 0, "wait_seconds": 0.0}
@@ -0,0 +1,72 @@
+import time
+
+import httpx
+import pytest
+
+from app.core.exceptions import RateLimitExceeded
+from app.services.rate_governor import GitHubRateGovernor, rate_identity, rate_resource
+
+
+def _response(status_code: int, **headers) -> httpx.Response:
+    return httpx.Response(status_code, headers={key.replace("_", "-"): value for key, value in headers.items()})
+
+
+@pytest.mark.asyncio
+async def test_budgets_are_tracked_per_token(fake_redis):
+    governor = GitHubRateGovernor(fake_redis)
+    heavy = rate_identity("heavy-token")
+    light = rate_identity("light-token")
+    reset = str(int(time.time()) + 600)
+
+    await governor.observe(heavy, _response(200, x_ratelimit_remaining="0", x_ratelimit_reset=reset))
+
+    # The exhausted token cannot proceed within a short wait budget...
+    with pytest.raises(RateLimitExceeded):
+        await governor.acquire(heavy, max_wait=1)
+    # ...while another token is unaffected.
+    await governor.acquire(light, max_wait=1)
+    assert rate_identity(None).startswith("ip:")
+
+
+@pytest.mark.asyncio
+async def test_retry_after_blocks_then_releases(fake_redis, monkeypatch):
+    governor = GitHubRateGovernor(fake_redis)
+    identity = rate_identity("token")
+    monkeypatch.setattr("app.services.rate_governor.settings.github_rate_poll_seconds", 0.01)
+
+    limited = await governor.observe(identity, _response(429, retry_after="0.05"))
+    assert limited is True
+
+    started = time.monotonic()
+    await governor.acquire(identity, max_wait=5)
+    assert time.monotonic() - started >= 0.04
+
+
+@pytest.mark.asyncio
+async def test_out_of_order_headers_do_not_raise_remaining(fake_redis):
+    governor = GitHubRateGovernor(fake_redis)
+    identity = rate_identity("token")
+    reset = str(int(time.time()) + 600)
+
+    await governor.observe(identity, _response(200, x_ratelimit_remaining="40", x_ratelimit_reset=reset))
+    await governor.observe(identity, _response(200, x_ratelimit_remaining="45", x_ratelimit_reset=reset))
+
+    state = await fake_redis.hgetall(f"github:budget:{identity}:core")
+    assert state["remaining"] == "40"
+
+
+@pytest.mark.asyncio
+async def test_graphql_and_rest_budgets_are_tracked_separately(fake_redis):
+    governor = GitHubRateGovernor(fake_redis)
+    identity = rate_identity("token")
+    reset = str(int(time.time()) + 600)
+    assert rate_resource("https://api.github.com/graphql") == "graphql"
+    assert rate_resource("https://api.github.com/repos/octo/hello/commits") == "core"
+
+    exhausted = _response(200, x_ratelimit_remaining="0", x_ratelimit_reset=reset, x_ratelimit_resource="graphql")
+    # The header names the budget actually charged, whatever the caller assumed.
+    await governor.observe(identity, exhausted, "core")
+
+    with pytest.raises(RateLimitExceeded):
+        await governor.acquire(identity, "graphql", max_wait=1)
+    await governor.acquire(identity, "core", max_wait=1)
@@ -0,0 +1,49 @@
+import pytest
+
+from app.services.renderer import TemplateRegistry, css_value, portfolio_context
+
+
+@pytest.fixture
+def registry(tmp_path):
+    return TemplateRegistry(bytecode_cache_dir=str(tmp_path))
+
+
+def _context(**overrides):
+    return portfolio_context(
+        username="octocat",
+        headline="@octocat - Remote",
+        repositories=[{"name": "hello", "description": "Says hello", "stars": 3, "forks": 1, "url": "https://x"}],
+        skills=[{"name": "Python", "proficiency": 4}],
+        stats=[("Followers", 10)],
+        **overrides,
+    )
+
+
+@pytest.mark.parametrize("template_id", ["minimal", "modern", "creative"])
+def test_every_registered_template_renders(registry, template_id):
+    html = registry.render(template_id, _context())
+    assert "<title>octocat | DevForge Portfolio</title>" in html
+    assert "Python (4/5)" in html
+    assert 'href="https://x"' in html
+    assert f"template-{template_id}" in html
+    assert registry.get(template_id)["defaults"]["accent"] in html
+
+
+def test_content_is_escaped_and_theme_cannot_break_out_of_css(registry):
+    context = _context(theme={"accent": "red;}</style><script>alert(1)</script>"})
+    context["repositories"][0]["description"] = "<img src=x onerror=alert(1)>"
+    html = registry.render("minimal", context)
+
+    assert "<img src=x" not in html
+    assert "&lt;img src=x onerror=alert(1)&gt;" in html
+    assert "<script>" not in html
+    assert css_value("'Space Grotesk', serif") == "'Space Grotesk', serif"
+
+
+def test_unknown_template_falls_back_to_minimal(registry):
+    assert "template-minimal" in registry.render("does-not-exist", _context())
+    assert registry.get("does-not-exist") is None
+
+
+def test_bytecode_cache_is_written(registry, tmp_path):
+    assert any(tmp_path.iterdir())
@@ -0,0 +1,39 @@
+import asyncio
+import uuid
+from datetime import UTC, datetime
+from types import SimpleNamespace
+
+import pytest
+
+from app.services.github import GitHubAPIError, GitHubService
+from app.services.rate_limiter import RateLimiter
+
+
+@pytest.mark.asyncio
+async def test_languages_fetched_concurrently_and_failures_left_stale(monkeypatch, fake_redis):
+    monkeypatch.setattr("app.services.github.settings.github_languages_concurrency", 2)
+    service = GitHubService(RateLimiter(fake_redis))
+    in_flight = peak = 0
+
+    async def fake_languages(token, full_name):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        if full_name == "octocat/broken":
+            raise GitHubAPIError("GitHub API temporary failure: 502")
+        return {"Python": 1200, "HTML": 30}
+
+    monkeypatch.setattr(service, "fetch_repo_languages", fake_languages)
+    pushed_at = datetime(2026, 5, 1, tzinfo=UTC)
+    repos = [
+        SimpleNamespace(id=uuid.uuid4(), full_name=name, pushed_at=pushed_at)
+        for name in ("octocat/a", "octocat/broken", "octocat/b", "octocat/c")
+    ]
+
+    rows = await service.fetch_languages("token", repos)
+
+    assert peak == 2
+    assert [row["id"] for row in rows] == [repos[0].id, repos[2].id, repos[3].id]
+    assert rows[0] == {"id": repos[0].id, "languages": {"Python": 1200, "HTML": 30}, "languages_pushed_at": pushed_at}
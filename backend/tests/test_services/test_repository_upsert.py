@@ -0,0 +1,46 @@
+import uuid
+
+from sqlalchemy.dialects import postgresql
+
+from app.services.github import repository_upsert_statement
+
+
+def _repo(github_id: int, **extra) -> dict:
+    return {
+        "id": github_id,
+        "name": f"repo-{github_id}",
+        "full_name": f"octocat/repo-{github_id}",
+        "html_url": f"https://github.com/octocat/repo-{github_id}",
+        "stargazers_count": 3,
+        "pushed_at": "2026-01-02T03:04:05Z",
+        **extra,
+    }
+
+
+def _compile(statement) -> str:
+    return str(statement.compile(dialect=postgresql.dialect()))
+
+
+def test_page_becomes_single_conditional_upsert():
+    statement = repository_upsert_statement(uuid.uuid4(), [_repo(1), _repo(2), _repo(1)])
+    sql = _compile(statement)
+
+    assert sql.count("INSERT INTO repositories") == 1
+    assert "ON CONFLICT ON CONSTRAINT uq_repositories_github_id DO UPDATE" in sql
+    assert "IS DISTINCT FROM excluded.stars" in sql
+    assert "RETURNING repositories.id, xmax = 0" in sql
+    # Duplicate github ids within a page collapse to one VALUES row.
+    params = statement.compile(dialect=postgresql.dialect()).params
+    assert sorted(value for key, value in params.items() if key.startswith("github_id")) == [1, 2]
+    # REST payloads carry no language sizes, so existing ones are preserved.
+    assert "languages = excluded.languages" not in sql
+
+
+def test_languages_updated_when_payload_carries_them():
+    sql = _compile(repository_upsert_statement(uuid.uuid4(), [_repo(1, languages={"Python": 10})]))
+    assert "languages = excluded.languages" in sql
+    assert "languages_pushed_at = excluded.languages_pushed_at" in sql
+
+
+def test_empty_page_builds_nothing():
+    assert repository_upsert_statement(uuid.uuid4(), []) is None
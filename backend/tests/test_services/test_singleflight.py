@@ -0,0 +1,96 @@
+import asyncio
+
+import pytest
+
+from app.services.singleflight import SingleFlight
+
+
+@pytest.fixture(autouse=True)
+def fast_polling(monkeypatch):
+    monkeypatch.setattr("app.services.singleflight.settings.singleflight_poll_seconds", 0.001)
+
+
+@pytest.mark.asyncio
+async def test_concurrent_calls_in_one_process_share_a_run(fake_redis):
+    flights = SingleFlight(fake_redis, "test")
+    calls = 0
+
+    async def compute():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return {"value": calls}
+
+    results = await asyncio.gather(*(flights.do("octocat:minimal", compute) for _ in range(10)))
+
+    assert calls == 1
+    assert results == [{"value": 1}] * 10
+
+
+@pytest.mark.asyncio
+async def test_replicas_share_the_leaders_published_result(fake_redis):
+    replica_a = SingleFlight(fake_redis, "test")
+    replica_b = SingleFlight(fake_redis, "test")
+    calls = []
+
+    async def compute(name):
+        calls.append(name)
+        await asyncio.sleep(0.02)
+        return {"computed_by": name}
+
+    leader = asyncio.create_task(replica_a.do("octocat:minimal", lambda: compute("a")))
+    await asyncio.sleep(0)
+    follower = await replica_b.do("octocat:minimal", lambda: compute("b"))
+
+    assert await leader == {"computed_by": "a"}
+    assert follower == {"computed_by": "a"}
+    assert calls == ["a"]
+
+
+@pytest.mark.asyncio
+async def test_followers_of_a_new_flight_never_get_the_previous_result(fake_redis):
+    replica_a = SingleFlight(fake_redis, "test")
+    replica_b = SingleFlight(fake_redis, "test")
+
+    async def compute(value):
+        await asyncio.sleep(0.02)
+        return {"value": value}
+
+    assert await replica_a.do("octocat:minimal", lambda: compute(1)) == {"value": 1}
+    # Second flight within the first result's TTL: a follower must wait for the new leader.
+    leader = asyncio.create_task(replica_a.do("octocat:minimal", lambda: compute(2)))
+    await asyncio.sleep(0)
+    follower = await replica_b.do("octocat:minimal", lambda: compute(3))
+
+    assert await leader == follower == {"value": 2}
+
+
+@pytest.mark.asyncio
+async def test_expired_leader_does_not_release_its_successors_lock(fake_redis):
+    flights = SingleFlight(fake_redis, "test")
+    lock_key = flights._key("octocat:minimal", "lock")
+
+    async def outlive_the_lock():
+        # The lock expires mid-computation and another replica takes it.
+        fake_redis.store[lock_key] = "successor"
+        return {"ok": True}
+
+    assert await flights.do("octocat:minimal", outlive_the_lock) == {"ok": True}
+    assert fake_redis.store[lock_key] == "successor"
+
+
+@pytest.mark.asyncio
+async def test_leader_failure_reaches_followers_and_releases_the_key(fake_redis):
+    flights = SingleFlight(fake_redis, "test")
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("github down")
+
+    results = await asyncio.gather(*(flights.do("octocat:minimal", fail) for _ in range(3)), return_exceptions=True)
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+    async def succeed():
+        return {"ok": True}
+
+    assert await flights.do("octocat:minimal", succeed) == {"ok": True}
@@ -0,0 +1,39 @@
+import asyncio
+
+import pytest
+
+from app.tasks import celery_app
+from app.tasks.runtime import WorkerRuntime
+
+
+async def current_loop():
+    return asyncio.get_running_loop()
+
+
+def test_tasks_share_one_persistent_loop(monkeypatch):
+    runtime = WorkerRuntime()
+    runtime.start()
+    monkeypatch.setattr(celery_app, "runtime", runtime)
+    try:
+        loops = {celery_app.run_async(current_loop()) for _ in range(3)}
+        assert loops == {runtime.loop}
+
+        async def boom():
+            raise ValueError("task failed")
+
+        with pytest.raises(ValueError):
+            celery_app.run_async(boom())
+        # A failing task leaves the loop serving the next one.
+        assert celery_app.run_async(current_loop()) is runtime.loop
+    finally:
+        runtime.stop()
+    assert not runtime.running
+
+
+def test_without_a_worker_runtime_each_call_gets_its_own_loop(monkeypatch):
+    monkeypatch.setattr(celery_app, "runtime", WorkerRuntime())
+
+    first = celery_app.run_async(current_loop())
+    second = celery_app.run_async(current_loop())
+
+    assert first is not second and first.is_closed()